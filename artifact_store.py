@@ -0,0 +1,328 @@
+import os
+import sys
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+
+# Hot tier: where new artifacts land and where lookups are served from
+ARTIFACT_DIR = os.environ.get(
+    "ARTIFACT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "artifacts")
+)
+# Optional cold tier (e.g. a larger, slower disk). Without it, evicted artifacts are deleted.
+ARTIFACT_COLD_DIR = os.environ.get("ARTIFACT_COLD_DIR")
+
+# Eviction limits
+HOT_MAX_GB = float(os.environ.get("ARTIFACT_HOT_MAX_GB", 10))
+COLD_MAX_GB = float(os.environ.get("ARTIFACT_COLD_MAX_GB", 50))
+MAX_AGE_DAYS = float(os.environ.get("ARTIFACT_MAX_AGE_DAYS", 30))
+
+# Artifacts stored without a job are pinned under this job name until a job
+# claims them with add_ref(), or until they go unused for UNCLAIMED_PIN_HOURS
+UNCLAIMED = "unclaimed"
+UNCLAIMED_PIN_HOURS = 24
+
+HOT = "hot"
+COLD = "cold"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    digest TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    tier TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (tier, last_access);
+CREATE INDEX IF NOT EXISTS artifacts_kind ON artifacts (kind, created);
+CREATE TABLE IF NOT EXISTS refs (
+    job TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (job, digest)
+);
+CREATE INDEX IF NOT EXISTS refs_digest ON refs (digest);
+"""
+
+
+def file_digest(path):
+    """Return the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for pipeline outputs (WAVs, videos).
+
+    Artifacts live at <tier>/objects/<2 hex>/<digest>/<original name>, so
+    identical files are stored once, directories stay small, and the original
+    file name is kept for uploads. An SQLite index answers lookups without
+    scanning directories and tracks which jobs still reference each artifact.
+
+    Eviction never touches referenced artifacts, nor recently used ones that
+    were stored without a job and not claimed yet. Unreferenced ones are
+    deleted once older than max_age_days, moved from the hot to the cold tier
+    (least recently used first) while the hot tier is over its limit, and
+    deleted (LRU) while the cold tier is over its limit.
+    """
+
+    def __init__(self, root=ARTIFACT_DIR, cold_root=ARTIFACT_COLD_DIR, hot_max_gb=HOT_MAX_GB,
+                 cold_max_gb=COLD_MAX_GB, max_age_days=MAX_AGE_DAYS):
+        """
+        Initialize the store.
+
+        Args:
+            root (str): Hot tier directory (also holds the index)
+            cold_root (str): Cold tier directory, or None for a single tier
+            hot_max_gb (float): Size limit of the hot tier
+            cold_max_gb (float): Size limit of the cold tier
+            max_age_days (float): Unreferenced artifacts older than this are deleted
+        """
+        self.roots = {HOT: root}
+        if cold_root:
+            self.roots[COLD] = cold_root
+        for tier_root in self.roots.values():
+            os.makedirs(os.path.join(tier_root, "objects"), exist_ok=True)
+
+        self.limits = {HOT: hot_max_gb * 1024 ** 3, COLD: cold_max_gb * 1024 ** 3}
+        self.max_age = max_age_days * 86400
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(root, "index.db"), timeout=30, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def _path(self, tier, digest, name):
+        return os.path.join(self.roots[tier], "objects", digest[:2], digest, name)
+
+    def put(self, path, kind, job=None, move=True):
+        """
+        Add a file to the store.
+
+        Args:
+            path (str): File to add
+            kind (str): Artifact kind, e.g. "audio", "video" or "reels"
+            job (str): Job that references the artifact. Without one, the
+                artifact is pinned until a job claims it with add_ref().
+            move (bool): Move the file into the store instead of copying it
+
+        Returns:
+            str: Path of the stored artifact
+        """
+        digest = file_digest(path)
+        name = os.path.basename(path)
+        now = time.time()
+
+        with self.lock:
+            row = self.db.execute("SELECT name, tier FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+            stored = self._path(row[1], digest, row[0]) if row else None
+            if row and os.path.exists(stored):
+                # Already stored - drop the duplicate
+                if move and os.path.abspath(path) != os.path.abspath(stored):
+                    os.remove(path)
+                self.db.execute("UPDATE artifacts SET last_access = ? WHERE digest = ?", (now, digest))
+            elif row:
+                # The stored copy was removed behind the store's back - this file replaces it
+                self._remove_empty_dir(os.path.dirname(stored))
+                stored = self._path(HOT, digest, name)
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                (shutil.move if move else shutil.copy2)(path, stored)
+                self.db.execute(
+                    "UPDATE artifacts SET name = ?, size = ?, tier = ?, last_access = ? WHERE digest = ?",
+                    (name, os.path.getsize(stored), HOT, now, digest)
+                )
+            else:
+                stored = self._path(HOT, digest, name)
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                (shutil.move if move else shutil.copy2)(path, stored)
+                self.db.execute(
+                    "INSERT INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (digest, name, kind, os.path.getsize(stored), HOT, now, now)
+                )
+            if job:
+                self._add_ref(job, digest)
+            else:
+                self.db.execute(
+                    "INSERT OR IGNORE INTO refs SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM refs WHERE digest = ?)",
+                    (UNCLAIMED, digest, digest)
+                )
+            self.db.commit()
+
+        self.evict()
+        return self.get(digest) or stored
+
+    def get(self, digest):
+        """
+        Look up an artifact by digest, moving it back to the hot tier if it was demoted.
+
+        Returns:
+            str: Path of the artifact, or None if it isn't stored
+        """
+        with self.lock:
+            row = self.db.execute("SELECT name, tier FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+            if not row:
+                return None
+            name, tier = row
+            path = self._path(tier, digest, name)
+            if not os.path.exists(path):
+                # Removed behind the store's back
+                self._forget(digest, tier, name)
+                self.db.commit()
+                return None
+            if tier == COLD:
+                hot_path = self._path(HOT, digest, name)
+                os.makedirs(os.path.dirname(hot_path), exist_ok=True)
+                shutil.move(path, hot_path)
+                self._remove_empty_dir(os.path.dirname(path))
+                path = hot_path
+                self.db.execute("UPDATE artifacts SET tier = ? WHERE digest = ?", (HOT, digest))
+            self.db.execute("UPDATE artifacts SET last_access = ? WHERE digest = ?", (time.time(), digest))
+            self.db.commit()
+            return path
+
+    def latest(self, kind):
+        """Return the path of the most recently stored artifact of a kind, or None."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT digest FROM artifacts WHERE kind = ? ORDER BY created DESC LIMIT 5", (kind,)
+            ).fetchall()
+        for (digest,) in rows:
+            path = self.get(digest)
+            if path:
+                return path
+        return None
+
+    def add_ref(self, job, digest):
+        """Mark an artifact as used by a job, protecting it from eviction."""
+        with self.lock:
+            self._add_ref(job, digest)
+            self.db.commit()
+
+    def _add_ref(self, job, digest):
+        self.db.execute("INSERT OR IGNORE INTO refs VALUES (?, ?)", (job, digest))
+        self.db.execute("DELETE FROM refs WHERE job = ? AND digest = ?", (UNCLAIMED, digest))
+
+    def release(self, job):
+        """Drop all references held by a job."""
+        with self.lock:
+            self.db.execute("DELETE FROM refs WHERE job = ?", (job,))
+            self.db.commit()
+
+    def _forget(self, digest, tier, name):
+        path = self._path(tier, digest, name)
+        if os.path.exists(path):
+            os.remove(path)
+        self._remove_empty_dir(os.path.dirname(path))
+        self.db.execute("DELETE FROM artifacts WHERE digest = ?", (digest,))
+        self.db.execute("DELETE FROM refs WHERE digest = ?", (digest,))
+
+    def _remove_empty_dir(self, directory):
+        try:
+            os.rmdir(directory)
+            os.rmdir(os.path.dirname(directory))
+        except OSError:
+            pass
+
+    def _unreferenced(self, where, params=()):
+        # Unclaimed pins only protect artifacts that were used recently
+        pin_cutoff = time.time() - UNCLAIMED_PIN_HOURS * 3600
+        return self.db.execute(
+            "SELECT digest, name, tier, size FROM artifacts "
+            "WHERE digest NOT IN (SELECT digest FROM refs WHERE job != ?) "
+            "AND NOT (last_access >= ? AND digest IN (SELECT digest FROM refs WHERE job = ?)) AND " + where,
+            (UNCLAIMED, pin_cutoff, UNCLAIMED) + tuple(params)
+        ).fetchall()
+
+    def tier_size(self, tier):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM artifacts WHERE tier = ?", (tier,)).fetchone()[0]
+
+    def evict(self):
+        """
+        Apply the age and size limits to unreferenced artifacts.
+
+        Returns:
+            dict: Number of artifacts deleted and demoted
+        """
+        deleted = 0
+        demoted = 0
+        with self.lock:
+            # Age limit
+            cutoff = time.time() - self.max_age
+            for digest, name, tier, size in self._unreferenced("last_access < ?", (cutoff,)):
+                self._forget(digest, tier, name)
+                deleted += 1
+
+            # Hot tier limit: demote to the cold tier, or delete without one
+            excess = self.tier_size(HOT) - self.limits[HOT]
+            if excess > 0:
+                for digest, name, tier, size in self._unreferenced("tier = ? ORDER BY last_access", (HOT,)):
+                    if excess <= 0:
+                        break
+                    if COLD in self.roots:
+                        cold_path = self._path(COLD, digest, name)
+                        os.makedirs(os.path.dirname(cold_path), exist_ok=True)
+                        shutil.move(self._path(HOT, digest, name), cold_path)
+                        self._remove_empty_dir(os.path.dirname(self._path(HOT, digest, name)))
+                        self.db.execute("UPDATE artifacts SET tier = ? WHERE digest = ?", (COLD, digest))
+                        demoted += 1
+                    else:
+                        self._forget(digest, tier, name)
+                        deleted += 1
+                    excess -= size
+
+            # Cold tier limit
+            if COLD in self.roots:
+                excess = self.tier_size(COLD) - self.limits[COLD]
+                for digest, name, tier, size in self._unreferenced("tier = ? ORDER BY last_access", (COLD,)):
+                    if excess <= 0:
+                        break
+                    self._forget(digest, tier, name)
+                    deleted += 1
+                    excess -= size
+
+            self.db.commit()
+
+        if deleted or demoted:
+            print(f"Artifact store: deleted {deleted}, moved {demoted} to the cold tier")
+        return {"deleted": deleted, "demoted": demoted}
+
+    def stats(self):
+        """Return artifact counts and sizes per tier."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT tier, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY tier"
+            ).fetchall()
+            referenced = self.db.execute("SELECT COUNT(DISTINCT digest) FROM refs").fetchone()[0]
+        stats = {tier: {"count": count, "bytes": size} for tier, count, size in rows}
+        stats["referenced"] = referenced
+        return stats
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """Return the shared artifact store, creating it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("stats", "evict"):
+        print("Usage: python artifact_store.py stats|evict")
+        sys.exit(1)
+    store = get_artifact_store()
+    if sys.argv[1] == "evict":
+        store.evict()
+    for tier, values in store.stats().items():
+        print(f"{tier}: {values}")
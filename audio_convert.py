@@ -0,0 +1,96 @@
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+
+def convert_file(input_file, output_file, sample_rate=44100, ffmpeg_path=None):
+    """
+    Convert an audio file to WAV, with FFmpeg when available and pydub otherwise.
+
+    Args:
+        input_file (str): Path to input audio file
+        output_file (str): Path to the WAV file to write
+        sample_rate (int): Sample rate for output WAV
+        ffmpeg_path (str): Path to the ffmpeg executable, or None to use pydub only
+
+    Returns:
+        str: output_file, or None if conversion failed
+    """
+    if ffmpeg_path and os.path.exists(ffmpeg_path):
+        try:
+            ffmpeg_cmd = [
+                ffmpeg_path,
+                "-i", input_file,
+                "-ar", str(sample_rate),
+                "-y",  # Overwrite output files without asking
+                output_file
+            ]
+            print(f"Running FFmpeg command: {' '.join(ffmpeg_cmd)}")
+            result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
+
+            if result.returncode == 0:
+                print(f"Direct FFmpeg conversion successful: {output_file}")
+                return output_file
+            print(f"Direct FFmpeg conversion failed: {result.stderr}")
+            print("Falling back to pydub...")
+        except Exception as e:
+            print(f"Error with direct FFmpeg command: {e}")
+            print("Falling back to pydub...")
+
+    try:
+        print("Loading audio with pydub...")
+        from pydub import AudioSegment
+        if ffmpeg_path:
+            AudioSegment.converter = ffmpeg_path
+        audio = AudioSegment.from_file(input_file)
+
+        # Set the sample rate if requested
+        if sample_rate:
+            audio = audio.set_frame_rate(sample_rate)
+
+        print(f"Exporting to WAV: {output_file}")
+        audio.export(output_file, format="wav")
+        print(f"Conversion complete: {output_file}")
+        return output_file
+    except Exception as e:
+        print(f"Error converting {input_file}: {e}")
+        return None
+
+
+def convert_files(conversions, sample_rate=44100, ffmpeg_path=None, max_workers=None):
+    """
+    Convert several audio files to WAV at the same time. The work happens in
+    ffmpeg subprocesses, so a thread pool is enough to run them in parallel.
+
+    Args:
+        conversions (dict): Mapping of input file -> output WAV path. Output paths must be unique.
+        sample_rate (int): Sample rate for output WAVs
+        ffmpeg_path (str): Path to the ffmpeg executable
+        max_workers (int): Pool size. Defaults to the number of CPUs.
+
+    Returns:
+        dict: Mapping of input file -> output WAV path, or None where conversion failed
+    """
+    if not conversions:
+        return {}
+    if len(set(conversions.values())) < len(conversions):
+        raise ValueError("Several inputs would be converted to the same WAV file")
+    if len(conversions) == 1:
+        # Not worth starting a pool for one file
+        input_file, output_file = next(iter(conversions.items()))
+        return {input_file: convert_file(input_file, output_file, sample_rate, ffmpeg_path)}
+
+    workers = min(len(conversions), max_workers or os.cpu_count() or 1)
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            input_file: pool.submit(convert_file, input_file, output_file, sample_rate, ffmpeg_path)
+            for input_file, output_file in conversions.items()
+        }
+        for input_file, future in futures.items():
+            try:
+                results[input_file] = future.result()
+            except Exception as e:
+                print(f"Error converting {input_file}: {e}")
+                results[input_file] = None
+    return results
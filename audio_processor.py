@@ -0,0 +1,1551 @@
+import os
+import io
+import re
+import glob
+import time
+import shutil
+import threading
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+# Spoken-duration estimation for generated scripts
+from script_timing import log_duration, get_wav_duration
+
+# SadTalker progress parsing
+from inference_progress import InferenceProgress, iter_output_lines, TQDM_REGEX
+
+# Time, memory and cancellation limits for inference subprocesses
+from process_control import ProcessWatchdog, process_group_kwargs, kill_process_tree
+
+# WAV conversion that can run in a worker pool
+from audio_convert import convert_file, convert_files
+
+# Reels post-processing (9:16 reframe, loudness, fast start)
+from video_postprocess import prepare_for_reels, reels_output_path, is_reels_video, REELS_SUFFIX
+
+# Content-addressed storage with eviction for WAVs and videos
+from artifact_store import get_artifact_store
+
+# SadTalker command line and the distributed render queue
+from render_farm import (
+    INFERENCE_PROFILE, inference_command, multi_avatar_command, RenderFarmClient, FINISHED, DONE
+)
+
+# Shared Selenium helpers
+from browser_utils import HEADLESS_BROWSER, apply_headless_profile, launch_chrome, quit_browser
+
+# Selenium and pydub are imported where they are first used, so importing
+# this module stays cheap.
+
+
+# Suffixes browsers use for downloads that are still in progress
+PARTIAL_DOWNLOAD_SUFFIXES = ('.crdownload', '.part', '.partial', '.download', '.tmp')
+
+
+class AudioProcessor:
+    """
+    A class to handle processing of downloaded audio files.
+    It monitors a directory for new audio files, processes them,
+    and converts them to WAV format.
+    """
+    
+    # Wall-clock limit for one inference run, in seconds
+    INFERENCE_TIMEOUT = 45 * 60
+    # Memory limit for the inference process and its children, in MB
+    INFERENCE_MAX_RSS_MB = 12 * 1024
+    # Reframe, normalize and re-encode generated videos for Reels before upload
+    REELS_POSTPROCESS = True
+    # Burn captions aligned to the script into the Reels encode
+    BURN_SUBTITLES = True
+    # Move finished WAVs and videos into the content-addressed artifact store
+    USE_ARTIFACT_STORE = True
+    # Render farm coordinator (see render_farm.py). Inference runs locally when unset.
+    RENDER_FARM_URL = os.environ.get("RENDER_FARM_URL")
+    # Seconds between job status checks while a farm render is running
+    RENDER_FARM_POLL = 5
+    # Seconds a visible browser stays open after posting so the post can be reviewed
+    POST_REVIEW_SECONDS = 60
+    
+    def __init__(self, input_dir=None, output_dir=None, ffmpeg_path=None):
+        """
+        Initialize the AudioProcessor.
+        
+        Args:
+            input_dir (str): Directory to monitor for new audio files. Defaults to Downloads folder.
+            output_dir (str): Directory to save processed files. Defaults to a 'processed_audio' folder.
+            ffmpeg_path (str): Path to ffmpeg/ffprobe executable. If None, system PATH will be used.
+        """
+        # Set default directories if not specified
+        if input_dir is None:
+            self.input_dir = self._get_downloads_folder()
+        else:
+            self.input_dir = input_dir
+            
+        if output_dir is None:
+            self.output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "processed_audio")
+        else:
+            self.output_dir = output_dir
+            
+        # Create output directory if it doesn't exist
+        os.makedirs(self.output_dir, exist_ok=True)
+        
+        # Set ffmpeg path and configure environment properly
+        self.ffmpeg_path = ffmpeg_path
+        self._configure_ffmpeg()
+        
+        # Keep track of already processed files
+        self.processed_files = set()
+        
+        # Default avatar image path for inference
+        self.avatar_image = os.path.join(os.getcwd(), "avatar4.jpg")
+        
+        # SadTalker options (overrides for render_farm.INFERENCE_PROFILE)
+        self.inference_profile = dict(INFERENCE_PROFILE)
+        
+        # Extra avatars for multi-avatar renders (the first one is avatar_image)
+        self.avatar_images = []
+        
+        # Store video path for later use
+        self.video_path = None
+        # Every video of the last render, one per avatar (video_path is the first)
+        self.video_paths = []
+        
+        # Status update callback (can be set to None if not using GUI)
+        self.status_callback = None
+        
+        # Script sent to TTS, used to log estimated against actual durations
+        self.script_text = None
+        
+        # Audio used for the last inference (captions are aligned to it)
+        self.audio_path = None
+        # Job that references this processor's artifacts in the artifact store
+        self.job_id = None
+        # Overrides for subtitles.CAPTION_STYLE
+        self.caption_style = None
+        
+        # Structured inference progress events (phase, step, total, eta, ...)
+        self.progress_callback = None
+        self.inference_progress = None
+        
+        # Set by cancel_inference() to stop the running (or next) inference
+        self.inference_cancel = threading.Event()
+        self.inference_process = None
+        
+        print(f"AudioProcessor initialized:")
+        print(f"  - Monitoring: {self.input_dir}")
+        print(f"  - Output dir: {self.output_dir}")
+        if self.ffmpeg_path:
+            print(f"  - FFmpeg path: {self.ffmpeg_path}")
+        from pydub import AudioSegment
+        print(f"  - FFprobe path: {AudioSegment.ffprobe}")
+
+    def _configure_ffmpeg(self):
+        """
+        Configure FFmpeg paths properly for both direct subprocess calls and PyDub.
+        This method tries multiple approaches to find and set up FFmpeg correctly.
+        """
+        from pydub import AudioSegment
+        
+        # Try to find FFmpeg if not explicitly provided
+        if not self.ffmpeg_path:
+            self.ffmpeg_path = self._find_ffmpeg_in_path()
+            
+        # If we still don't have a path, try common locations
+        if not self.ffmpeg_path:
+            self.ffmpeg_path = self._find_ffmpeg_in_common_locations()
+            
+        # If we found FFmpeg, set up all needed paths
+        if self.ffmpeg_path:
+            ffmpeg_dir = os.path.dirname(self.ffmpeg_path)
+            
+            # Add FFmpeg directory to system PATH
+            if ffmpeg_dir not in os.environ['PATH']:
+                os.environ['PATH'] = ffmpeg_dir + os.pathsep + os.environ['PATH']
+            
+            # Set explicit paths for PyDub
+            AudioSegment.converter = self.ffmpeg_path
+            AudioSegment.ffmpeg = self.ffmpeg_path
+            
+            # Find and set ffprobe path
+            if os.name == 'nt':  # Windows
+                ffprobe_path = os.path.join(ffmpeg_dir, "ffprobe.exe")
+            else:  # Linux/Mac
+                ffprobe_path = os.path.join(ffmpeg_dir, "ffprobe")
+                
+            if os.path.exists(ffprobe_path):
+                AudioSegment.ffprobe = ffprobe_path
+                print(f"Found FFprobe at: {ffprobe_path}")
+            else:
+                print(f"Warning: FFprobe not found at expected location: {ffprobe_path}")
+                # Try to find ffprobe in PATH
+                ffprobe_in_path = self._find_executable("ffprobe")
+                if ffprobe_in_path:
+                    AudioSegment.ffprobe = ffprobe_in_path
+                    print(f"Found FFprobe in PATH: {ffprobe_in_path}")
+                    
+            # Verify FFmpeg and FFprobe work with PyDub
+            self._verify_pydub_config()
+        else:
+            print("WARNING: FFmpeg not found. Audio conversion will fail.")
+            print("\nTo fix this issue:")
+            print("1. Download FFmpeg from https://ffmpeg.org/download.html")
+            print("2. Either:")
+            print("   a) Add FFmpeg to your system PATH, or")
+            print("   b) Specify the path when creating the AudioProcessor instance:")
+            print('      processor = AudioProcessor(ffmpeg_path="path/to/ffmpeg")')
+
+    def _find_ffmpeg_in_path(self):
+        """Find FFmpeg in system PATH."""
+        ffmpeg_path = self._find_executable("ffmpeg")
+        if ffmpeg_path:
+            print(f"Found FFmpeg in PATH: {ffmpeg_path}")
+        return ffmpeg_path
+
+    def _find_executable(self, name):
+        """
+        Find an executable in system PATH.
+        
+        The PATH is searched in-process (PATHEXT is honoured on Windows)
+        instead of running `which`/`where` in a shell.
+        """
+        return shutil.which(name)
+
+    def _find_ffmpeg_in_common_locations(self):
+        """Try to find FFmpeg in common installation locations."""
+        common_locations = []
+        
+        if os.name == 'nt':  # Windows
+            # Check Program Files locations
+            program_files = [
+                os.environ.get('ProgramFiles', 'C:\\Program Files'),
+                os.environ.get('ProgramFiles(x86)', 'C:\\Program Files (x86)'),
+                os.environ.get('LOCALAPPDATA', os.path.join(os.environ['USERPROFILE'], 'AppData', 'Local'))
+            ]
+            
+            # Add common Windows installation paths
+            for pf in program_files:
+                common_locations.extend([
+                    os.path.join(pf, 'ffmpeg', 'bin', 'ffmpeg.exe'),
+                    os.path.join(pf, 'FFmpeg', 'bin', 'ffmpeg.exe')
+                ])
+                
+            # Check in AppData/Local - common for user installations
+            local_app_data = os.environ.get('LOCALAPPDATA', os.path.join(os.environ['USERPROFILE'], 'AppData', 'Local'))
+            common_locations.extend([
+                os.path.join(local_app_data, 'Programs', 'ffmpeg', 'bin', 'ffmpeg.exe'),
+                os.path.join(local_app_data, 'Programs', 'FFmpeg', 'bin', 'ffmpeg.exe'),
+                os.path.join(local_app_data, 'ffmpeg', 'bin', 'ffmpeg.exe'),
+                os.path.join(local_app_data, 'FFmpeg', 'bin', 'ffmpeg.exe'),
+                os.path.join(local_app_data, 'Programs', 'ffmpeg-master-latest-win64-gpl-shared', 'bin', 'ffmpeg.exe')
+            ])
+            
+            # Check user profile - common for manual installations
+            user_profile = os.environ['USERPROFILE']
+            common_locations.extend([
+                os.path.join(user_profile, 'ffmpeg', 'bin', 'ffmpeg.exe'),
+                os.path.join(user_profile, 'FFmpeg', 'bin', 'ffmpeg.exe'),
+                os.path.join(user_profile, 'AppData', 'Local', 'Programs', 'ffmpeg-master-latest-win64-gpl-shared', 'bin', 'ffmpeg.exe')
+            ])
+        else:  # Linux/Mac
+            common_locations.extend([
+                '/usr/bin/ffmpeg',
+                '/usr/local/bin/ffmpeg',
+                '/opt/local/bin/ffmpeg',
+                '/opt/homebrew/bin/ffmpeg',
+                os.path.expanduser('~/bin/ffmpeg')
+            ])
+            
+        # Check each location
+        for location in common_locations:
+            if os.path.exists(location):
+                print(f"Found FFmpeg at common location: {location}")
+                return location
+                
+        return None
+
+    def _verify_pydub_config(self):
+        """Verify PyDub can find and use FFmpeg by trying a simple conversion."""
+        try:
+            from pydub import AudioSegment
+            
+            # Create a simple 1-second silent audio segment
+            silence = AudioSegment.silent(duration=100)
+            
+            # Create a temporary file path
+            temp_dir = os.path.join(self.output_dir, "temp")
+            os.makedirs(temp_dir, exist_ok=True)
+            temp_file = os.path.join(temp_dir, "test.wav")
+            
+            # Try to export it
+            silence.export(temp_file, format="wav")
+            
+            # If it exists, PyDub is properly configured
+            if os.path.exists(temp_file):
+                print("PyDub is properly configured with FFmpeg!")
+                os.remove(temp_file)  # Clean up
+                return True
+        except Exception as e:
+            print(f"PyDub configuration test failed: {e}")
+            # Don't return yet, we'll try explicit subprocess call
+        
+        # Try a direct subprocess call as fallback verification
+        try:
+            test_cmd = [self.ffmpeg_path, "-version"]
+            result = subprocess.run(test_cmd, capture_output=True, text=True)
+            if result.returncode == 0:
+                print("FFmpeg responds to direct subprocess calls.")
+                return True
+            else:
+                print(f"FFmpeg subprocess test failed: {result.stderr}")
+        except Exception as e:
+            print(f"FFmpeg subprocess test failed with exception: {e}")
+            
+        return False
+    
+    def _get_downloads_folder(self):
+        """Get the path to the user's Downloads folder."""
+        home = Path.home()
+        if os.name == 'nt':  # Windows
+            return os.path.join(home, 'Downloads')
+        else:  # Linux/Mac
+            return os.path.join(home, 'Downloads')
+    
+    def is_download_complete(self, file_path):
+        """
+        Check whether a downloaded audio file is finished, without waiting.
+        
+        A file is complete when it doesn't carry a partial-download suffix, no
+        partial sibling (e.g. "name.mp3.crdownload") is still being written, and
+        it starts with a valid audio header. For WAV files the RIFF size in the
+        header must also match the bytes on disk.
+        
+        Args:
+            file_path (str): Path to the downloaded file
+            
+        Returns:
+            bool: True if the file can be processed
+        """
+        if file_path.endswith(PARTIAL_DOWNLOAD_SUFFIXES):
+            return False
+        if any(os.path.exists(file_path + suffix) for suffix in PARTIAL_DOWNLOAD_SUFFIXES):
+            return False
+        
+        try:
+            size = os.path.getsize(file_path)
+            if size < 12:
+                return False
+            with open(file_path, "rb") as f:
+                header = f.read(12)
+        except OSError:
+            return False
+        
+        if header[:4] == b"RIFF":  # WAV
+            return header[8:12] == b"WAVE" and int.from_bytes(header[4:8], "little") + 8 <= size
+        if header[:3] == b"ID3" or (header[0] == 0xFF and header[1] & 0xE0 == 0xE0):  # MP3 / ADTS AAC
+            return True
+        if header[:4] in (b"OggS", b"fLaC"):  # OGG / FLAC
+            return True
+        if header[4:8] == b"ftyp":  # M4A
+            return True
+        return False
+    
+    def wait_for_new_audio(self, timeout=300, file_patterns=None, target_pattern=None, return_all=False):
+        """
+        Wait for new audio files to appear in the input directory.
+        
+        Args:
+            timeout (int): Maximum time to wait in seconds
+            file_patterns (list): File patterns to monitor, e.g., ['*.mp3', '*.m4a']
+                                 If None, defaults to common audio formats
+            target_pattern (str): Regex pattern to match specific file names
+            return_all (bool): Return every new finished file (oldest first) instead
+                               of only the most recent one, e.g. for convert_many()
+        
+        Returns:
+            str: Path to new audio file, or None if timeout
+                 (a list of paths, possibly empty, if return_all is True)
+        """
+        if file_patterns is None:
+            file_patterns = ['*.mp3', '*.wav', '*.m4a', '*.ogg', '*.flac', '*.aac']
+        
+        # Default pattern for "speechma_audio_*" files if not specified
+        if target_pattern is None:
+            target_pattern = r"speechma_audio_.*\.(?:mp3|wav|m4a|ogg|flac|aac)$"
+        
+        pattern_regex = re.compile(target_pattern)
+        
+        start_time = time.time()
+        print(f"Watching for new audio files in {self.input_dir}...")
+        print(f"Looking for files matching pattern: {target_pattern}")
+
+        
+        # Get initial list of files to compare against
+        initial_files = set()
+        for pattern in file_patterns:
+            initial_files.update(glob.glob(os.path.join(self.input_dir, pattern)))
+        
+        # Add already processed files to avoid reprocessing
+        initial_files.update(self.processed_files)
+        
+        # Get current time for comparison
+        current_time = datetime.now()
+        
+        while time.time() - start_time < timeout:
+            # Check for new files
+            current_files = set()
+            matching_files = []
+            
+            for pattern in file_patterns:
+                new_files = glob.glob(os.path.join(self.input_dir, pattern))
+                for file in new_files:
+                    # Skip already processed files
+                    if file in initial_files:
+                        continue
+                    
+                    filename = os.path.basename(file)
+                    # Check if file matches our target pattern and is fully downloaded
+                    if pattern_regex.match(filename) and self.is_download_complete(file):
+                        matching_files.append(file)
+            
+            if matching_files and return_all:
+                matching_files = [file for file in matching_files if file not in self.processed_files]
+                if matching_files:
+                    print(f"Found {len(matching_files)} new matching audio file(s)")
+                    return sorted(matching_files, key=os.path.getctime)
+            elif matching_files:
+                # Sort by creation time to find the most recent file
+                most_recent_file = max(matching_files, key=os.path.getctime)
+                
+                # Make sure we don't process a file we've already seen
+                if most_recent_file not in self.processed_files:
+                    print(f"Found new matching audio file: {most_recent_file}")
+                    return most_recent_file
+            
+            # Wait before checking again
+            time.sleep(0.5)
+        
+        print("Timeout waiting for new audio file")
+        return [] if return_all else None
+
+    def convert_to_wav(self, input_file, sample_rate=44100):
+        """
+        Convert an audio file to WAV format with specified sample rate.
+        
+        Args:
+            input_file (str): Path to input audio file
+            sample_rate (int): Sample rate for output WAV
+            
+        Returns:
+            str: Path to output WAV file, or None if conversion failed
+        """
+        if not os.path.exists(input_file):
+            print(f"Error: File not found - {input_file}")
+            return None
+            
+        print(f"Converting {input_file} to WAV format...")
+        output_file = convert_file(input_file, self._wav_output_path(input_file), sample_rate, self.ffmpeg_path)
+        if output_file:
+            # Mark this file as processed
+            self.processed_files.add(input_file)
+        return output_file
+    
+    def convert_many(self, input_files, sample_rate=44100, max_workers=None):
+        """
+        Convert several audio files to WAV at the same time, in a pool sized to
+        the CPU count. Inputs with the same base name get numbered WAV names
+        instead of overwriting each other.
+        
+        Args:
+            input_files (list): Paths to input audio files
+            sample_rate (int): Sample rate for output WAVs
+            max_workers (int): Pool size. Defaults to the number of CPUs.
+            
+        Returns:
+            dict: Mapping of input file -> output WAV path (None where conversion failed)
+        """
+        conversions = {}
+        results = {}
+        for input_file in input_files:
+            if os.path.exists(input_file):
+                output_file = self._wav_output_path(input_file)
+                base, ext = os.path.splitext(output_file)
+                count = 2
+                while output_file in conversions.values():
+                    output_file = f"{base}_{count}{ext}"
+                    count += 1
+                conversions[input_file] = output_file
+            else:
+                print(f"Error: File not found - {input_file}")
+                results[input_file] = None
+        
+        print(f"Converting {len(conversions)} file(s) to WAV format...")
+        results.update(convert_files(conversions, sample_rate, self.ffmpeg_path, max_workers))
+        self.processed_files.update(input_file for input_file, wav in results.items() if wav)
+        return results
+    
+    def _wav_output_path(self, input_file):
+        """Return the WAV path in the output directory for an input file."""
+        name_without_ext = os.path.splitext(os.path.basename(input_file))[0]
+        return os.path.join(self.output_dir, f"{name_without_ext}.wav")
+    
+    def concatenate_audio(self, input_files, crossfade_ms=40, keep_silence_ms=150, output_file=None):
+        """
+        Join audio chunks into one WAV, trimming the silence padding around each
+        chunk and crossfading the joins so they sound like a single take.
+        
+        Args:
+            input_files (list): Paths (or file-like objects) of the chunk audio, in order
+            crossfade_ms (int): Crossfade length at each join in milliseconds
+            keep_silence_ms (int): Silence kept at the edges of each chunk
+            output_file (str): Path for the joined WAV. Defaults to the temp folder in output_dir.
+            
+        Returns:
+            str: Path to the joined WAV file, or None if joining failed
+        """
+        try:
+            from pydub import AudioSegment
+            from pydub.silence import detect_leading_silence
+            
+            segments = []
+            for input_file in input_files:
+                audio = AudioSegment.from_file(input_file)
+                start = max(0, detect_leading_silence(audio) - keep_silence_ms)
+                end = len(audio) - max(0, detect_leading_silence(audio.reverse()) - keep_silence_ms)
+                segments.append(audio[start:end] if end > start else audio)
+            
+            combined = segments[0]
+            for segment in segments[1:]:
+                fade = min(crossfade_ms, len(combined), len(segment))
+                combined = combined.append(segment, crossfade=fade)
+            
+            if output_file is None:
+                temp_dir = os.path.join(self.output_dir, "temp")
+                os.makedirs(temp_dir, exist_ok=True)
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                output_file = os.path.join(temp_dir, f"speechma_audio_joined_{timestamp}.wav")
+            
+            combined.export(output_file, format="wav")
+            print(f"Joined {len(segments)} chunks into: {output_file}")
+            return output_file
+            
+        except Exception as e:
+            print(f"Error joining audio chunks: {e}")
+            return None
+    
+    def convert_bytes_to_wav(self, data, file_name, sample_rate=44100):
+        """
+        Convert in-memory audio (e.g. captured from the TTS page) to a WAV file.
+        
+        Args:
+            data (bytes): Encoded audio
+            file_name (str): Name the audio would have had as a download; used for the WAV name
+            sample_rate (int): Sample rate for output WAV
+            
+        Returns:
+            str: Path to output WAV file, or None if conversion failed
+        """
+        name_without_ext = os.path.splitext(os.path.basename(file_name))[0]
+        output_file = os.path.join(self.output_dir, f"{name_without_ext}.wav")
+        
+        print(f"Converting captured audio ({len(data)} bytes) to WAV format...")
+        
+        # Pipe the audio straight into FFmpeg
+        if self.ffmpeg_path and os.path.exists(self.ffmpeg_path):
+            try:
+                ffmpeg_cmd = [
+                    self.ffmpeg_path,
+                    "-i", "pipe:0",
+                    "-ar", str(sample_rate),
+                    "-y",  # Overwrite output files without asking
+                    output_file
+                ]
+                result = subprocess.run(ffmpeg_cmd, input=data, capture_output=True)
+                
+                if result.returncode == 0:
+                    print(f"Direct FFmpeg conversion successful: {output_file}")
+                    return output_file
+                else:
+                    print(f"Direct FFmpeg conversion failed: {result.stderr.decode(errors='replace')}")
+                    print("Falling back to pydub...")
+            except Exception as e:
+                print(f"Error with direct FFmpeg command: {e}")
+                print("Falling back to pydub...")
+        
+        try:
+            from pydub import AudioSegment
+            audio = AudioSegment.from_file(io.BytesIO(data))
+            if sample_rate:
+                audio = audio.set_frame_rate(sample_rate)
+            audio.export(output_file, format="wav")
+            print(f"Conversion complete: {output_file}")
+            return output_file
+        except Exception as e:
+            print(f"Error converting captured audio: {e}")
+            return None
+    
+    def update_status(self, message):
+        """
+        Update status message - either using callback or print
+        
+        Args:
+            message (str): Status message to display
+        """
+        print(message)
+        # If a status callback function is set, call it
+        if self.status_callback:
+            self.status_callback(message)
+    
+    def run_inference(self, audio_path):
+        """
+        Run the inference.py script with the processed audio file.
+        
+        Args:
+            audio_path (str): Path to the processed WAV file
+            
+        Returns:
+            bool: True if inference completed successfully, False otherwise
+        """
+        try:
+            if self.inference_cancel.is_set():
+                # Cancelled before inference started
+                self.inference_cancel.clear()
+                self.update_status("Video generation cancelled.")
+                return False
+            
+            print(f"Starting inference with audio: {audio_path}")
+            self.audio_path = audio_path
+            
+            # Path to the avatar images - make sure they exist!
+            avatar_paths = self.avatar_images or [self.avatar_image]
+            for avatar_path in avatar_paths:
+                if not os.path.exists(avatar_path):
+                    self.update_status(f"Error: Avatar image not found at {avatar_path}")
+                    return False
+            self.video_paths = []
+            
+            if self.RENDER_FARM_URL:
+                return self.run_farm_inference(audio_path, avatar_paths)
+            
+            # Build the command as an argument list so paths with spaces or
+            # quotes are passed through as-is and no shell is started.
+            # Several avatars share one run, so models and audio features are only prepared once.
+            if len(avatar_paths) > 1:
+                cmd = multi_avatar_command(audio_path, avatar_paths, "results", self.inference_profile)
+            else:
+                cmd = inference_command(audio_path, avatar_paths[0], "results", self.inference_profile)
+
+            print(f"Running command: {subprocess.list2cmdline(cmd)}")
+            
+            # Create a dict with the current environment variables
+            env = os.environ.copy()
+            
+            # Use Popen to get real-time output. The process gets its own
+            # process group so a stuck run can be killed with its children.
+            process = subprocess.Popen(
+                cmd,
+                env=env,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,  # Line buffered
+                **process_group_kwargs()
+            )
+            self.inference_process = process
+            
+            watchdog = None
+            try:
+                # Kill the run if it hangs, runs away with memory, or is cancelled
+                watchdog = ProcessWatchdog(
+                    process,
+                    # Multi-avatar runs render every avatar in the same process
+                    timeout=self.INFERENCE_TIMEOUT * len(avatar_paths),
+                    max_rss_mb=self.INFERENCE_MAX_RSS_MB,
+                    cancel_event=self.inference_cancel
+                ).start()
+            
+                # Track per-phase progress (tqdm bars included) and estimate the time left
+                self.inference_progress = InferenceProgress(
+                    audio_duration=get_wav_duration(audio_path),
+                    callback=self._report_inference_progress,
+                    avatar_count=len(avatar_paths)
+                )
+            
+                # Print output in real-time and capture video path if mentioned
+                video_path_regex = re.compile(r"The generated video is named:?\s+(.*\.mp4)")
+                print("Command output:")
+                for output_line in iter_output_lines(process.stdout):
+                    if output_line:
+                        # Progress bar updates are reported as events instead of printed
+                        if not self.inference_progress.feed(output_line) and not TQDM_REGEX.search(output_line):
+                            print(output_line.strip())
+                        # Try to capture video path if it's mentioned in output
+                        match = video_path_regex.search(output_line)
+                        if match:
+                            potential_path = match.group(1).strip()
+                            # Convert to absolute path; multi-avatar runs report one video per avatar
+                            self.video_paths.append(os.path.abspath(potential_path))
+                            self.video_path = self.video_paths[0]
+            
+                # Get the return code
+                return_code = process.wait()
+            finally:
+                # An error while reading the output must not leave SadTalker running
+                if process.poll() is None:
+                    kill_process_tree(process)
+                if watchdog:
+                    watchdog.stop()
+                self.inference_process = None
+            self.inference_progress.finish(return_code == 0 and not watchdog.reason)
+            
+            if watchdog.reason:
+                self.inference_cancel.clear()
+                print(f"Inference stopped: {watchdog.reason}")
+                if watchdog.reason == "cancelled":
+                    self.update_status("Video generation cancelled.")
+                else:
+                    self.update_status(f"Video generation stopped: {watchdog.reason}.")
+                return False
+            
+            if return_code == 0:
+                print("Inference completed successfully!")
+                
+                # If we haven't already captured the video path from output,
+                # try to find it in the results folder
+                if not hasattr(self, 'video_path') or not self.video_path or not os.path.exists(self.video_path):
+                    # Find the most recently created mp4 file in the results directory
+                    results_dir = os.path.join(os.getcwd(), "results")
+                    if os.path.exists(results_dir):
+                        mp4_files = []
+                        # Look for mp4 files in results dir and any subdirectories
+                        for root, dirs, files in os.walk(results_dir):
+                            for file in files:
+                                if file.endswith('.mp4'):
+                                    mp4_files.append(os.path.join(root, file))
+                        
+                        if mp4_files:
+                            # Get the most recently created video file
+                            self.video_path = max(mp4_files, key=os.path.getctime)
+                            self.update_status(f"Video generation complete. Ready to post: {os.path.basename(self.video_path)}")
+                        else:
+                            self.update_status("Inference successful but no video file found in results folder.")
+                    else:
+                        self.update_status("Results directory not found.")
+                else:
+                    self.update_status(f"Video generation complete. Ready to post: {os.path.basename(self.video_path)}")
+                
+                # Double check that the video path exists
+                if hasattr(self, 'video_path') and self.video_path:
+                    if os.path.exists(self.video_path):
+                        print(f"Confirmed video exists at: {self.video_path}")
+                    else:
+                        print(f"Warning: Video file not found at path: {self.video_path}")
+                
+                if not self.video_paths and self.video_path:
+                    self.video_paths = [self.video_path]
+                if len(self.video_paths) > 1:
+                    self.update_status(f"Rendered {len(self.video_paths)} videos, one per avatar.")
+                return True
+            else:
+                print(f"Inference failed with return code: {return_code}")
+                self.update_status("Video generation failed.")
+                return False
+        except Exception as e:
+            print(f"Error during inference: {str(e)}")
+            self.update_status(f"Error during video generation: {str(e)}")
+            return False    
+
+    def run_farm_inference(self, audio_path, avatar_paths):
+        """
+        Render on the render farm instead of locally: queue one job per avatar,
+        wait for workers to finish them and download the videos into results/.
+        
+        Args:
+            audio_path (str): Path to the processed WAV file
+            avatar_paths (list): Paths to the avatar images
+            
+        Returns:
+            bool: True if at least one video was rendered, False otherwise
+        """
+        client = RenderFarmClient(self.RENDER_FARM_URL)
+        job_ids = []
+        try:
+            for avatar_path in avatar_paths:
+                job_ids.append(client.submit(audio_path, avatar_path, self.inference_profile))
+        except Exception:
+            # Don't leave the renders that were queued running without anyone waiting for them
+            for job_id in job_ids:
+                try:
+                    client.remove(job_id)
+                except OSError as e:
+                    print(f"Could not remove render farm job {job_id}: {e}")
+            raise
+        self.update_status(f"Queued {len(job_ids)} video render(s) on the render farm")
+        
+        jobs = {}
+        last_states = {}
+        last_progress = {}
+        try:
+            while not all(job_id in jobs and jobs[job_id]["status"] in FINISHED for job_id in job_ids):
+                if self.inference_cancel.wait(self.RENDER_FARM_POLL):
+                    self.inference_cancel.clear()
+                    for job_id in job_ids:
+                        client.cancel(job_id)
+                    self.update_status("Video generation cancelled.")
+                    return False
+                
+                for job_id in job_ids:
+                    if job_id in jobs and jobs[job_id]["status"] in FINISHED:
+                        continue
+                    job = jobs[job_id] = client.status(job_id)
+                    state = (job["status"], job["worker"], job["attempts"])
+                    if state != last_states.get(job_id):
+                        last_states[job_id] = state
+                        if job["status"] == "running":
+                            self.update_status(f"Render {job_id[:8]} running on {job['worker']} (attempt {job['attempts']})")
+                        elif job["status"] == "queued" and job["error"]:
+                            self.update_status(f"Render {job_id[:8]} re-queued: {job['error']}")
+                    if job["progress"] and job["status"] == "running" and job["progress"] != last_progress.get(job_id):
+                        last_progress[job_id] = job["progress"]
+                        self._report_inference_progress(job["progress"])
+            
+            results_dir = os.path.join(os.getcwd(), "results")
+            os.makedirs(results_dir, exist_ok=True)
+            audio_name = os.path.splitext(os.path.basename(audio_path))[0]
+            for job_id, avatar_path in zip(job_ids, avatar_paths):
+                job = jobs[job_id]
+                if job["status"] != DONE:
+                    self.update_status(f"Render for {os.path.basename(avatar_path)} failed on the render farm: {job['error'] or job['status']}")
+                    continue
+                name = f"{os.path.splitext(os.path.basename(avatar_path))[0]}##{audio_name}.mp4"
+                self.video_paths.append(client.download(job_id, "result", os.path.join(results_dir, name)))
+        finally:
+            for job_id in job_ids:
+                try:
+                    client.remove(job_id)
+                except OSError as e:
+                    print(f"Could not remove render farm job {job_id}: {e}")
+        
+        if not self.video_paths:
+            self.update_status("Video generation failed on the render farm.")
+            return False
+        self.video_path = self.video_paths[0]
+        self.update_status(f"Video generation complete. Ready to post: {os.path.basename(self.video_path)}")
+        return True
+    
+    def write_subtitles(self):
+        """
+        Align the script to the inference audio and write captions next to the video.
+        Alignments are cached per audio hash, so only the caption file is rebuilt
+        when the style changes.
+        
+        Returns:
+            str: Path to the .ass caption file, or None if captions can't be made
+        """
+        if not (self.script_text and self.audio_path and os.path.exists(self.audio_path)):
+            return None
+        try:
+            from subtitles import align_script, write_ass
+            aligned = align_script(self.audio_path, self.script_text)
+            if not aligned:
+                return None
+            temp_dir = os.path.join(self.output_dir, "temp")
+            os.makedirs(temp_dir, exist_ok=True)
+            subtitles_path = os.path.join(temp_dir, os.path.splitext(os.path.basename(self.video_path))[0] + ".ass")
+            return write_ass(aligned, subtitles_path, self.caption_style)
+        except Exception as e:
+            print(f"Error creating subtitles: {e}")
+            return None
+    
+    def cancel_inference(self):
+        """
+        Cancel the running inference, killing its whole process group.
+        If no inference is running, the next one is cancelled before it starts.
+        Safe to call from any thread.
+        """
+        self.inference_cancel.set()
+        if self.inference_process:
+            self.update_status("Cancelling video generation...")
+    
+    def _report_inference_progress(self, event):
+        """Pass an inference progress event to the progress callback and status log."""
+        if self.progress_callback:
+            self.progress_callback(event)
+        
+        message = f"Inference {event['phase']} ({event['phase_index'] + 1}/{event['phase_count']})"
+        if event['total']:
+            message += f": {event['step']}/{event['total']}"
+        if event['eta'] is not None:
+            message += f", about {int(event['eta'])}s left"
+        self.update_status(message)
+    
+    def set_avatar_image(self, image_path):
+        """
+        Set the avatar image path for inference.
+        
+        Args:
+            image_path (str): Path to the avatar image
+        """
+        if os.path.exists(image_path):
+            self.avatar_image = image_path
+            self.avatar_images = []
+            print(f"Avatar image set to: {self.avatar_image}")
+        else:
+            print(f"Warning: Avatar image not found at {image_path}")
+    
+    def set_avatar_images(self, image_paths):
+        """
+        Render the same audio on several avatars, one video each. The renders
+        share model loading, audio features and motion coefficients.
+        
+        Args:
+            image_paths (list): Paths to the avatar images
+        """
+        found = [path for path in image_paths if os.path.exists(path)]
+        for path in image_paths:
+            if path not in found:
+                print(f"Warning: Avatar image not found at {path}")
+        if not found:
+            return
+        self.avatar_image = found[0]
+        self.avatar_images = found if len(found) > 1 else []
+        print(f"Avatar images set to: {', '.join(found)}")
+    
+    def process_file(self, file_path=None, sample_rate=44100, target_pattern=None, run_inference=True):
+        """
+        Process a file: either the specified file or wait for a new one.
+        Then optionally run inference with the processed audio.
+        
+        Args:
+            file_path (str): Optional path to file. If None, wait for a new file.
+            sample_rate (int): Sample rate for output WAV
+            target_pattern (str): Regex pattern to match specific file names
+            run_inference (bool): Whether to automatically run inference after processing
+            
+        Returns:
+            tuple: (wav_path, inference_success) where wav_path is the path to processed WAV file,
+                   and inference_success is a boolean indicating if inference was successful
+        """
+        # If no file specified, wait for a new one to appear
+        if file_path is None:
+            file_path = self.wait_for_new_audio(target_pattern=target_pattern)
+            
+        if file_path is None:
+            return None, False
+            
+        # Convert the file to WAV
+        wav_path = self.convert_to_wav(file_path, sample_rate)
+        
+        return self.process_wav(wav_path, run_inference)
+    
+    def process_audio_bytes(self, data, file_name, sample_rate=44100, run_inference=True):
+        """
+        Process audio held in memory (e.g. captured from the TTS page) the same
+        way process_file() processes a downloaded file.
+        
+        Args:
+            data (bytes): Encoded audio
+            file_name (str): Name used for the output WAV
+            sample_rate (int): Sample rate for output WAV
+            run_inference (bool): Whether to automatically run inference after processing
+            
+        Returns:
+            tuple: (wav_path, inference_success)
+        """
+        wav_path = self.convert_bytes_to_wav(data, file_name, sample_rate)
+        return self.process_wav(wav_path, run_inference)
+    
+    def process_wav(self, wav_path, run_inference=True):
+        """
+        Finish processing a converted WAV: log its duration, and optionally run
+        inference and prepare the video for upload.
+        
+        Args:
+            wav_path (str): Path to the converted WAV file
+            run_inference (bool): Whether to run inference on it
+            
+        Returns:
+            tuple: (wav_path, inference_success)
+        """
+        if wav_path is None:
+            return None, False
+            
+        # Log the estimated duration against the real one to calibrate the estimator
+        if self.script_text:
+            log_duration(self.script_text, wav_path)
+            
+        # Run inference if requested
+        inference_success = False
+        if run_inference and wav_path:
+            inference_success = self.run_inference(wav_path)
+            
+        # Prepare the videos for upload right away so posting doesn't wait on it
+        if inference_success and self.REELS_POSTPROCESS:
+            self.prepare_videos_for_upload()
+            
+        if self.USE_ARTIFACT_STORE:
+            wav_path = self.store_artifacts(wav_path, inference_success)
+            
+        return wav_path, inference_success
+    
+    def store_artifacts(self, wav_path, include_video=True):
+        """
+        Move the WAV and the generated videos into the artifact store, referenced
+        by self.job_id, and point wav/audio/video paths at the stored copies.
+        
+        Returns:
+            str: Path of the stored WAV (the original path if storing failed)
+        """
+        try:
+            store = get_artifact_store()
+            stored_wav = store.put(wav_path, "audio", job=self.job_id)
+            if self.audio_path == wav_path:
+                self.audio_path = stored_wav
+            
+            if include_video:
+                videos = [path for path in (self.video_paths or [self.video_path]) if path and os.path.exists(path)]
+                self.video_paths = [self._store_video(store, video_path) for video_path in videos]
+                if self.video_paths:
+                    self.video_path = self.video_paths[0]
+            return stored_wav
+        except Exception as e:
+            print(f"Error storing artifacts: {e}")
+            return wav_path
+    
+    def _store_video(self, store, video_path):
+        """Put a rendered (or Reels) video into the artifact store and return its stored path."""
+        if is_reels_video(video_path):
+            # Keep the raw render too, so captions can be restyled without inference
+            raw_video = video_path[:-len(REELS_SUFFIX + ".mp4")] + ".mp4"
+            if os.path.exists(raw_video):
+                store.put(raw_video, "video", job=self.job_id)
+            return store.put(video_path, "reels", job=self.job_id)
+        return store.put(video_path, "video", job=self.job_id)
+    
+    def prepare_videos_for_upload(self):
+        """
+        Run prepare_video_for_upload() on every video of the last render.
+        
+        Returns:
+            list: Paths of the videos to upload (video_path is the first)
+        """
+        prepared = []
+        for video_path in self.video_paths or [self.video_path]:
+            self.video_path = video_path
+            prepared.append(self.prepare_video_for_upload())
+        self.video_paths = [path for path in prepared if path]
+        self.video_path = self.video_paths[0] if self.video_paths else None
+        return self.video_paths
+    
+    def prepare_video_for_upload(self):
+        """
+        Replace self.video_path with a Reels-ready version (1080x1920, normalized
+        loudness, size-targeted bitrate, fast start). An up-to-date processed
+        file is reused. If processing fails the original video is kept.
+        
+        Returns:
+            str: Path of the video to upload
+        """
+        if not self.video_path or is_reels_video(self.video_path):
+            return self.video_path
+        if not self.ffmpeg_path:
+            print("FFmpeg not available - uploading the video without post-processing.")
+            return self.video_path
+        
+        output_path = reels_output_path(self.video_path)
+        subtitles_path = self.write_subtitles() if self.BURN_SUBTITLES else None
+        
+        inputs = [self.video_path] + ([subtitles_path] if subtitles_path else [])
+        if os.path.exists(output_path) and all(os.path.getmtime(output_path) >= os.path.getmtime(path) for path in inputs):
+            self.video_path = output_path
+            return self.video_path
+        
+        self.update_status("Preparing video for Reels...")
+        try:
+            # Captions are burned in during the same encode
+            video_filters = None
+            if subtitles_path:
+                from subtitles import subtitles_filter
+                video_filters = subtitles_filter(subtitles_path)
+            processed = prepare_for_reels(self.ffmpeg_path, self.video_path, output_path, video_filters=video_filters)
+        except Exception as e:
+            print(f"Error preparing video for Reels: {e}")
+            processed = None
+        
+        if processed:
+            self.video_path = processed
+            self.update_status(f"Reels video ready: {os.path.basename(processed)}")
+        else:
+            self.update_status("Reels post-processing failed, the original video will be uploaded.")
+        return self.video_path
+        
+    def open_video_in_file_manager(self, review=True):
+        """
+        Uploads the newly generated video to Instagram using Chrome automation with enhanced error handling and waiting for proper page loading
+        
+        Args:
+            review (bool): Keep a visible browser open for POST_REVIEW_SECONDS afterwards.
+                Headless browsers are always closed right away.
+        """
+        # Debug prints to help troubleshoot
+        print(f"Debug: video_path attribute exists: {hasattr(self, 'video_path')}")
+        if hasattr(self, 'video_path'):
+            print(f"Debug: video_path value: {self.video_path}")
+            print(f"Debug: video file exists: {os.path.exists(self.video_path) if self.video_path else 'No path set'}")
+        
+        # First verify we have a valid video path
+        if not (hasattr(self, 'video_path') and self.video_path and os.path.exists(self.video_path)):
+            self.update_status("No video file available to upload.")
+            # Videos of finished jobs are kept in the artifact store
+            stored_video = None
+            if self.USE_ARTIFACT_STORE:
+                store = get_artifact_store()
+                stored_video = store.latest("reels") or store.latest("video")
+            if stored_video:
+                self.video_path = stored_video
+                self.update_status(f"Found stored video: {os.path.basename(self.video_path)}")
+            else:
+                # Try to look in results directory for recent mp4 files as a fallback
+                results_dir = os.path.join(os.getcwd(), "results")
+                if os.path.exists(results_dir):
+                    mp4_files = [os.path.join(results_dir, f) for f in os.listdir(results_dir) 
+                                if f.endswith('.mp4')]
+                
+                    if mp4_files:
+                        # Get the most recently created video file
+                        self.video_path = max(mp4_files, key=os.path.getctime)
+                        self.update_status(f"Found video file as fallback: {os.path.basename(self.video_path)}")
+                    else:
+                        self.update_status("No MP4 files found in results directory.")
+                        return
+                else:
+                    self.update_status("Results directory not found.")
+                    return
+        
+        # Videos found as a fallback may not have been post-processed yet
+        if self.REELS_POSTPROCESS:
+            self.prepare_video_for_upload()
+        
+        # Now that we have a valid video path, let's upload to Instagram
+        try:
+            from selenium import webdriver
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.webdriver.support import expected_conditions as EC
+            from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
+            import time
+            
+            self.update_status("Starting Instagram upload process...")
+            
+            # Instagram credentials
+            username = "Write your username here"
+            password = "Write your password here"
+            
+            # Setup Chrome with optimized options
+            options = webdriver.ChromeOptions()
+            # Performance and stability options
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-dev-shm-usage")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--disable-extensions")
+            options.add_argument("--disable-renderer-backgrounding")
+            options.add_argument("--disable-background-timer-throttling")
+            if HEADLESS_BROWSER:
+                apply_headless_profile(options)
+            else:
+                options.add_argument("--enable-gpu-rasterization")
+                options.add_argument("--force-gpu-mem-available-mb=4096")
+            
+            # Add experimental options to handle latency and automation detection
+            options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            options.add_experimental_option("useAutomationExtension", False)
+            if not HEADLESS_BROWSER:
+                options.add_experimental_option("detach", True)
+            
+            # Start Chrome browser with automatic webdriver management
+            self.update_status("Initializing Chrome browser...")
+            driver = launch_chrome(options)
+            if not HEADLESS_BROWSER:
+                driver.maximize_window()
+            
+            # Custom wait function that handles common exceptions
+            def wait_for_element(driver, locator, timeout=20, condition=EC.visibility_of_element_located):
+                try:
+                    element = WebDriverWait(driver, timeout).until(
+                        condition(locator)
+                    )
+                    return element
+                except (TimeoutException, NoSuchElementException, StaleElementReferenceException) as e:
+                    self.update_status(f"Error finding element {locator}: {str(e)}")
+                    return None
+            
+            # Navigate to Instagram
+            self.update_status("Opening Instagram...")
+            driver.get("https://www.instagram.com/")
+            
+            # Wait for the login page to load
+            wait = WebDriverWait(driver, 30)
+            
+            try:
+                # Wait for the login fields to be visible
+                self.update_status("Waiting for login page to load...")
+                username_field = wait_for_element(driver, (By.CSS_SELECTOR, "input[name='username']"))
+                if not username_field:
+                    raise Exception("Username field not found")
+                    
+                password_field = driver.find_element(By.CSS_SELECTOR, "input[name='password']")
+                
+                # Enter credentials
+                self.update_status("Entering login credentials...")
+                username_field.clear()
+                username_field.send_keys(username)
+                password_field.clear()
+                password_field.send_keys(password)
+                
+                # Click login button
+                login_button = driver.find_element(By.CSS_SELECTOR, "button[type='submit']")
+                login_button.click()
+                
+                # Wait for and handle the "Save Login Info" dialog if it appears
+                self.update_status("Checking for 'Save Login Info' dialog...")
+                try:
+                    # First try the exact element structure provided
+                    not_now_selector = (By.XPATH, "//div[@role='button' and contains(@class, 'x1i10hfl') and contains(text(), 'Not now')]")
+                    
+                    # List of potential "Not Now" button selectors
+                    not_now_selectors = [
+                        not_now_selector,
+                        (By.XPATH, "//div[@role='button' and contains(text(), 'Not now')]"),
+                        (By.XPATH, "//div[@role='button' and contains(text(), 'Not Now')]"),
+                        (By.XPATH, "//button[contains(text(), 'Not now')]"),
+                        (By.XPATH, "//button[contains(text(), 'Not Now')]"),
+                        (By.XPATH, "//div[contains(@class, 'x1i10hfl') and @role='button' and contains(., 'Not now')]"),
+                        (By.XPATH, "//div[contains(@class, 'x1i10hfl') and @role='button' and contains(., 'Not Now')]"),
+                        (By.XPATH, "//div[contains(@class, 'x1i10hfl') and @tabindex='0' and @role='button']"),
+                    ]
+                    
+                    for selector in not_now_selectors:
+                        not_now_button = wait_for_element(driver, selector, timeout=3)
+                        if not_now_button:
+                            self.update_status(f"'Save Login Info' dialog detected, clicking 'Not Now' button...")
+                            try:
+                                # First try direct click
+                                not_now_button.click()
+                                self.update_status("Successfully clicked 'Not Now' button with direct click")
+                                break
+                            except Exception as e:
+                                self.update_status(f"Direct click on 'Not Now' failed, trying JavaScript click: {str(e)}")
+                                try:
+                                    # Try JavaScript click
+                                    driver.execute_script("arguments[0].click();", not_now_button)
+                                    self.update_status("Successfully clicked 'Not Now' button with JavaScript click")
+                                    break
+                                except Exception as e2:
+                                    self.update_status(f"JavaScript click on 'Not Now' failed, trying ActionChains: {str(e2)}")
+                                    try:
+                                        # Try ActionChains
+                                        from selenium.webdriver.common.action_chains import ActionChains
+                                        actions = ActionChains(driver)
+                                        actions.move_to_element(not_now_button).click().perform()
+                                        self.update_status("Successfully clicked 'Not Now' button with ActionChains")
+                                        break
+                                    except Exception as e3:
+                                        self.update_status(f"ActionChains click on 'Not Now' failed: {str(e3)}")
+                                        continue
+                    
+                    # Give the UI time to update after clicking the button
+                    time.sleep(2)
+                    
+                except Exception as e:
+                    self.update_status(f"Note: 'Save Login Info' dialog handling completed: {str(e)}")
+                
+                # Check for "Turn on Notifications" dialog and dismiss if present
+                try:
+                    notifications_dialog = wait_for_element(
+                        driver, 
+                        (By.XPATH, "//button[contains(text(), 'Not Now')]"), 
+                        timeout=5
+                    )
+                    
+                    if notifications_dialog:
+                        self.update_status("'Turn on Notifications' dialog detected, clicking 'Not Now'...")
+                        notifications_dialog.click()
+                        time.sleep(1)  # Short pause after clicking
+                except Exception as e:
+                    self.update_status(f"Note: Notifications dialog not found or already handled: {str(e)}")
+                
+                # Verify we are on the home page by checking for multiple homepage elements
+                self.update_status("Verifying successful login and home page load...")
+                
+                # Define a list of possible home page indicators
+                home_indicators = [
+                    (By.CSS_SELECTOR, "svg[aria-label='Home']"),
+                    (By.CSS_SELECTOR, "svg[aria-label='Create']"),
+                    (By.CSS_SELECTOR, "svg[aria-label='Search']"),
+                    (By.CSS_SELECTOR, "svg[aria-label='Explore']"),
+                    # Header elements
+                    (By.CSS_SELECTOR, "nav[role='navigation']"),
+                    # Feed elements
+                    (By.CSS_SELECTOR, "main[role='main']"),
+                    # Profile elements  
+                    (By.CSS_SELECTOR, "span[aria-label='Profile']")
+                ]
+                
+                # Check for at least two indicators to confirm we're on the home page
+                indicators_found = 0
+                for indicator in home_indicators:
+                    try:
+                        element = wait_for_element(driver, indicator, timeout=5)
+                        if element:
+                            indicators_found += 1
+                            if indicators_found >= 2:
+                                break
+                    except:
+                        continue
+                
+                if indicators_found < 2:
+                    raise Exception("Failed to verify home page load - insufficient indicators found")
+                
+                self.update_status("Instagram home page successfully loaded!")
+                
+                # Wait for the create button to be fully interactive
+                self.update_status("Looking for create button...")
+                create_button = None
+                
+                # Try multiple selectors for the create button
+                create_button_selectors = [
+                    (By.CSS_SELECTOR, "svg[aria-label='Create']"),
+                    (By.XPATH, "//div[@role='button' and contains(@aria-label, 'Create')]"),
+                    (By.XPATH, "//a[contains(@href, '/create/')]"),
+                    (By.CSS_SELECTOR, "[aria-label='New post']"),
+                    (By.XPATH, "//div[contains(@aria-label, 'New post')]"),
+                    (By.XPATH, "//div[contains(@aria-label, 'New')]"),
+                    (By.XPATH, "//span[contains(text(), 'Create')]"),
+                    (By.XPATH, "//a[@role='link' and contains(@href, '/create')]"),
+                    (By.XPATH, "//div[@role='button']//*[local-name()='svg' and @aria-label='Create']"),
+                    (By.XPATH, "//div[@role='button']//*[local-name()='svg' and @aria-label='New post']")
+                ]
+                
+                for selector in create_button_selectors:
+                    try:
+                        element = wait_for_element(driver, selector, timeout=5)
+                        if element:
+                            create_button = element
+                            self.update_status(f"Found create button using selector: {selector}")
+                            break
+                    except Exception as e:
+                        continue
+                
+                if not create_button:
+                    # Final attempt: look for the parent container of the create button
+                    try:
+                        # Get all clickable elements
+                        clickable_elements = driver.find_elements(By.CSS_SELECTOR, "[role='button']")
+                        for element in clickable_elements:
+                            try:
+                                # Check if this might be the create button by looking at its aria-label
+                                aria_label = element.get_attribute("aria-label")
+                                if aria_label and ("create" in aria_label.lower() or "new" in aria_label.lower() or "post" in aria_label.lower()):
+                                    create_button = element
+                                    self.update_status(f"Found create button by aria-label: {aria_label}")
+                                    break
+                            except:
+                                pass
+                    except Exception as e:
+                        pass
+                
+                if not create_button:
+                    raise Exception("Create button not found after trying multiple methods")
+                
+                # Give the page a moment to stabilize before clicking
+                time.sleep(2)
+                
+                # Click on create button
+                self.update_status("Clicking create button...")
+                try:
+                    # First try direct click
+                    create_button.click()
+                except Exception as e:
+                    self.update_status(f"Direct click failed, trying alternative clicking methods: {str(e)}")
+                    try:
+                        # Try JavaScript click as fallback
+                        driver.execute_script("arguments[0].click();", create_button)
+                    except Exception as e2:
+                        self.update_status(f"JavaScript click failed, trying ActionChains: {str(e2)}")
+                        # Try ActionChains as second fallback
+                        from selenium.webdriver.common.action_chains import ActionChains
+                        actions = ActionChains(driver)
+                        actions.move_to_element(create_button).click().perform()
+                
+                # Wait for the create post dialog to appear
+                self.update_status("Waiting for upload dialog...")
+                select_from_computer = wait_for_element(
+                    driver, 
+                    (By.XPATH, "//button[contains(text(), 'Select from computer')]"),
+                    timeout=30
+                )
+                
+                if not select_from_computer:
+                    # Try alternative selector
+                    select_from_computer = wait_for_element(
+                        driver,
+                        (By.XPATH, "//div[contains(text(), 'Select from computer')]"),
+                        timeout=10
+                    )
+                    
+                if not select_from_computer:
+                    raise Exception("'Select from computer' button not found")
+                
+                # Click on "Select from computer"
+                self.update_status("Selecting video from computer...")
+                driver.execute_script("arguments[0].click();", select_from_computer)
+                
+                # Wait for file input to be ready
+                time.sleep(2)
+                
+                try:
+                    # Locate the file input element (it's usually hidden)
+                    file_inputs = driver.find_elements(By.CSS_SELECTOR, "input[type='file']")
+                    
+                    if not file_inputs:
+                        raise Exception("File input element not found")
+                    
+                    # Try each file input until one works
+                    file_input_success = False
+                    for file_input in file_inputs:
+                        try:
+                            # Send the file path directly to the input element
+                            file_input.send_keys(self.video_path)
+                            file_input_success = True
+                            break
+                        except Exception as e:
+                            self.update_status(f"Trying another file input: {str(e)}")
+                            continue
+                    
+                    if not file_input_success:
+                        raise Exception("Failed to send file path to any file input element")
+                    
+                    self.update_status("Uploading video...")
+                    
+                    # Wait for upload to complete and next button to be enabled (with generous timeout for large videos)
+                    self.update_status("Waiting for video to upload and process...")
+                    next_button = wait_for_element(
+                        driver, 
+                        (By.XPATH, "//button[contains(text(), 'Next')]"),
+                        timeout=30,  # 3 minutes timeout for large video upload
+                        condition=EC.element_to_be_clickable
+                    )
+                    
+                    if not next_button:
+                        raise Exception("Next button not found or not clickable after upload")
+                    
+                    # Click next to proceed to filters page
+                    self.update_status("Upload complete. Moving to filters page...")
+                    driver.execute_script("arguments[0].click();", next_button)
+                    
+                    # Wait for filters/editing page and click next again
+                    next_button = wait_for_element(
+                        driver, 
+                        (By.XPATH, "//button[contains(text(), 'Next')]"),
+                        timeout=30,
+                        condition=EC.element_to_be_clickable
+                    )
+                    
+                    if not next_button:
+                        raise Exception("Next button not found on filters page")
+                    
+                    self.update_status("Moving to caption page...")
+                    driver.execute_script("arguments[0].click();", next_button)
+                    
+                    # Wait for caption page and click share
+                    self.update_status("Adding caption and finalizing post...")
+                    share_button = wait_for_element(
+                        driver, 
+                        (By.XPATH, "//button[contains(text(), 'Share')]"),
+                        timeout=30,
+                        condition=EC.element_to_be_clickable
+                    )
+                    
+                    if not share_button:
+                        # Try alternative share button text
+                        share_button = wait_for_element(
+                            driver,
+                            (By.XPATH, "//button[contains(text(), 'Post')]"),
+                            timeout=10
+                        )
+                    
+                    if not share_button:
+                        raise Exception("Share button not found")
+                    
+                    # Optional: Add a caption here if desired
+                    try:
+                        caption_area = driver.find_element(By.CSS_SELECTOR, "textarea[aria-label='Write a caption...']")
+                        caption_area.send_keys("Check out my latest video! #automated #upload")
+                    except Exception as e:
+                        self.update_status(f"Note: Couldn't add caption: {str(e)}")
+                    
+                    # Finally, share the post
+                    self.update_status("Sharing post...")
+                    driver.execute_script("arguments[0].click();", share_button)
+                    
+                    # Wait for confirmation that post was shared
+                    confirmation = wait_for_element(
+                        driver,
+                        (By.XPATH, "//*[contains(text(), 'Your post has been shared')]"),
+                        timeout=60
+                    )
+                    
+                    if confirmation:
+                        self.update_status("✅ Video successfully posted to Instagram!")
+                    else:
+                        # Check for alternative confirmation indicators
+                        time.sleep(10)  # Give time for the post to complete
+                        
+                        # If we're back at the home page, likely successful
+                        home_button = wait_for_element(driver, (By.CSS_SELECTOR, "svg[aria-label='Home']"), timeout=5)
+                        if home_button:
+                            self.update_status("✅ Video posted to Instagram! (Inferred from return to home page)")
+                        else:
+                            self.update_status("⚠️ Upload may have completed, but confirmation not detected")
+                    
+                except Exception as e:
+                    self.update_status(f"Error during file upload: {str(e)}")
+            
+            except TimeoutException as e:
+                self.update_status(f"Timeout waiting for Instagram elements: {str(e)}")
+            except Exception as e:
+                self.update_status(f"Error during Instagram automation: {str(e)}")
+            
+            # Keep the browser open for review when someone can see it
+            if review and not HEADLESS_BROWSER:
+                self.update_status(f"Keeping browser open for {self.POST_REVIEW_SECONDS} seconds for review...")
+                time.sleep(self.POST_REVIEW_SECONDS)
+            
+            # Close the browser
+            quit_browser(driver)
+            self.update_status("Browser closed. Instagram upload process completed.")
+            
+        except ImportError:
+            self.update_status("Error: Selenium is required for Instagram automation. Please install it with 'pip install selenium webdriver-manager'.")
+        except Exception as e:
+            self.update_status(f"Error starting Instagram automation: {str(e)}")
+            
+    def set_status_callback(self, callback_function):
+        """
+        Set a callback function for status updates
+        
+        Args:
+            callback_function: Function that accepts a single string parameter
+        """
+        self.status_callback = callback_function
+    
+    def set_progress_callback(self, callback_function):
+        """
+        Set a callback function for structured inference progress events
+        
+        Args:
+            callback_function: Function that accepts a single event dict with the keys
+                               phase, phase_index, phase_count, step, total, phase_progress,
+                               overall_progress, elapsed and eta (seconds left, or None)
+        """
+        self.progress_callback = callback_function
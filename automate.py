@@ -6,21 +6,39 @@ import subprocess
 import tempfile
 import sys
 import threading
-from selenium import webdriver
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from PIL import Image
-import pytesseract
 from groq import Groq
 
 # Import our custom audio processor module
 from audio_processor import AudioProcessor
 
+# Spoken-duration estimation for generated scripts
+from script_timing import fit_script, trim_to_duration
+
+# Shared Selenium helpers
+from browser_utils import (
+    fill_text_field, HEADLESS_BROWSER, apply_headless_profile,
+    block_page_resources, allow_downloads, launch_chrome, quit_browser,
+    reap_orphaned_browsers, capture_page_audio
+)
+
+# CAPTCHA OCR with in-memory preprocessing
+from captcha_solver import solve_captcha
+
+# Longest spoken duration (seconds) accepted before TTS and inference
+TARGET_SECONDS = 45
+
+# Set the script with one script call instead of typing it key by key
+FAST_FILL = True
+
+# Take the generated audio from the page instead of going through a download
+CAPTURE_AUDIO = True
+
 def display_menu(options):
     """Display a menu of options and get user selection."""
     print("\nSelect an option:")
@@ -84,8 +102,8 @@ def get_content_topics():
         ]
     }
 
-def generate_script(main_topic, subtopic):
-    """Generate a script about the given topic using Groq API."""
+def generate_script(main_topic, subtopic, max_attempts=3):
+    """Generate a script about the given topic using Groq API, regenerating or trimming it to fit TARGET_SECONDS."""
     # Use API key from environment variables
     api_key = os.environ.get("GROQ_API_KEY")
     if not api_key:
@@ -117,23 +135,39 @@ def generate_script(main_topic, subtopic):
     """
     
     try:
-        # Make API call to Groq
-        print(f"Generating script for: {main_topic} - {subtopic}...")
-        completion = client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Write a 45-second Instagram script about: {main_topic} - {subtopic}"}
-            ],
-            temperature=0.7,
-            max_tokens=300,  # Limit to keep it around 45 seconds of speech
-            top_p=1,
-            stream=False
-        )
+        # Regenerate scripts that would run over the target duration,
+        # keeping the shortest candidate in case none of them fit
+        script_content = None
+        shortest_estimate = None
+        for attempt in range(1, max_attempts + 1):
+            # Make API call to Groq
+            print(f"Generating script for: {main_topic} - {subtopic}...")
+            completion = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": f"Write a {TARGET_SECONDS}-second Instagram script about: {main_topic} - {subtopic}"}
+                ],
+                temperature=0.7,
+                max_tokens=300,  # Limit to keep it around 45 seconds of speech
+                top_p=1,
+                stream=False
+            )
+            
+            # Extract the generated script
+            candidate = completion.choices[0].message.content
+            fits, estimate = fit_script(candidate, TARGET_SECONDS)
+            print(f"Script attempt {attempt}: estimated {estimate:.1f}s (target {TARGET_SECONDS}s)")
+            
+            if shortest_estimate is None or estimate < shortest_estimate:
+                script_content = candidate
+                shortest_estimate = estimate
+            if fits:
+                return script_content
         
-        # Extract the generated script
-        script_content = completion.choices[0].message.content
-        return script_content
+        # Nothing fit - trim the shortest candidate at sentence boundaries
+        print(f"Trimming script to fit {TARGET_SECONDS}s")
+        return trim_to_duration(script_content, TARGET_SECONDS)
     except Exception as e:
         print(f"Error generating script with Groq API: {e}")
         fallback_script = f"Hey there! Today I want to talk to you about {subtopic} in the realm of {main_topic}. " \
@@ -144,56 +178,151 @@ def generate_script(main_topic, subtopic):
         print("Using fallback script instead.")
         return fallback_script
 
-def close_chrome_processes():
-    """Attempt to close any running Chrome processes"""
-    print("Closing any existing Chrome processes...")
-    try:
-        if os.name == 'nt':  # Windows
-            subprocess.call('taskkill /f /im chrome.exe', shell=True)
-        else:  # Linux/Mac
-            subprocess.call('pkill -f chrome', shell=True)
-        time.sleep(2)  # Give it time to close
-    except Exception as e:
-        print(f"Note: Couldn't close Chrome processes: {e}")
-        print("You may want to close Chrome manually before running this script.")
-
-def start_audio_monitor(downloads_folder):
+class AudioJobWorker:
     """
-    Start a background thread to monitor for downloaded files and process them
+    Processes the audio of outstanding TTS jobs.
     
-    Args:
-        downloads_folder (str): Path to the downloads folder to monitor
-        
-    Returns:
-        tuple: (threading.Thread, AudioProcessor) - The monitoring thread and processor instance
+    The downloads folder is only watched while a job expects a file (see
+    expect()), so an idle worker doesn't wake up at all. Arriving files and
+    captured audio are converted concurrently in a small thread pool; inference
+    runs one file at a time since it shares the AudioProcessor and the GPU.
     """
-    # Create audio processor instance
-    processor = AudioProcessor(input_dir=downloads_folder)
-    
-    # Define the monitoring function
-    def monitor_audio_files():
-        print("Starting audio file monitoring thread...")
-        while True:
-            try:
-                # Wait for and process new audio files
-                wav_file = processor.process_file()
+    
+    # Threads converting audio at the same time
+    MAX_WORKERS = 2
+    # Seconds between folder checks while a job is outstanding
+    POLL_INTERVAL = 0.5
+    # Seconds a job waits for its download before it is given up
+    JOB_TIMEOUT = 300
+    # Files in the downloads folder that are treated as audio
+    AUDIO_EXTENSIONS = ('.mp3', '.wav', '.m4a', '.ogg', '.aac', '.flac', '.webm')
+    
+    def __init__(self, processor, max_workers=MAX_WORKERS):
+        """
+        Initialize the worker and start its watcher thread.
+        
+        Args:
+            processor (AudioProcessor): Processor whose input_dir receives the downloads
+            max_workers (int): Number of files converted at the same time
+        """
+        self.processor = processor
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audio")
+        self.inference_lock = threading.Lock()
+        self.condition = threading.Condition()
+        # Deadlines of jobs still waiting for their download
+        self.expected = []
+        self.futures = []
+        self.stopping = False
+        self.drain = True
+        
+        # Files already in the folder don't belong to any job
+        self.seen = set(os.listdir(processor.input_dir))
+        
+        self.thread = threading.Thread(target=self._watch, daemon=True)
+        self.thread.start()
+    
+    def expect(self, count=1, timeout=JOB_TIMEOUT):
+        """Register TTS job(s) whose audio will be downloaded into the folder."""
+        with self.condition:
+            self.expected.extend([time.time() + timeout] * count)
+            self.condition.notify_all()
+    
+    def submit_bytes(self, data, file_name):
+        """Process audio captured from the page (no download involved)."""
+        self._submit(self._process_bytes, data, file_name)
+    
+    def _submit(self, function, *args):
+        future = self.pool.submit(function, *args)
+        future.add_done_callback(self._report)
+        self.futures.append(future)
+    
+    def _process_file(self, file_path):
+        wav_path = self.processor.convert_to_wav(file_path)
+        with self.inference_lock:
+            return self.processor.process_wav(wav_path)
+    
+    def _process_bytes(self, data, file_name):
+        wav_path = self.processor.convert_bytes_to_wav(data, file_name)
+        with self.inference_lock:
+            return self.processor.process_wav(wav_path)
+    
+    def _report(self, future):
+        if future.cancelled():
+            return
+        try:
+            wav_file, inference_success = future.result()
+        except Exception as e:
+            print(f"Error processing audio: {e}")
+            return
+        if wav_file:
+            print(f"✓ Successfully processed audio to WAV: {wav_file}")
+            if not inference_success:
+                print("Note: Inference did not run or was not successful.")
+    
+    def _watch(self):
+        with self.condition:
+            while True:
+                if not self.expected:
+                    if self.stopping:
+                        return
+                    # Idle until a job is registered or shutdown is requested
+                    self.condition.wait()
+                    continue
+                if self.stopping and not self.drain:
+                    return
                 
-                if wav_file:
-                    print(f"✓ Successfully processed audio to WAV: {wav_file}")
-                    # Additional processing could be added here
-                else:
-                    # Sleep before retrying - this prevents CPU overuse
-                    time.sleep(5)
-                    
-            except Exception as e:
-                print(f"Error in audio monitoring thread: {e}")
-                time.sleep(5)  # Sleep before retrying on error
+                self._scan()
+                self.condition.wait(self.POLL_INTERVAL)
     
-    # Create and start the monitoring thread
-    monitor_thread = threading.Thread(target=monitor_audio_files, daemon=True)
-    monitor_thread.start()
+    def _scan(self):
+        """Hand finished downloads to the pool and expire jobs past their deadline."""
+        try:
+            file_names = os.listdir(self.processor.input_dir)
+        except OSError as e:
+            print(f"Error reading downloads folder: {e}")
+            file_names = []
+        
+        for file_name in sorted(file_names):
+            if not self.expected:
+                break
+            if file_name in self.seen or not file_name.lower().endswith(self.AUDIO_EXTENSIONS):
+                continue
+            file_path = os.path.join(self.processor.input_dir, file_name)
+            # Partial downloads are checked again on the next pass
+            if not self.processor.is_download_complete(file_path):
+                continue
+            self.seen.add(file_name)
+            self.expected.pop(0)
+            print(f"New audio file: {file_name}")
+            self._submit(self._process_file, file_path)
+        
+        now = time.time()
+        expired = [deadline for deadline in self.expected if deadline < now]
+        if expired:
+            print(f"{len(expired)} audio download(s) did not arrive in time.")
+            self.expected = [deadline for deadline in self.expected if deadline >= now]
     
-    return monitor_thread, processor
+    def shutdown(self, wait=True):
+        """
+        Stop the worker.
+        
+        Args:
+            wait (bool): If True, outstanding jobs get until their deadline to
+                         deliver a file and queued files are finished. If False,
+                         waiting jobs are dropped, queued files are cancelled and
+                         running inference is killed.
+        """
+        with self.condition:
+            self.stopping = True
+            self.drain = wait
+            self.condition.notify_all()
+        self.thread.join()
+        
+        if not wait:
+            for future in self.futures:
+                future.cancel()
+            self.processor.cancel_inference()
+        self.pool.shutdown(wait=True)
 
 def main():
     # Get available content topics
@@ -225,16 +354,19 @@ def main():
         print("Exiting program.")
         return
     
-    # Detect downloads folder
-    downloads_folder = os.path.join(os.path.expanduser("~"), "Downloads")
+    # Each run downloads into its own directory so concurrent runs
+    # can't pick up each other's files
+    downloads_folder = tempfile.mkdtemp(prefix="speechma_job_")
     print(f"Using downloads folder: {downloads_folder}")
     
-    # Start audio monitoring in a background thread
-    monitor_thread, audio_processor = start_audio_monitor(downloads_folder)
-    print(f"Audio monitor started. Files will be converted to WAV format in: {audio_processor.output_dir}")
+    # Audio is processed by a worker that only watches while a job is outstanding
+    audio_processor = AudioProcessor(input_dir=downloads_folder)
+    audio_processor.script_text = user_script
+    audio_worker = AudioJobWorker(audio_processor)
+    print(f"Audio worker ready. Files will be converted to WAV format in: {audio_processor.output_dir}")
     
-    # Try to close any running Chrome processes
-    close_chrome_processes()
+    # Clean up browsers left behind by crashed runs (other browsers are untouched)
+    reap_orphaned_browsers()
     
     # Set up Chrome options
     chrome_options = Options()
@@ -244,6 +376,8 @@ def main():
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--disable-extensions")
+    if HEADLESS_BROWSER:
+        apply_headless_profile(chrome_options)
     
     # Set default download directory to the detected downloads folder
     prefs = {"download.default_directory": downloads_folder}
@@ -256,9 +390,11 @@ def main():
     driver = None
     
     try:
-        # Initialize Chrome driver with the webdriver-manager
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        # Initialize Chrome driver with its own isolated profile
+        driver = launch_chrome(chrome_options)
+        if HEADLESS_BROWSER:
+            block_page_resources(driver)
+            allow_downloads(driver, downloads_folder)
         print("Successfully started Chrome!")
         
         # Navigate to the website
@@ -411,26 +547,15 @@ def main():
                     print("Found text input area. Pasting your script...")
                     driver.execute_script("arguments[0].scrollIntoView(true);", text_area)
                     time.sleep(1)
-                    text_area.clear()
-                    text_area.send_keys(user_script)
+                    fill_text_field(driver, text_area, user_script, fast=FAST_FILL)
                     print("Script has been entered. You can now continue manually.")
                 else:
                     print("Couldn't find the text input area. Please paste your script manually.")
 
                 print("Reading CAPTCHA using OCR...")
                 try:
-                    # Locate the captcha image
-                    captcha_img = WebDriverWait(driver, 10).until(
-                        EC.presence_of_element_located((By.ID, "captchaImg"))
-                    )
-
-                    # Save screenshot of the CAPTCHA image
-                    captcha_img_path = "captcha.png"
-                    captcha_img.screenshot(captcha_img_path)
-
-                    # Use OCR to read the text from the image
-                    captcha_text = pytesseract.image_to_string(Image.open(captcha_img_path), config='--psm 7').strip()
-                    captcha_text = ''.join(filter(str.isdigit, captcha_text))  # Keep only digits
+                    # Read the CAPTCHA in memory, refreshing it until OCR gets 5 digits
+                    captcha_text = solve_captcha(driver, attempts=3) or ""
 
                     print(f"OCR detected CAPTCHA: {captcha_text}")
 
@@ -467,21 +592,31 @@ def main():
                         EC.element_to_be_clickable((By.XPATH, "//button[contains(@class, 'download-btn')]"))
                     )
 
-                    # Scroll into view and click the Download button
-                    print("Clicking the Download button...")
-                    driver.execute_script("arguments[0].scrollIntoView(true);", download_button)
-                    time.sleep(2)  # Slight delay for smoother behavior
-                    driver.execute_script("arguments[0].click();", download_button)
-                    
-                    # Give some time for the download to start
-                    print("Download initiated!")
-                    print("Waiting for download to complete...")
+                    # Take the audio straight from the page when possible
+                    captured = capture_page_audio(driver, download_button) if CAPTURE_AUDIO else None
+                    if captured:
+                        data, extension = captured
+                        file_name = f"speechma_audio_{time.strftime('%Y%m%d_%H%M%S')}{extension}"
+                        print("Captured the generated audio from the page. Processing it in the background...")
+                        audio_worker.submit_bytes(data, file_name)
+                    else:
+                        # Scroll into view and click the Download button
+                        print("Clicking the Download button...")
+                        audio_worker.expect()
+                        driver.execute_script("arguments[0].scrollIntoView(true);", download_button)
+                        time.sleep(2)  # Slight delay for smoother behavior
+                        driver.execute_script("arguments[0].click();", download_button)
+                        
+                        # Give some time for the download to start
+                        print("Download initiated!")
+                        print("Waiting for download to complete...")
+                        
+                        # Wait for a reasonable time for download to complete
+                        time.sleep(10)
                 except Exception as e:
                     print(f"Could not find Download button: {e}")
                     print("Please click the Download button manually when audio generation is complete.")
-                
-                # Wait for a reasonable time for download to complete
-                time.sleep(10)
+                    audio_worker.expect()
                 
                 print("\nThe audio processor will continue running in the background.")
                 print("Any downloaded audio files will be automatically converted to WAV format.")
@@ -516,8 +651,7 @@ def main():
             
             # Explicitly start without any user data directory
             print("Starting Chrome without custom profile...")
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            driver = launch_chrome(chrome_options)
             
             print("Chrome started! Opening https://speechma.com/...")
             driver.get("https://speechma.com/")
@@ -525,6 +659,7 @@ def main():
             print(f"1. Search for 'Emily' voice")
             print(f"2. Select it from the results")
             print(f"3. Paste this text into the input area: {user_script}")
+            audio_worker.expect()
             
             print("\nThe audio processor will continue running in the background.")
             print("Any downloaded audio files will be automatically converted to WAV format.")
@@ -540,6 +675,8 @@ def main():
             print("2. Go to https://speechma.com/")
             print("3. Search for 'Emily' voice")
             print("4. Select it and paste your script")
+            print(f"5. Save the downloaded audio into: {downloads_folder}")
+            audio_worker.expect()
             
             print("\nThe audio processor will continue running in the background.")
             print("Any downloaded audio files will be automatically converted to WAV format.")
@@ -553,19 +690,20 @@ def main():
         print("Closing browser...")
         try:
             if driver:
-                driver.quit()
+                quit_browser(driver)
         except Exception:
             pass
         
-        print("\nBrowser closed. Audio processor will continue running...")
-        print("Press Ctrl+C to terminate the program completely when finished.")
+        print("\nBrowser closed. Waiting for outstanding audio to finish processing...")
+        print("Press Ctrl+C to stop immediately.")
         
-        # Wait for the monitoring thread to finish - this keeps the program running
-        # until the user manually terminates it
+        # Finish outstanding jobs, then exit
         try:
-            monitor_thread.join()
+            audio_worker.shutdown(wait=True)
         except KeyboardInterrupt:
-            print("\nProgram terminated by user.")
+            print("\nStopping audio processing...")
+            audio_worker.shutdown(wait=False)
+            print("Program terminated by user.")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
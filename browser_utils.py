@@ -0,0 +1,508 @@
+import os
+import re
+import sys
+import json
+import base64
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+
+
+# Run automation browsers headless with a trimmed-down profile, e.g. on display-less
+# render nodes. Enable with HEADLESS_BROWSER=1.
+HEADLESS_BROWSER = os.environ.get("HEADLESS_BROWSER", "").lower() in ("1", "true", "yes")
+
+# Flags that turn off Chrome subsystems the automation never uses
+HEADLESS_ARGS = [
+    "--headless=new",
+    "--window-size=1024,768",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-breakpad",
+    "--disable-client-side-phishing-detection",
+    "--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication",
+    "--metrics-recording-only",
+    "--mute-audio",
+    "--no-first-run",
+    "--no-default-browser-check",
+]
+
+# Requests blocked on Speechma. PNG and data: URLs are left alone because the
+# CAPTCHA is served as an image and has to stay readable.
+BLOCKED_URL_PATTERNS = [
+    "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*", "*clarity.ms*",
+]
+
+# Resolved ChromeDriver paths, keyed by the installed Chrome version
+DRIVER_CACHE_FILE = os.path.join(os.path.expanduser("~"), ".cache", "automated-video-generation", "chromedriver.json")
+
+_driver_lock = threading.Lock()
+_driver_path = None
+
+# Every browser we launch gets its own profile directory with this prefix.
+# The directory path is unique, so it identifies that browser's processes.
+PROFILE_PREFIX = "avg-chrome-"
+# Profiles are created under this prefix and renamed once their owner file
+# exists, so the reaper never sees a profile without an owner
+PENDING_PROFILE_PREFIX = "avg-pending-"
+OWNER_FILE = "automation_owner.json"
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Sets the field in one call. The native value setter is used for inputs and
+# textareas so frameworks that track the last value (React, Vue) see the change.
+FAST_FILL_SCRIPT = """
+const el = arguments[0];
+const text = arguments[1];
+el.focus();
+if (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') {
+    const proto = el.tagName === 'TEXTAREA' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, text);
+} else {
+    el.innerText = text;
+}
+el.dispatchEvent(new InputEvent('input', {bubbles: true, inputType: 'insertText', data: text}));
+el.dispatchEvent(new Event('change', {bubbles: true}));
+"""
+
+READ_FIELD_SCRIPT = """
+const el = arguments[0];
+return (el.tagName === 'TEXTAREA' || el.tagName === 'INPUT') ? el.value : el.innerText;
+"""
+
+# Fetches the generated audio from inside the page (works for blob: URLs too)
+# and hands it back as a data URL
+# Takes the player next to the given result element (the download button), so
+# voice preview players elsewhere on the page are never picked. Without an
+# element, the last player on the page is used.
+CAPTURE_AUDIO_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const anchor = arguments.length > 1 ? arguments[0] : null;
+const AUDIO = 'audio[src], audio source[src]';
+const LINK = 'a[download][href]';
+let audio = null;
+let link = null;
+if (anchor) {
+    for (let node = anchor; node && !audio && !link; node = node.parentElement) {
+        audio = node.querySelector(AUDIO);
+        link = node.querySelector(LINK);
+    }
+} else {
+    const players = document.querySelectorAll(AUDIO);
+    audio = players.length ? players[players.length - 1] : null;
+    link = document.querySelector(LINK);
+}
+const src = audio ? audio.src : (link ? link.href : null);
+if (!src) { done(null); return; }
+fetch(src)
+    .then(response => response.blob())
+    .then(blob => {
+        const reader = new FileReader();
+        reader.onloadend = () => done({data: reader.result, type: blob.type});
+        reader.readAsDataURL(blob);
+    })
+    .catch(error => done({error: String(error)}));
+"""
+
+AUDIO_EXTENSIONS = {
+    "audio/mpeg": ".mp3",
+    "audio/mp3": ".mp3",
+    "audio/wav": ".wav",
+    "audio/x-wav": ".wav",
+    "audio/wave": ".wav",
+    "audio/ogg": ".ogg",
+    "audio/aac": ".aac",
+    "audio/mp4": ".m4a",
+    "audio/flac": ".flac",
+}
+
+
+def _normalize(text):
+    return " ".join(text.split())
+
+
+def fill_text_field(driver, element, text, fast=True):
+    """
+    Enter text into a page field.
+
+    In fast mode all but the last character are set with a single script call
+    and the last character is typed, so the page still receives a real key event.
+    The field is then read back; if the page didn't keep the text, it falls back
+    to typing the whole text with send_keys.
+
+    Args:
+        driver: Selenium WebDriver
+        element: The textarea, input or contenteditable element
+        text (str): Text to enter
+        fast (bool): Whether to try the script fill before typing
+
+    Returns:
+        bool: True if the fast fill was used, False if the text was typed
+    """
+    if fast and text:
+        try:
+            driver.execute_script(FAST_FILL_SCRIPT, element, text[:-1])
+            element.send_keys(text[-1])
+            time.sleep(0.3)  # Let the page's input handlers settle
+
+            entered = driver.execute_script(READ_FIELD_SCRIPT, element) or ""
+            if _normalize(entered) == _normalize(text):
+                return True
+            print("Fast fill was not registered by the page. Falling back to typing...")
+        except Exception as e:
+            print(f"Fast fill failed: {e}. Falling back to typing...")
+
+    element.clear()
+    element.send_keys(text)
+    return False
+
+
+def capture_page_audio(driver, result_element=None, timeout=30):
+    """
+    Take the generated audio straight from the page instead of downloading it.
+
+    Args:
+        driver: Selenium WebDriver on the page with the generated audio
+        result_element: Element of the result player (e.g. its download button).
+            The audio closest to it is captured.
+        timeout (int): Seconds allowed for the in-page fetch
+
+    Returns:
+        tuple: (audio bytes, file extension), or None if no audio could be captured
+    """
+    try:
+        driver.set_script_timeout(timeout)
+        if result_element is not None:
+            result = driver.execute_async_script(CAPTURE_AUDIO_SCRIPT, result_element)
+        else:
+            result = driver.execute_async_script(CAPTURE_AUDIO_SCRIPT)
+    except Exception as e:
+        print(f"Audio capture failed: {e}")
+        return None
+
+    if not result or result.get("error") or not result.get("data"):
+        if result and result.get("error"):
+            print(f"Audio capture failed: {result['error']}")
+        return None
+
+    header, _, encoded = result["data"].partition(",")
+    data = base64.b64decode(encoded)
+    if not data:
+        return None
+
+    mime_type = (result.get("type") or header[5:].split(";")[0]).lower()
+    return data, AUDIO_EXTENSIONS.get(mime_type, ".mp3")
+
+
+def apply_headless_profile(options):
+    """
+    Add headless, resource-trimmed flags to Chrome options.
+
+    Args:
+        options: selenium ChromeOptions to modify
+    """
+    for argument in HEADLESS_ARGS:
+        options.add_argument(argument)
+
+
+def block_page_resources(driver, patterns=None):
+    """
+    Block images, fonts and analytics requests for the session through DevTools.
+
+    Args:
+        driver: Selenium Chrome WebDriver
+        patterns (list): URL patterns to block. Defaults to BLOCKED_URL_PATTERNS.
+    """
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns or BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"Could not block page resources: {e}")
+
+
+def allow_downloads(driver, download_dir):
+    """
+    Let a headless browser save downloads to download_dir.
+
+    Args:
+        driver: Selenium Chrome WebDriver
+        download_dir (str): Directory downloads are saved to
+    """
+    try:
+        driver.execute_cdp_cmd("Browser.setDownloadBehavior", {
+            "behavior": "allow",
+            "downloadPath": download_dir,
+        })
+    except Exception as e:
+        print(f"Could not enable headless downloads: {e}")
+
+
+def get_chrome_version():
+    """
+    Get the installed Chrome version without going to the network.
+
+    Returns:
+        str: Version string such as "124.0.6367.91", or None if Chrome wasn't found
+    """
+    if os.name == 'nt':  # Windows
+        try:
+            import winreg
+            for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(root, r"Software\Google\Chrome\BLBeacon") as key:
+                        return winreg.QueryValueEx(key, "version")[0]
+                except OSError:
+                    continue
+        except ImportError:
+            pass
+        return None
+
+    candidates = ["google-chrome", "google-chrome-stable", "chromium", "chromium-browser"]
+    if sys.platform == "darwin":
+        candidates.insert(0, "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome")
+
+    for candidate in candidates:
+        binary = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if not binary or not os.path.exists(binary):
+            continue
+        try:
+            result = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10)
+            match = re.search(r"(\d+\.\d+\.\d+\.\d+)", result.stdout)
+            if match:
+                return match.group(1)
+        except Exception:
+            continue
+    return None
+
+
+def _load_driver_cache():
+    try:
+        with open(DRIVER_CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_driver_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(DRIVER_CACHE_FILE), exist_ok=True)
+        with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        print(f"Could not write ChromeDriver cache: {e}")
+
+
+def get_chromedriver_path():
+    """
+    Resolve the ChromeDriver binary, reusing the path cached on disk for the
+    installed Chrome version. ChromeDriverManager (which checks versions over
+    the network) only runs when Chrome changes or nothing is cached, so browser
+    startup works on offline render nodes.
+
+    Returns:
+        str: Path to the chromedriver executable
+    """
+    global _driver_path
+    with _driver_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        cache = _load_driver_cache()
+        chrome_version = get_chrome_version()
+
+        cached_path = cache.get(chrome_version) if chrome_version else cache.get(cache.get("last", ""))
+        if cached_path and os.path.exists(cached_path):
+            _driver_path = cached_path
+            return _driver_path
+
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+            driver_path = ChromeDriverManager().install()
+        except Exception as e:
+            # Offline: fall back to the most recently resolved driver
+            fallback = cache.get(cache.get("last", ""))
+            if fallback and os.path.exists(fallback):
+                print(f"ChromeDriverManager failed ({e}). Using cached driver: {fallback}")
+                _driver_path = fallback
+                return _driver_path
+            raise
+
+        if chrome_version:
+            cache[chrome_version] = driver_path
+            cache["last"] = chrome_version
+            _save_driver_cache(cache)
+            print(f"Cached ChromeDriver for Chrome {chrome_version}: {driver_path}")
+
+        _driver_path = driver_path
+        return _driver_path
+
+
+def _pid_alive(pid):
+    """Check whether a process id is still running."""
+    if not pid:
+        return False
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name == 'nt':  # Windows
+        result = subprocess.run(["tasklist", "/FI", f"PID eq {pid}", "/NH"], capture_output=True, text=True)
+        return str(pid) in result.stdout
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_owner(profile_dir, driver_pid=None):
+    owner = {"owner_pid": os.getpid(), "driver_pid": driver_pid}
+    # Replaced atomically so the reaper never reads a half-written file
+    path = os.path.join(profile_dir, OWNER_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(owner, f)
+    os.replace(path + ".tmp", path)
+
+
+def _read_owner(profile_dir):
+    try:
+        with open(os.path.join(profile_dir, OWNER_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _kill_profile_processes(profile_dir, driver_pid=None):
+    """Kill only the processes started with this profile directory (and its chromedriver)."""
+    marker = f"--user-data-dir={profile_dir}"
+    if psutil is not None:
+        victims = []
+        for process in psutil.process_iter(["pid", "cmdline"]):
+            try:
+                if marker in " ".join(process.info["cmdline"] or []):
+                    victims.append(process)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        if driver_pid and psutil.pid_exists(driver_pid):
+            victims.append(psutil.Process(driver_pid))
+        for process in victims:
+            try:
+                for child in process.children(recursive=True):
+                    child.kill()
+                process.kill()
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return
+
+    if os.name == 'nt':  # Windows
+        if driver_pid and _pid_alive(driver_pid):
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(driver_pid)], capture_output=True)
+    else:  # Linux/Mac
+        subprocess.run(["pkill", "-f", "--", marker], capture_output=True)
+        if driver_pid and _pid_alive(driver_pid):
+            try:
+                os.kill(driver_pid, 9)
+            except OSError:
+                pass
+
+
+def _remove_profile(profile_dir):
+    shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+def launch_chrome(options):
+    """
+    Start Chrome with its own throwaway profile directory so the session can
+    be torn down (or reaped after a crash) without touching other browsers.
+
+    Args:
+        options: selenium ChromeOptions for the session
+
+    Returns:
+        WebDriver: The driver, with its profile directory stored as driver.profile_dir
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+
+    pending_dir = tempfile.mkdtemp(prefix=PENDING_PROFILE_PREFIX)
+    _write_owner(pending_dir)
+    profile_dir = os.path.join(
+        os.path.dirname(pending_dir),
+        PROFILE_PREFIX + os.path.basename(pending_dir)[len(PENDING_PROFILE_PREFIX):]
+    )
+    os.rename(pending_dir, profile_dir)
+    options.add_argument(f"--user-data-dir={profile_dir}")
+
+    try:
+        driver = webdriver.Chrome(service=Service(get_chromedriver_path()), options=options)
+    except Exception:
+        _kill_profile_processes(profile_dir)
+        _remove_profile(profile_dir)
+        raise
+
+    driver.profile_dir = profile_dir
+    try:
+        _write_owner(profile_dir, driver_pid=driver.service.process.pid)
+    except Exception:
+        pass
+    return driver
+
+
+def quit_browser(driver):
+    """
+    Close a browser started with launch_chrome() and everything it spawned,
+    then delete its profile directory.
+
+    Args:
+        driver: WebDriver returned by launch_chrome()
+    """
+    if driver is None:
+        return
+    profile_dir = getattr(driver, "profile_dir", None)
+    try:
+        driver.quit()
+    except Exception as e:
+        print(f"Note: driver.quit() failed: {e}")
+
+    if profile_dir:
+        # Chrome started with detach=True outlives quit() if chromedriver is gone
+        _kill_profile_processes(profile_dir, _read_owner(profile_dir).get("driver_pid"))
+        _remove_profile(profile_dir)
+
+
+def reap_orphaned_browsers():
+    """
+    Clean up browsers left behind by automation runs that crashed: any profile
+    directory whose owning Python process is gone has its processes killed and
+    is deleted. Browsers of running jobs and the user's own Chrome are untouched.
+
+    Returns:
+        int: Number of orphaned sessions cleaned up
+    """
+    reaped = 0
+    temp_dir = tempfile.gettempdir()
+    for name in os.listdir(temp_dir):
+        if not name.startswith(PROFILE_PREFIX):
+            continue
+        profile_dir = os.path.join(temp_dir, name)
+        owner = _read_owner(profile_dir)
+        if _pid_alive(owner.get("owner_pid")):
+            continue
+        _kill_profile_processes(profile_dir, owner.get("driver_pid"))
+        _remove_profile(profile_dir)
+        reaped += 1
+
+    if reaped:
+        print(f"Cleaned up {reaped} orphaned automation browser session(s).")
+    return reaped
@@ -0,0 +1,289 @@
+import io
+import sys
+import time
+import threading
+from collections import Counter
+from PIL import Image, ImageFilter, ImageOps
+import pytesseract
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+# tesserocr keeps the tesseract engine loaded in-process. Without it every OCR
+# call falls back to pytesseract, which starts a new tesseract process.
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+# Tesseract page segmentation modes tried on each image: single line, single word
+PAGE_SEG_MODES = [7, 8]
+
+DIGIT_WHITELIST = "0123456789"
+
+# Binarization thresholds tried on top of the automatic (mean) threshold
+THRESHOLDS = [110, 150]
+
+# Reading is accepted as soon as this many passes agree on it
+AGREEING_PASSES = 2
+
+# Passes per attempt without tesserocr, where every pass starts a tesseract process
+FALLBACK_PASSES = 2
+
+# The CAPTCHA widget: the closest element holding both the image and its input
+CAPTCHA_CONTAINER_XPATH = "//*[@id='captchaImg']/ancestor::*[.//*[@id='captchaInput']][1]"
+
+# Elements inside the CAPTCHA widget that may reload the image
+REFRESH_XPATH = CAPTCHA_CONTAINER_XPATH + (
+    "//*[contains(@id, 'refresh') or contains(@class, 'refresh') "
+    "or contains(@onclick, 'aptcha') or contains(@aria-label, 'efresh')]"
+)
+
+
+def preprocess_variants(image, scale=3):
+    """
+    Build cleaned-up versions of a CAPTCHA image for OCR.
+
+    Args:
+        image (PIL.Image): The raw CAPTCHA image
+        scale (int): Upscaling factor (tesseract reads small digits poorly)
+
+    Returns:
+        list: Preprocessed PIL images, from lightest to heaviest cleanup
+    """
+    gray = ImageOps.grayscale(image.convert("RGB"))
+    gray = ImageOps.autocontrast(gray)
+    gray = gray.resize((gray.width * scale, gray.height * scale), Image.LANCZOS)
+    denoised = gray.filter(ImageFilter.MedianFilter(3))
+
+    histogram = denoised.histogram()
+    mean_level = sum(level * count for level, count in enumerate(histogram)) // max(1, sum(histogram))
+
+    variants = [denoised]
+    for threshold in [mean_level] + THRESHOLDS:
+        binary = denoised.point(lambda p, t=threshold: 255 if p > t else 0)
+        # Dark digits on a light background is what tesseract expects
+        if binary.histogram()[0] > binary.width * binary.height // 2:
+            binary = ImageOps.invert(binary)
+        variants.append(binary.filter(ImageFilter.MedianFilter(3)))
+    return variants
+
+
+class OCREngine:
+    """
+    Digit OCR backed by a single, long-lived tesseract engine.
+
+    The engine (and its language data) is loaded once and reused for every
+    call. Calls are serialized with a lock since parallel TTS sessions share it.
+    """
+
+    def __init__(self, use_binding=True):
+        """
+        Initialize the OCR engine.
+
+        Args:
+            use_binding (bool): Use the in-process tesserocr engine when installed.
+                                If False (or not installed), pytesseract is used.
+        """
+        self.lock = threading.Lock()
+        self.api = None
+        if use_binding and tesserocr is not None:
+            self.api = tesserocr.PyTessBaseAPI()
+            self.api.SetVariable("tessedit_char_whitelist", DIGIT_WHITELIST)
+
+    @property
+    def backend(self):
+        return "tesserocr" if self.api else "pytesseract"
+
+    def read_digits(self, image, psm=7):
+        """
+        Read digits from an image.
+
+        Args:
+            image: PIL image, or PNG/JPEG bytes
+            psm (int): Tesseract page segmentation mode
+
+        Returns:
+            tuple: (digits, mean confidence)
+        """
+        if isinstance(image, (bytes, bytearray)):
+            image = Image.open(io.BytesIO(image))
+
+        if self.api:
+            with self.lock:
+                self.api.SetPageSegMode(psm)
+                self.api.SetImage(image)
+                text = self.api.GetUTF8Text()
+                conf = float(self.api.MeanTextConf())
+            return "".join(filter(str.isdigit, text)), conf
+
+        config = f"--psm {psm} -c tessedit_char_whitelist={DIGIT_WHITELIST}"
+        data = pytesseract.image_to_data(image, config=config, output_type=pytesseract.Output.DICT)
+        digits = ""
+        confidences = []
+        for text, conf in zip(data["text"], data["conf"]):
+            text_digits = "".join(filter(str.isdigit, text))
+            if text_digits:
+                digits += text_digits
+                confidences.append(float(conf))
+        mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+        return digits, mean_conf
+
+    def close(self):
+        """Release the tesseract engine."""
+        if self.api:
+            self.api.End()
+            self.api = None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_ocr_engine():
+    """Return the shared OCR engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = OCREngine()
+            print(f"OCR engine initialized ({_engine.backend})")
+        return _engine
+
+
+def read_captcha(image, expected_length=5):
+    """
+    Read a numeric CAPTCHA by running preprocessing and OCR passes until
+    AGREEING_PASSES of them agree on a result with the expected length, or
+    picking the result most passes agree on once they run out.
+
+    Args:
+        image (PIL.Image): The raw CAPTCHA image
+        expected_length (int): Number of digits in the CAPTCHA
+
+    Returns:
+        str: The best candidate, or None if no pass produced expected_length digits
+    """
+    engine = get_ocr_engine()
+    variants = preprocess_variants(image)
+    # Every image with the first mode, then again with the next one
+    passes = [(variant, psm) for psm in PAGE_SEG_MODES for variant in variants]
+    if engine.api is None:
+        passes = passes[:FALLBACK_PASSES]
+
+    votes = Counter()
+    best_conf = {}
+    for variant, psm in passes:
+        try:
+            digits, conf = engine.read_digits(variant, psm)
+        except Exception as e:
+            print(f"OCR pass failed: {e}")
+            continue
+        if len(digits) == expected_length:
+            votes[digits] += 1
+            best_conf[digits] = max(best_conf.get(digits, 0.0), conf)
+            if votes[digits] >= AGREEING_PASSES:
+                return digits
+
+    if not votes:
+        return None
+    return max(votes, key=lambda digits: (votes[digits], best_conf[digits]))
+
+
+def refresh_captcha(driver, captcha_img, timeout=5):
+    """
+    Ask the page for a new CAPTCHA image and wait for it to change.
+
+    Returns:
+        bool: True if the image changed
+    """
+    old_src = captcha_img.get_attribute("src")
+    clickables = [el for el in driver.find_elements(By.XPATH, REFRESH_XPATH) if el.is_displayed()]
+    target = clickables[0] if clickables else captcha_img
+    driver.execute_script("arguments[0].click();", target)
+
+    start_time = time.time()
+    while time.time() - start_time < timeout:
+        try:
+            if driver.find_element(By.ID, "captchaImg").get_attribute("src") != old_src:
+                time.sleep(0.3)  # Let the new image finish loading
+                return True
+        except Exception:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def solve_captcha(driver, attempts=3, expected_length=5, timeout=10):
+    """
+    Read the Speechma CAPTCHA straight from the page, refreshing it and
+    retrying when OCR doesn't produce a confident result.
+
+    Args:
+        driver: Selenium WebDriver on the Speechma page
+        attempts (int): Number of CAPTCHA images to try
+        expected_length (int): Number of digits in the CAPTCHA
+        timeout (int): Seconds to wait for the CAPTCHA image to appear
+
+    Returns:
+        str: The CAPTCHA digits, or None if every attempt failed
+
+    Raises:
+        TimeoutException: If the CAPTCHA image never appears
+    """
+    for attempt in range(1, attempts + 1):
+        captcha_img = WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.ID, "captchaImg"))
+        )
+
+        # Screenshot the element in memory instead of going through captcha.png
+        image = Image.open(io.BytesIO(captcha_img.screenshot_as_png))
+        captcha_text = read_captcha(image, expected_length)
+        if captcha_text:
+            return captcha_text
+
+        print(f"CAPTCHA attempt {attempt}/{attempts} not readable.")
+        if attempt < attempts and not refresh_captcha(driver, captcha_img):
+            print("CAPTCHA image did not refresh.")
+            break
+    return None
+
+
+def benchmark(image_path, runs=20):
+    """
+    Compare per-call OCR latency of the persistent engine against the
+    one-process-per-call pytesseract approach.
+
+    Args:
+        image_path (str): A saved CAPTCHA image
+        runs (int): Number of OCR calls per backend
+
+    Returns:
+        dict: Mean seconds per call for each backend
+    """
+    image = preprocess_variants(Image.open(image_path))[1]
+    results = {}
+
+    engines = [OCREngine(use_binding=False)]
+    if tesserocr is not None:
+        engines.append(OCREngine(use_binding=True))
+
+    for engine in engines:
+        engine.read_digits(image)  # Warm-up call
+        start_time = time.perf_counter()
+        for _ in range(runs):
+            engine.read_digits(image)
+        results[engine.backend] = (time.perf_counter() - start_time) / runs
+        engine.close()
+        print(f"{engine.backend}: {results[engine.backend] * 1000:.1f} ms per call")
+
+    if tesserocr is None:
+        print("tesserocr is not installed - install it to use the persistent engine.")
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python captcha_solver.py <captcha image> [runs]")
+        sys.exit(1)
+    benchmark(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 20)
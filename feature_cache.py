@@ -0,0 +1,278 @@
+"""
+Run SadTalker's inference.py with its audio branch cached.
+
+SadTalker turns the driving audio into mel spectrogram windows and then
+predicts motion coefficients from them on every render. This runner patches
+those two steps before running inference.py, so re-rendering the same
+voiceover skips them:
+
+- Mel windows (and the eye blink sequence) are cached per WAV hash and shared
+  by every render of that audio, whatever the avatar.
+- Predicted coefficients are cached per WAV hash, avatar reference
+  coefficients and pose style, so re-renders with another enhancer, size or
+  head angle skip audio-to-coefficient prediction entirely.
+- Avatar preprocessing (face crop and 3DMM extraction) is cached per image
+  hash, preprocess mode and size, so every render of a known avatar skips it.
+
+Run it from the SadTalker directory with inference.py's arguments:
+    python feature_cache.py --driven_audio voice.wav --source_image avatar.jpg ...
+"""
+import os
+import sys
+import time
+import runpy
+import pickle
+import shutil
+import hashlib
+import tempfile
+
+from artifact_store import file_digest
+
+
+FEATURE_CACHE_DIR = os.environ.get(
+    "FEATURE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_cache")
+)
+# Least recently used entries are removed once the cache grows past this
+FEATURE_CACHE_MAX_MB = float(os.environ.get("FEATURE_CACHE_MAX_MB", 2048))
+
+
+def _write_atomic(path, write):
+    """
+    Write a cache file through a unique temporary file in the same directory
+    and move it into place, so concurrent renders never see partial files.
+
+    Args:
+        path (str): Final path of the file
+        write (callable): Called with the open binary file to write to
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _digest(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    On-disk cache of per-audio features. Entries are directories named by
+    key; their modification time is the last use, for LRU trimming.
+    """
+
+    def __init__(self, root=FEATURE_CACHE_DIR, max_mb=FEATURE_CACHE_MAX_MB):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(root, exist_ok=True)
+
+    def entry(self, kind, key):
+        return os.path.join(self.root, kind, key[:2], key)
+
+    def lookup(self, kind, key, name):
+        """Return the path of a cached file and mark it used, or None."""
+        path = os.path.join(self.entry(kind, key), name)
+        if not os.path.exists(path):
+            return None
+        now = time.time()
+        os.utime(path, (now, now))
+        return path
+
+    def store(self, kind, key, name, source_path=None):
+        """
+        Return the path to write a cache file to, copying source_path there if given.
+        Writers should go through _write_atomic().
+        """
+        directory = self.entry(kind, key)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        if source_path:
+            def copy(f):
+                with open(source_path, "rb") as source:
+                    shutil.copyfileobj(source, f)
+            _write_atomic(path, copy)
+        return path
+
+    def trim(self):
+        """Delete least recently used files until the cache fits its size limit."""
+        files = []
+        for root, dirs, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".tmp"):
+                    # Being written by another render
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                os.removedirs(os.path.dirname(path))
+            except OSError:
+                pass
+            total -= size
+
+
+def install(cache=None):
+    """
+    Patch SadTalker's get_data and Audio2Coeff to use the cache. Must run
+    before inference.py imports them.
+
+    Args:
+        cache (FeatureCache): Cache to use. Defaults to FEATURE_CACHE_DIR.
+    """
+    import numpy as np
+    import torch
+    import scipy.io as scio
+    import src.generate_batch as generate_batch
+    import src.test_audio2coeff as test_audio2coeff
+    import src.utils.preprocess as preprocess
+
+    cache = cache or FeatureCache()
+    original_get_data = generate_batch.get_data
+    original_audio2coeff = test_audio2coeff.Audio2Coeff
+    original_crop_and_extract = preprocess.CropAndExtract
+
+    def coeff_digest(coeff_path, columns):
+        if coeff_path is None:
+            return ""
+        return _digest(np.ascontiguousarray(scio.loadmat(coeff_path)["coeff_3dmm"][:, :columns]).tobytes())
+
+    def get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, *args, **kwargs):
+        audio_key = file_digest(audio_path)
+        mels_path = cache.lookup("mels", audio_key, "mels.npz")
+        ref_coeff = scio.loadmat(first_coeff_path)["coeff_3dmm"][:1, :70]
+        # Blinks copied from a reference video, idle mode and disabled blinks aren't cached
+        cacheable = (ref_eyeblink_coeff_path is None and not args
+                     and not kwargs.get("idlemode") and kwargs.get("use_blink", True))
+
+        if mels_path and cacheable:
+            print(f"Using cached audio features for {os.path.basename(audio_path)}")
+            features = np.load(mels_path)
+            num_frames = int(features["num_frames"])
+            batch = {
+                "indiv_mels": torch.FloatTensor(features["indiv_mels"]).unsqueeze(1).unsqueeze(0).to(device),
+                "ref": torch.FloatTensor(np.repeat(ref_coeff, num_frames, axis=0)).unsqueeze(0).to(device),
+                "num_frames": num_frames,
+                "ratio_gt": torch.FloatTensor(features["ratio"]).unsqueeze(0).to(device),
+                "audio_name": os.path.splitext(os.path.basename(audio_path))[0],
+                "pic_name": os.path.splitext(os.path.basename(first_coeff_path))[0],
+            }
+        else:
+            batch = original_get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, *args, **kwargs)
+            if cacheable:
+                _write_atomic(cache.store("mels", audio_key, "mels.npz"), lambda f: np.savez(
+                    f,
+                    indiv_mels=batch["indiv_mels"][0, :, 0].cpu().numpy(),
+                    ratio=batch["ratio_gt"][0].cpu().numpy(),
+                    num_frames=batch["num_frames"],
+                ))
+
+        # Everything the predicted coefficients depend on besides the pose style
+        batch["feature_key"] = _digest(
+            audio_key,
+            np.ascontiguousarray(ref_coeff).tobytes(),
+            coeff_digest(ref_eyeblink_coeff_path, 64),
+            # The blink sequence is random on a cache miss
+            batch["ratio_gt"].cpu().numpy().tobytes(),
+        )
+        return batch
+
+    class Audio2Coeff:
+        """Audio2Coeff that loads its models only when the coefficients aren't cached."""
+
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            self.kwargs = kwargs
+            self.model = None
+
+        def generate(self, batch, coeff_save_dir, pose_style, ref_pose_coeff_path=None):
+            key = _digest(batch["feature_key"], pose_style, coeff_digest(ref_pose_coeff_path, 70))
+            output_path = os.path.join(coeff_save_dir, f"{batch['pic_name']}##{batch['audio_name']}.mat")
+            cached = cache.lookup("coeffs", key, "coeffs.mat")
+            if cached:
+                print("Using cached audio2coeff output")
+                shutil.copyfile(cached, output_path)
+                return output_path
+
+            if self.model is None:
+                self.model = original_audio2coeff(*self.args, **self.kwargs)
+            output_path = self.model.generate(batch, coeff_save_dir, pose_style, ref_pose_coeff_path)
+            cache.store("coeffs", key, "coeffs.mat", output_path)
+            cache.trim()
+            return output_path
+
+    class CropAndExtract:
+        """CropAndExtract that reuses cached results for source images and loads its models only on a miss."""
+
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            self.kwargs = kwargs
+            self.model = None
+
+        def generate(self, input_path, save_dir, crop_or_resize="crop", source_image_flag=False, pic_size=256):
+            if self.model is None and not source_image_flag:
+                self.model = original_crop_and_extract(*self.args, **self.kwargs)
+            if not source_image_flag:
+                # Reference videos aren't cached
+                return self.model.generate(input_path, save_dir, crop_or_resize, source_image_flag, pic_size)
+
+            key = _digest(file_digest(input_path), crop_or_resize, pic_size)
+            pic_name = os.path.splitext(os.path.basename(input_path))[0]
+            coeff_path = os.path.join(save_dir, f"{pic_name}.mat")
+            png_path = os.path.join(save_dir, f"{pic_name}.png")
+            cached = [cache.lookup("avatars", key, name) for name in ("crop_info.pkl", "coeffs.mat", "crop.png")]
+            if all(cached):
+                print(f"Using cached preprocessing for {os.path.basename(input_path)}")
+                shutil.copyfile(cached[1], coeff_path)
+                shutil.copyfile(cached[2], png_path)
+                with open(cached[0], "rb") as f:
+                    return coeff_path, png_path, pickle.load(f)
+
+            if self.model is None:
+                self.model = original_crop_and_extract(*self.args, **self.kwargs)
+            coeff_path, png_path, crop_info = self.model.generate(
+                input_path, save_dir, crop_or_resize, source_image_flag, pic_size
+            )
+            if coeff_path is not None:
+                cache.store("avatars", key, "coeffs.mat", coeff_path)
+                cache.store("avatars", key, "crop.png", png_path)
+                _write_atomic(cache.store("avatars", key, "crop_info.pkl"), lambda f: pickle.dump(crop_info, f))
+            return coeff_path, png_path, crop_info
+
+    generate_batch.get_data = get_data
+    test_audio2coeff.Audio2Coeff = Audio2Coeff
+    preprocess.CropAndExtract = CropAndExtract
+
+
+def main():
+    # SadTalker's src package and inference.py live in the working directory
+    sys.path.insert(0, os.getcwd())
+    try:
+        install()
+    except Exception as e:
+        # Renders still work, just without the cache
+        print(f"Audio feature cache unavailable: {e}")
+    sys.argv[0] = "inference.py"
+    runpy.run_path("inference.py", run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import time
+
+
+# SadTalker phases in the order they run
+PHASES = ["preprocess", "audio2coeff", "face_render", "enhancer", "mux"]
+
+# tqdm descriptions (and log lines) that belong to each phase
+PHASE_PATTERNS = [
+    (re.compile(r"landmark|3DMM|preprocess|crop", re.I), "preprocess"),
+    (re.compile(r"mel|audio2exp|audio2pose|audio2coeff", re.I), "audio2coeff"),
+    (re.compile(r"Face Renderer", re.I), "face_render"),
+    (re.compile(r"Face Enhancer|gfpgan|RestoreFormer", re.I), "enhancer"),
+    (re.compile(r"seamlessClone|paste|The generated video is named", re.I), "mux"),
+]
+
+# tqdm progress line, e.g. "Face Renderer:: 40%|####      | 126/315 [00:31<00:47, 4.0it/s]"
+TQDM_REGEX = re.compile(r"(?P<desc>[^|\r\n]*?)\s*:*\s*(?P<percent>\d+)%\|.*?\|\s*(?P<step>\d+)/(?P<total>\d+)")
+
+# SadTalker renders at 25 fps; historical rates are stored in seconds per frame
+FPS = 25
+
+STATS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inference_stats.json")
+
+# Weight of the newest run in the moving average of per-frame rates
+STATS_SMOOTHING = 0.3
+
+
+def iter_output_lines(stream):
+    """
+    Yield lines from a subprocess text stream, splitting on carriage returns
+    as well as newlines so tqdm's in-place progress updates arrive as they happen.
+    """
+    buffer = ""
+    while True:
+        char = stream.read(1)
+        if char == "":
+            break
+        if char in "\r\n":
+            if buffer:
+                yield buffer
+            buffer = ""
+        else:
+            buffer += char
+    if buffer:
+        yield buffer
+
+
+def phase_for(text):
+    """Return the phase a tqdm description or log line belongs to, or None."""
+    for pattern, phase in PHASE_PATTERNS:
+        if pattern.search(text):
+            return phase
+    return None
+
+
+class InferenceProgress:
+    """
+    Tracks SadTalker progress from its console output and estimates the time
+    left from per-frame rates of previous runs.
+    """
+
+    def __init__(self, audio_duration=None, callback=None, stats_file=STATS_FILE, avatar_count=1):
+        """
+        Initialize the progress tracker.
+
+        Args:
+            audio_duration (float): Length of the driving audio in seconds, used for ETA
+            callback (callable): Called with a progress event dict on every update
+            stats_file (str): JSON file holding historical seconds-per-frame per phase
+            avatar_count (int): Number of avatars rendered in the run. Multi-avatar
+                runs repeat the phases per avatar, so they don't update the stats.
+        """
+        self.frames = audio_duration * FPS if audio_duration else None
+        self.callback = callback
+        self.stats_file = stats_file
+        self.avatar_count = avatar_count
+        self.history = self._load_stats()
+
+        self.start_time = time.time()
+        self.phase = None
+        self.phase_start = None
+        self.bar_start = None
+        self.phase_times = {}
+        self.step = 0
+        self.total = 0
+        self.last_percent = -1
+
+    def _load_stats(self):
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_stats(self):
+        try:
+            with open(self.stats_file, "w", encoding="utf-8") as f:
+                json.dump(self.history, f, indent=2)
+        except OSError as e:
+            print(f"Could not save inference stats: {e}")
+
+    def _enter_phase(self, phase):
+        now = time.time()
+        if self.phase:
+            self.phase_times[self.phase] = self.phase_times.get(self.phase, 0) + now - self.phase_start
+        self.phase = phase
+        self.phase_start = now
+        self.bar_start = now
+        self.step = 0
+        self.total = 0
+        self.last_percent = -1
+
+    def feed(self, line):
+        """
+        Parse one line of inference output.
+
+        Args:
+            line (str): A line (or tqdm update) from the inference process
+
+        Returns:
+            dict: A progress event if the line moved progress forward, otherwise None
+        """
+        match = TQDM_REGEX.search(line)
+        phase = phase_for(match.group("desc") if match else line)
+        if phase is None or (self.phase and PHASES.index(phase) < PHASES.index(self.phase)):
+            # Unknown line, or a late line from an earlier phase
+            phase = self.phase
+        if phase is None:
+            return None
+
+        changed = phase != self.phase
+        if changed:
+            self._enter_phase(phase)
+
+        if match:
+            self.step = int(match.group("step"))
+            self.total = int(match.group("total"))
+            percent = int(match.group("percent"))
+            if percent < self.last_percent:
+                # A new progress bar within the same phase (e.g. mel -> audio2exp)
+                self.last_percent = -1
+                self.bar_start = time.time()
+        else:
+            percent = self.last_percent
+
+        # Report phase changes and every 5% within a phase
+        if not changed and percent - self.last_percent < 5 and percent != 100:
+            return None
+        if percent == self.last_percent and not changed:
+            return None
+        self.last_percent = percent
+
+        event = self.event()
+        if self.callback:
+            self.callback(event)
+        return event
+
+    def event(self):
+        """Build a progress event for the current state."""
+        phase_index = PHASES.index(self.phase) if self.phase else 0
+        fraction = self.step / self.total if self.total else 0.0
+        return {
+            "phase": self.phase,
+            "phase_index": phase_index,
+            "phase_count": len(PHASES),
+            "step": self.step,
+            "total": self.total,
+            "phase_progress": round(fraction, 3),
+            "overall_progress": round((phase_index + fraction) / len(PHASES), 3),
+            "elapsed": round(time.time() - self.start_time, 1),
+            "eta": self.eta(),
+        }
+
+    def eta(self):
+        """
+        Estimate the seconds left in the run.
+
+        The current phase uses its live rate once it has made progress; later
+        phases use historical per-frame rates scaled by the number of frames.
+
+        Returns:
+            float: Estimated seconds remaining, or None if there isn't enough data
+        """
+        if not self.phase:
+            return None
+
+        remaining = 0.0
+        elapsed_in_phase = time.time() - self.phase_start
+        if self.step and self.total:
+            remaining += (time.time() - self.bar_start) / self.step * (self.total - self.step)
+        elif self.frames and self.phase in self.history:
+            remaining += max(0.0, self.history[self.phase] * self.frames - elapsed_in_phase)
+        else:
+            return None
+
+        for phase in PHASES[PHASES.index(self.phase) + 1:]:
+            if phase in self.history and self.frames:
+                remaining += self.history[phase] * self.frames
+        return round(remaining, 1)
+
+    def finish(self, success):
+        """
+        Close the last phase and, for successful single-avatar runs, fold this
+        run's per-frame rates into the historical stats.
+
+        Args:
+            success (bool): Whether inference completed successfully
+        """
+        if self.phase:
+            self._enter_phase(None)
+        if not success or not self.frames or self.avatar_count > 1:
+            return
+
+        for phase, seconds in self.phase_times.items():
+            rate = seconds / self.frames
+            previous = self.history.get(phase)
+            self.history[phase] = rate if previous is None else (
+                STATS_SMOOTHING * rate + (1 - STATS_SMOOTHING) * previous
+            )
+        self._save_stats()
@@ -0,0 +1,193 @@
+"""
+Render one voiceover on several avatars in a single SadTalker run.
+
+The models are loaded once, the audio features and motion coefficients are
+computed once for the first avatar and re-targeted to the others, and then
+each face is rendered. Avatar preprocessing and audio features come from
+feature_cache.py, so known avatars and voiceovers skip those steps too.
+
+Run it from the SadTalker directory:
+    python multi_avatar.py --driven_audio voice.wav --source_images a.jpg b.jpg c.jpg --result_dir results
+
+Each video is reported on its own "The generated video is named:" line, in
+the order of --source_images. Avatars without a detectable face are skipped;
+the run fails only if none could be rendered.
+"""
+import os
+import sys
+import shutil
+from time import strftime
+from argparse import ArgumentParser
+
+import feature_cache
+
+
+# Re-target the first avatar's motion coefficients to the other avatars instead
+# of predicting them again. Every avatar then moves identically, which also
+# keeps A/B tests between avatars fair.
+SHARE_MOTION = True
+
+
+def retarget_coeffs(coeff_path, source_coeff_path, target_coeff_path, output_path, keep_pose=False):
+    """
+    Move predicted coefficients from one avatar to another.
+
+    SadTalker predicts expressions and head poses as offsets added to the
+    avatar's own reference coefficients, so swapping the reference keeps the
+    motion and gives it the target's neutral face and starting pose.
+
+    Args:
+        coeff_path (str): audio2coeff output for the source avatar
+        source_coeff_path (str): 3DMM coefficients of the source avatar
+        target_coeff_path (str): 3DMM coefficients of the target avatar
+        output_path (str): Where to write the target's coefficients
+        keep_pose (bool): Keep the pose as-is (it came from a reference video)
+
+    Returns:
+        str: output_path
+    """
+    import scipy.io as scio
+
+    coeffs = scio.loadmat(coeff_path)["coeff_3dmm"]
+    source_ref = scio.loadmat(source_coeff_path)["coeff_3dmm"][0, :70]
+    target_ref = scio.loadmat(target_coeff_path)["coeff_3dmm"][0, :70]
+
+    columns = 64 if keep_pose else 70
+    retargeted = coeffs.copy()
+    retargeted[:, :columns] += target_ref[:columns] - source_ref[:columns]
+    scio.savemat(output_path, {"coeff_3dmm": retargeted})
+    return output_path
+
+
+def parse_args(argv=None):
+    # The options of SadTalker's inference.py, with several source images
+    parser = ArgumentParser(description="Render one audio on several avatars.")
+    parser.add_argument("--driven_audio", required=True, help="path to driven audio")
+    parser.add_argument("--source_images", nargs="+", required=True, help="paths to the avatar images")
+    parser.add_argument("--ref_eyeblink", default=None, help="path to reference video providing eye blinking")
+    parser.add_argument("--ref_pose", default=None, help="path to reference video providing pose")
+    parser.add_argument("--checkpoint_dir", default="./checkpoints")
+    parser.add_argument("--result_dir", default="./results")
+    parser.add_argument("--pose_style", type=int, default=0)
+    parser.add_argument("--batch_size", type=int, default=2)
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--expression_scale", type=float, default=1.)
+    parser.add_argument("--input_yaw", nargs="+", type=int, default=None)
+    parser.add_argument("--input_pitch", nargs="+", type=int, default=None)
+    parser.add_argument("--input_roll", nargs="+", type=int, default=None)
+    parser.add_argument("--enhancer", type=str, default=None)
+    parser.add_argument("--background_enhancer", type=str, default=None)
+    parser.add_argument("--cpu", action="store_true")
+    parser.add_argument("--still", action="store_true")
+    parser.add_argument("--preprocess", default="crop", choices=["crop", "extcrop", "resize", "full", "extfull"])
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--old_version", action="store_true")
+    parser.add_argument("--separate_motion", action="store_true",
+                        help="predict motion for every avatar instead of sharing the first one's")
+    parser.add_argument("--no_feature_cache", action="store_true",
+                        help="don't read or write the avatar and audio feature cache")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # SadTalker's src package lives in the working directory
+    sys.path.insert(0, os.getcwd())
+    if not args.no_feature_cache:
+        try:
+            feature_cache.install()
+        except Exception as e:
+            print(f"Audio feature cache unavailable: {e}")
+
+    import torch
+    from src.utils.preprocess import CropAndExtract
+    from src.test_audio2coeff import Audio2Coeff
+    from src.facerender.animate import AnimateFromCoeff
+    from src.generate_batch import get_data
+    from src.generate_facerender_batch import get_facerender_data
+    from src.utils.init_path import init_path
+
+    device = "cuda" if torch.cuda.is_available() and not args.cpu else "cpu"
+    audio_path = args.driven_audio
+    run_dir = os.path.join(args.result_dir, strftime("%Y_%m_%d_%H.%M.%S"))
+    os.makedirs(run_dir, exist_ok=True)
+
+    sadtalker_paths = init_path(args.checkpoint_dir, os.path.join(os.getcwd(), "src/config"),
+                                args.size, args.old_version, args.preprocess)
+
+    # Loaded once for every avatar
+    preprocess_model = CropAndExtract(sadtalker_paths, device)
+    audio_to_coeff = Audio2Coeff(sadtalker_paths, device)
+    animate_from_coeff = AnimateFromCoeff(sadtalker_paths, device)
+
+    ref_eyeblink_coeff_path = None
+    if args.ref_eyeblink is not None:
+        frame_dir = os.path.join(run_dir, "ref_eyeblink")
+        os.makedirs(frame_dir, exist_ok=True)
+        print("3DMM Extraction for the reference video providing eye blinking")
+        ref_eyeblink_coeff_path, _, _ = preprocess_model.generate(args.ref_eyeblink, frame_dir, args.preprocess,
+                                                                  source_image_flag=False)
+    ref_pose_coeff_path = None
+    if args.ref_pose is not None:
+        if args.ref_pose == args.ref_eyeblink:
+            ref_pose_coeff_path = ref_eyeblink_coeff_path
+        else:
+            frame_dir = os.path.join(run_dir, "ref_pose")
+            os.makedirs(frame_dir, exist_ok=True)
+            print("3DMM Extraction for the reference video providing pose")
+            ref_pose_coeff_path, _, _ = preprocess_model.generate(args.ref_pose, frame_dir, args.preprocess,
+                                                                  source_image_flag=False)
+
+    shared = None
+    failed = 0
+    for index, pic_path in enumerate(args.source_images):
+        pic_name = os.path.splitext(os.path.basename(pic_path))[0]
+        save_dir = os.path.join(run_dir, f"{index + 1}_{pic_name}")
+        first_frame_dir = os.path.join(save_dir, "first_frame_dir")
+        os.makedirs(first_frame_dir, exist_ok=True)
+
+        print(f"3DMM Extraction for source image {index + 1}/{len(args.source_images)}: {pic_path}")
+        first_coeff_path, crop_pic_path, crop_info = preprocess_model.generate(
+            pic_path, first_frame_dir, args.preprocess, source_image_flag=True, pic_size=args.size
+        )
+        if first_coeff_path is None:
+            print(f"Can't get the coeffs of {pic_path}")
+            failed += 1
+            continue
+
+        if shared and not args.separate_motion and SHARE_MOTION:
+            coeff_path = retarget_coeffs(
+                shared["coeff_path"], shared["first_coeff_path"], first_coeff_path,
+                os.path.join(save_dir, f"{pic_name}##{os.path.splitext(os.path.basename(audio_path))[0]}.mat"),
+                keep_pose=ref_pose_coeff_path is not None
+            )
+        else:
+            batch = get_data(first_coeff_path, audio_path, device, ref_eyeblink_coeff_path, still=args.still)
+            coeff_path = audio_to_coeff.generate(batch, save_dir, args.pose_style, ref_pose_coeff_path)
+            if shared is None:
+                shared = {"coeff_path": coeff_path, "first_coeff_path": first_coeff_path}
+
+        data = get_facerender_data(coeff_path, crop_pic_path, first_coeff_path, audio_path,
+                                   args.batch_size, args.input_yaw, args.input_pitch, args.input_roll,
+                                   expression_scale=args.expression_scale, still_mode=args.still,
+                                   preprocess=args.preprocess, size=args.size)
+        result = animate_from_coeff.generate(data, save_dir, pic_path, crop_info,
+                                             enhancer=args.enhancer, background_enhancer=args.background_enhancer,
+                                             preprocess=args.preprocess, img_size=args.size)
+
+        video_path = save_dir + ".mp4"
+        shutil.move(result, video_path)
+        print("The generated video is named:", video_path)
+
+    if not args.verbose:
+        # Shared coefficients live in the first avatar's directory, so clean up at the end
+        for name in os.listdir(run_dir):
+            path = os.path.join(run_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+    return 1 if failed == len(args.source_images) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+import os
+import sys
+import signal
+import subprocess
+import threading
+import time
+
+# psutil lets the watchdog measure memory of the whole process tree. Without it
+# the wall-clock limit and cancellation still work, but the RSS limit is skipped.
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+# Seconds a process group gets to exit after SIGTERM before it is killed
+KILL_GRACE = 10
+
+# Seconds between resource checks
+POLL_INTERVAL = 1.0
+
+
+def process_group_kwargs():
+    """
+    Popen keyword arguments that start the child in its own process group,
+    so it can be killed together with everything it spawns.
+    """
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def process_tree_rss(pid):
+    """
+    Return the combined resident memory of a process and its children in bytes,
+    or None if it can't be measured.
+    """
+    if psutil is None:
+        return None
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent] + parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return None
+
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total
+
+
+def kill_process_tree(process, grace=KILL_GRACE):
+    """
+    Terminate a process started with process_group_kwargs() and everything it spawned.
+    The group is asked to exit first and killed if it is still running after grace seconds.
+
+    Args:
+        process (subprocess.Popen): The process to stop
+        grace (float): Seconds to wait between terminate and kill
+    """
+    if process.poll() is not None:
+        return
+
+    if sys.platform == "win32":
+        children = []
+        if psutil is not None:
+            try:
+                children = psutil.Process(process.pid).children(recursive=True)
+            except psutil.NoSuchProcess:
+                pass
+        process.terminate()
+        try:
+            process.wait(grace)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        for child in children:
+            try:
+                child.kill()
+            except psutil.NoSuchProcess:
+                pass
+        return
+
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        process.wait(grace)
+    except subprocess.TimeoutExpired:
+        pass
+    # Children may outlive the group leader, so the group is killed either way
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+class ProcessWatchdog:
+    """
+    Enforces a wall-clock limit, a memory limit and cancellation on a running
+    subprocess from a background thread. When a limit is hit the whole process
+    group is killed, which also closes its output pipe so readers stop.
+    """
+
+    def __init__(self, process, timeout=None, max_rss_mb=None, cancel_event=None):
+        """
+        Initialize the watchdog.
+
+        Args:
+            process (subprocess.Popen): Process started with process_group_kwargs()
+            timeout (float): Wall-clock limit in seconds, or None for no limit
+            max_rss_mb (float): Memory limit for the process tree in MB, or None for no limit
+            cancel_event (threading.Event): Kills the process as soon as it is set
+        """
+        self.process = process
+        self.timeout = timeout
+        self.max_rss = max_rss_mb * 1024 * 1024 if max_rss_mb else None
+        self.cancel_event = cancel_event or threading.Event()
+        self.reason = None
+        self.peak_rss = 0
+        self.thread = threading.Thread(target=self._watch, daemon=True)
+
+        if self.max_rss and psutil is None:
+            print("psutil is not installed - the memory limit will not be enforced.")
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _watch(self):
+        start_time = time.time()
+        while self.process.poll() is None:
+            if self.cancel_event.is_set():
+                self.reason = "cancelled"
+            elif self.timeout and time.time() - start_time > self.timeout:
+                self.reason = f"timed out after {int(self.timeout)}s"
+            elif self.max_rss:
+                rss = process_tree_rss(self.process.pid) or 0
+                self.peak_rss = max(self.peak_rss, rss)
+                if rss > self.max_rss:
+                    self.reason = f"exceeded the memory limit ({rss // (1024 * 1024)} MB)"
+
+            if self.reason:
+                print(f"Stopping process {self.process.pid}: {self.reason}")
+                kill_process_tree(self.process)
+                return
+
+            # Returns early when cancelled
+            self.cancel_event.wait(POLL_INTERVAL)
+
+    def stop(self):
+        """Wait for the watchdog thread after the process has exited."""
+        self.thread.join(KILL_GRACE + POLL_INTERVAL * 2)
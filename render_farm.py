@@ -0,0 +1,786 @@
+"""
+Distributed SadTalker rendering.
+
+A coordinator keeps a queue of render jobs (audio, avatar and an inference
+profile) in SQLite and serves it over HTTP. Workers on other machines, each
+running from a SadTalker checkout, pull jobs, render them, send heartbeats
+while they work and upload the finished MP4. A job whose worker stops sending
+heartbeats, or whose render fails, goes back on the queue for another worker
+until it runs out of attempts.
+
+Usage:
+    python render_farm.py coordinator [--host 127.0.0.1] [--port 8765] [--dir render_farm]
+    python render_farm.py worker <coordinator url> [--name <worker name>]
+
+Set RENDER_FARM_TOKEN to the same secret on the coordinator, the workers and
+the app to require it on every request. The coordinator only listens on
+loopback unless a token is set. Point the app at the coordinator with
+RENDER_FARM_URL.
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import base64
+import shutil
+import socket
+import sqlite3
+import argparse
+import tempfile
+import ipaddress
+import threading
+import subprocess
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from inference_progress import InferenceProgress, iter_output_lines, TQDM_REGEX
+from process_control import ProcessWatchdog, process_group_kwargs, kill_process_tree
+from script_timing import get_wav_duration
+
+
+# SadTalker arguments used when a job doesn't override them
+INFERENCE_PROFILE = {
+    "preprocess": "full",
+    "enhancer": "gfpgan",
+    "pose_style": 1,
+    "input_yaw": 0,
+    "input_pitch": 0,
+    "input_roll": 0,
+}
+
+# Run SadTalker through feature_cache.py, which reuses audio features across renders
+USE_FEATURE_CACHE = True
+FEATURE_CACHE_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feature_cache.py")
+# Renders several avatars from one audio in a single SadTalker run
+MULTI_AVATAR_RUNNER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "multi_avatar.py")
+
+DEFAULT_PORT = 8765
+FARM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_farm")
+
+# Shared secret sent as X-Render-Token, if set
+RENDER_FARM_TOKEN = os.environ.get("RENDER_FARM_TOKEN")
+
+# Workers send a heartbeat this often (seconds) while rendering
+HEARTBEAT_INTERVAL = 10
+# A running job without a heartbeat for this long is handed to another worker
+HEARTBEAT_TIMEOUT = 60
+# Renders a job gets (first try included) before it is marked failed
+MAX_ATTEMPTS = 3
+# Seconds an idle worker waits before asking for work again
+WORKER_POLL_INTERVAL = 5
+# Limits for one render on a worker
+WORKER_TIMEOUT = 45 * 60
+WORKER_MAX_RSS_MB = 12 * 1024
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    audio_name TEXT NOT NULL,
+    avatar_name TEXT NOT NULL,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    heartbeat REAL,
+    progress TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+VIDEO_PATH_REGEX = re.compile(r"The generated video is named:?\s+(.*\.mp4)")
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def inference_command(audio_path, avatar_path, result_dir, profile=None):
+    """
+    Build the SadTalker inference.py command for a render.
+
+    Args:
+        audio_path (str): Driving audio (WAV)
+        avatar_path (str): Source image
+        result_dir (str): Directory SadTalker writes the video to
+        profile (dict): Overrides for INFERENCE_PROFILE
+
+    Returns:
+        list: The command as an argument list
+    """
+    script = FEATURE_CACHE_RUNNER if USE_FEATURE_CACHE and os.path.exists(FEATURE_CACHE_RUNNER) else "inference.py"
+    cmd = [
+        sys.executable, script,
+        "--driven_audio", audio_path,
+        "--source_image", avatar_path,
+        "--result_dir", result_dir,
+    ]
+    return cmd + _profile_args(profile)
+
+
+def multi_avatar_command(audio_path, avatar_paths, result_dir, profile=None):
+    """
+    Build the multi_avatar.py command that renders one audio on several avatars.
+
+    Args:
+        audio_path (str): Driving audio (WAV)
+        avatar_paths (list): Source images, one video each
+        result_dir (str): Directory the videos are written to
+        profile (dict): Overrides for INFERENCE_PROFILE
+
+    Returns:
+        list: The command as an argument list
+    """
+    cmd = [
+        sys.executable, MULTI_AVATAR_RUNNER,
+        "--driven_audio", audio_path,
+        "--source_images", *avatar_paths,
+        "--result_dir", result_dir,
+    ]
+    if not USE_FEATURE_CACHE:
+        cmd.append("--no_feature_cache")
+    return cmd + _profile_args(profile)
+
+
+def _profile_args(profile):
+    profile = {**INFERENCE_PROFILE, **(profile or {})}
+    args = []
+    for key, value in profile.items():
+        if value is None or value is False:
+            continue
+        args.append(f"--{key}")
+        if value is not True:
+            args.append(str(value))
+    return args
+
+
+def find_video(result_dir, output=""):
+    """Return the video SadTalker reported in its output, or the newest MP4 in result_dir."""
+    match = VIDEO_PATH_REGEX.search(output)
+    if match and os.path.exists(match.group(1).strip()):
+        return os.path.abspath(match.group(1).strip())
+    videos = [
+        os.path.join(root, name)
+        for root, dirs, files in os.walk(result_dir)
+        for name in files if name.endswith(".mp4")
+    ]
+    return max(videos, key=os.path.getmtime) if videos else None
+
+
+class RenderQueue:
+    """
+    SQLite-backed render queue. Job inputs and results are kept under
+    <root>/jobs/<job id>/.
+    """
+
+    def __init__(self, root=FARM_DIR, heartbeat_timeout=HEARTBEAT_TIMEOUT, max_attempts=MAX_ATTEMPTS):
+        """
+        Initialize the queue.
+
+        Args:
+            root (str): Directory for the database and job files
+            heartbeat_timeout (float): Seconds without a heartbeat before a job is re-dispatched
+            max_attempts (int): Renders a job gets before it is marked failed
+        """
+        self.root = root
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.join(root, "jobs"), exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(root, "queue.db"), timeout=30, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.db.commit()
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, "jobs", job_id)
+
+    def result_path(self, job_id):
+        return os.path.join(self.job_dir(job_id), "result.mp4")
+
+    def _row(self, job_id):
+        row = self.db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["profile"] = json.loads(job["profile"])
+        job["progress"] = json.loads(job["progress"]) if job["progress"] else None
+        return job
+
+    def submit(self, audio_name, audio_data, avatar_name, avatar_data, profile=None):
+        """
+        Queue a render.
+
+        Args:
+            audio_name (str): File name of the driving audio
+            audio_data (bytes): The audio
+            avatar_name (str): File name of the avatar image
+            avatar_data (bytes): The image
+            profile (dict): Overrides for INFERENCE_PROFILE
+
+        Returns:
+            str: The job id
+        """
+        job_id = uuid.uuid4().hex
+        audio_name = os.path.basename(audio_name)
+        avatar_name = os.path.basename(avatar_name)
+        job_dir = self.job_dir(job_id)
+        os.makedirs(job_dir)
+        with open(os.path.join(job_dir, audio_name), "wb") as f:
+            f.write(audio_data)
+        with open(os.path.join(job_dir, avatar_name), "wb") as f:
+            f.write(avatar_data)
+
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT INTO jobs (id, status, profile, audio_name, avatar_name, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(profile or {}), audio_name, avatar_name, now, now)
+            )
+            self.db.commit()
+        log(f"Queued job {job_id} ({audio_name} on {avatar_name})")
+        return job_id
+
+    def get(self, job_id):
+        """Return a job as a dict, or None."""
+        with self.lock:
+            return self._row(job_id)
+
+    def claim(self, worker):
+        """
+        Hand the oldest queued job to a worker.
+
+        Returns:
+            dict: The job, or None if the queue is empty
+        """
+        self.requeue_stale()
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, heartbeat = ?, "
+                "progress = NULL, updated = ? WHERE id = ?",
+                (RUNNING, worker, now, now, row["id"])
+            )
+            self.db.commit()
+            job = self._row(row["id"])
+        log(f"Job {job['id']} -> {worker} (attempt {job['attempts']}/{self.max_attempts})")
+        return job
+
+    def heartbeat(self, job_id, worker, progress=None):
+        """
+        Record that a worker is still rendering a job.
+
+        Returns:
+            bool: False if the worker should stop (the job was cancelled or given to another worker)
+        """
+        with self.lock:
+            cursor = self.db.execute(
+                "UPDATE jobs SET heartbeat = ?, progress = COALESCE(?, progress), updated = ? "
+                "WHERE id = ? AND status = ? AND worker = ?",
+                (time.time(), json.dumps(progress) if progress else None, time.time(), job_id, RUNNING, worker)
+            )
+            self.db.commit()
+            return cursor.rowcount == 1
+
+    def complete(self, job_id, worker, video_data):
+        """
+        Store a rendered video. A late result from a worker the job was taken
+        from is still accepted, as long as the job hasn't finished.
+
+        Returns:
+            bool: Whether the result was accepted
+        """
+        with self.lock:
+            job = self._row(job_id)
+            if job is None or job["status"] in FINISHED:
+                return False
+            with open(self.result_path(job_id), "wb") as f:
+                f.write(video_data)
+            self.db.execute(
+                "UPDATE jobs SET status = ?, worker = ?, error = NULL, updated = ? WHERE id = ?",
+                (DONE, worker, time.time(), job_id)
+            )
+            self.db.commit()
+        log(f"Job {job_id} done by {worker}")
+        return True
+
+    def fail(self, job_id, worker, error):
+        """Record a failed render. The job is queued again while it has attempts left."""
+        with self.lock:
+            job = self._row(job_id)
+            if job is None or job["status"] != RUNNING or job["worker"] != worker:
+                return
+            self._retry_or_fail(job, f"{worker}: {error}")
+            self.db.commit()
+
+    def _retry_or_fail(self, job, error):
+        status = QUEUED if job["attempts"] < self.max_attempts else FAILED
+        self.db.execute(
+            "UPDATE jobs SET status = ?, worker = NULL, error = ?, updated = ? WHERE id = ?",
+            (status, error, time.time(), job["id"])
+        )
+        log(f"Job {job['id']} {'re-queued' if status == QUEUED else 'failed'}: {error}")
+
+    def requeue_stale(self):
+        """Re-dispatch running jobs whose worker has stopped sending heartbeats."""
+        cutoff = time.time() - self.heartbeat_timeout
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id FROM jobs WHERE status = ? AND heartbeat < ?", (RUNNING, cutoff)
+            ).fetchall()
+            for row in rows:
+                job = self._row(row["id"])
+                self._retry_or_fail(job, f"no heartbeat from {job['worker']} for {self.heartbeat_timeout}s")
+            self.db.commit()
+        return len(rows)
+
+    def cancel(self, job_id):
+        """Cancel a job. A worker rendering it stops at its next heartbeat."""
+        with self.lock:
+            self.db.execute(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING)
+            )
+            self.db.commit()
+
+    def remove(self, job_id):
+        """Delete a job and its files."""
+        with self.lock:
+            self.db.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+            self.db.commit()
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+
+    def counts(self):
+        """Return the number of jobs per status."""
+        with self.lock:
+            rows = self.db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+
+class CoordinatorHandler(BaseHTTPRequestHandler):
+    """HTTP API over a RenderQueue (set as the server's queue attribute)."""
+
+    ROUTES = [
+        ("GET", re.compile(r"^/jobs$"), "list_jobs"),
+        ("POST", re.compile(r"^/jobs$"), "submit"),
+        ("POST", re.compile(r"^/jobs/claim$"), "claim"),
+        ("GET", re.compile(r"^/jobs/(\w+)$"), "status"),
+        ("DELETE", re.compile(r"^/jobs/(\w+)$"), "remove"),
+        ("GET", re.compile(r"^/jobs/(\w+)/(audio|avatar|result)$"), "download"),
+        ("POST", re.compile(r"^/jobs/(\w+)/heartbeat$"), "heartbeat"),
+        ("PUT", re.compile(r"^/jobs/(\w+)/result$"), "upload"),
+        ("POST", re.compile(r"^/jobs/(\w+)/fail$"), "fail"),
+        ("POST", re.compile(r"^/jobs/(\w+)/cancel$"), "cancel"),
+    ]
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        # Heartbeats would flood the console
+        pass
+
+    @property
+    def queue(self):
+        return self.server.queue
+
+    def _dispatch(self, method):
+        if RENDER_FARM_TOKEN and self.headers.get("X-Render-Token") != RENDER_FARM_TOKEN:
+            return self._send_json({"error": "invalid token"}, 403)
+        path, _, query = self.path.partition("?")
+        self.query = dict(urllib.parse.parse_qsl(query))
+        for route_method, pattern, handler in self.ROUTES:
+            match = pattern.match(path)
+            if route_method == method and match:
+                try:
+                    return getattr(self, handler)(*match.groups())
+                except Exception as e:
+                    log(f"Error handling {method} {path}: {e}")
+                    return self._send_json({"error": str(e)}, 500)
+        self._send_json({"error": "not found"}, 404)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _json_body(self):
+        body = self._body()
+        return json.loads(body) if body else {}
+
+    def _send_json(self, data, code=200):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_or_404(self, job_id):
+        job = self.queue.get(job_id)
+        if job is None:
+            self._send_json({"error": "no such job"}, 404)
+        return job
+
+    def list_jobs(self):
+        self._send_json(self.queue.counts())
+
+    def submit(self):
+        data = self._json_body()
+        job_id = self.queue.submit(
+            data["audio_name"], base64.b64decode(data["audio"]),
+            data["avatar_name"], base64.b64decode(data["avatar"]),
+            data.get("profile")
+        )
+        self._send_json({"id": job_id}, 201)
+
+    def claim(self):
+        job = self.queue.claim(self._json_body().get("worker", self.client_address[0]))
+        if job is None:
+            self.send_response(204)
+            self.end_headers()
+            return
+        self._send_json(job)
+
+    def status(self, job_id):
+        job = self._job_or_404(job_id)
+        if job:
+            self._send_json(job)
+
+    def remove(self, job_id):
+        self.queue.remove(job_id)
+        self._send_json({"ok": True})
+
+    def download(self, job_id, name):
+        job = self._job_or_404(job_id)
+        if not job:
+            return
+        if name == "result":
+            path = self.queue.result_path(job_id)
+        else:
+            path = os.path.join(self.queue.job_dir(job_id), job[f"{name}_name"])
+        if not os.path.exists(path):
+            return self._send_json({"error": f"no {name} for this job"}, 404)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def heartbeat(self, job_id):
+        data = self._json_body()
+        self._send_json({"ok": self.queue.heartbeat(job_id, data.get("worker"), data.get("progress"))})
+
+    def upload(self, job_id):
+        accepted = self.queue.complete(job_id, self.query.get("worker", ""), self._body())
+        self._send_json({"ok": accepted})
+
+    def fail(self, job_id):
+        data = self._json_body()
+        self.queue.fail(job_id, data.get("worker"), data.get("error", "unknown error"))
+        self._send_json({"ok": True})
+
+    def cancel(self, job_id):
+        self.queue.cancel(job_id)
+        self._send_json({"ok": True})
+
+
+def is_loopback(host):
+    """Return True if host resolves to a loopback address."""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def run_coordinator(host="127.0.0.1", port=DEFAULT_PORT, root=FARM_DIR):
+    """Serve the render queue until interrupted."""
+    if not RENDER_FARM_TOKEN and not is_loopback(host):
+        # Anyone who can reach the port could queue jobs and read every upload
+        log(f"Refusing to listen on {host} without RENDER_FARM_TOKEN set")
+        return 1
+    queue = RenderQueue(root)
+    server = ThreadingHTTPServer((host, port), CoordinatorHandler)
+    server.queue = queue
+
+    def reap():
+        # Re-dispatch jobs of dead workers even while nobody is claiming
+        while True:
+            time.sleep(HEARTBEAT_INTERVAL)
+            queue.requeue_stale()
+    threading.Thread(target=reap, daemon=True).start()
+
+    log(f"Render coordinator listening on http://{host}:{port} (jobs in {root})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+class RenderFarmClient:
+    """HTTP client for the coordinator, used by the app and by workers."""
+
+    def __init__(self, url, token=RENDER_FARM_TOKEN, timeout=60):
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method, path, data=None, json_body=None, raw=False):
+        headers = {}
+        if json_body is not None:
+            data = json.dumps(json_body).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+        if self.token:
+            headers["X-Render-Token"] = self.token
+        request = urllib.request.Request(self.url + path, data=data, headers=headers, method=method)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            body = response.read()
+            if raw:
+                return body
+            return json.loads(body) if body else None
+
+    def submit(self, audio_path, avatar_path, profile=None):
+        """Queue a render. Returns the job id."""
+        with open(audio_path, "rb") as f:
+            audio = base64.b64encode(f.read()).decode("ascii")
+        with open(avatar_path, "rb") as f:
+            avatar = base64.b64encode(f.read()).decode("ascii")
+        return self._request("POST", "/jobs", json_body={
+            "audio_name": os.path.basename(audio_path), "audio": audio,
+            "avatar_name": os.path.basename(avatar_path), "avatar": avatar,
+            "profile": profile or {},
+        })["id"]
+
+    def status(self, job_id):
+        return self._request("GET", f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        self._request("POST", f"/jobs/{job_id}/cancel", json_body={})
+
+    def remove(self, job_id):
+        self._request("DELETE", f"/jobs/{job_id}")
+
+    def download(self, job_id, name, output_path):
+        """Download a job's audio, avatar or result to output_path."""
+        data = self._request("GET", f"/jobs/{job_id}/{name}", raw=True)
+        with open(output_path, "wb") as f:
+            f.write(data)
+        return output_path
+
+    def claim(self, worker):
+        return self._request("POST", "/jobs/claim", json_body={"worker": worker})
+
+    def heartbeat(self, job_id, worker, progress=None):
+        return self._request("POST", f"/jobs/{job_id}/heartbeat",
+                             json_body={"worker": worker, "progress": progress})["ok"]
+
+    def upload(self, job_id, worker, video_path):
+        with open(video_path, "rb") as f:
+            query = urllib.parse.urlencode({"worker": worker})
+            return self._request("PUT", f"/jobs/{job_id}/result?{query}", data=f.read())["ok"]
+
+    def fail(self, job_id, worker, error):
+        self._request("POST", f"/jobs/{job_id}/fail", json_body={"worker": worker, "error": error})
+
+
+class RenderWorker:
+    """
+    Pulls jobs from a coordinator and renders them with SadTalker. Run it from
+    the SadTalker directory (inference.py is run from the working directory).
+    """
+
+    def __init__(self, client, name=None, work_dir=None):
+        """
+        Initialize the worker.
+
+        Args:
+            client (RenderFarmClient): Coordinator client
+            name (str): Worker name reported to the coordinator. Defaults to host:pid.
+            work_dir (str): Directory for job inputs and outputs. Defaults to a temp dir.
+        """
+        self.client = client
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.work_dir = work_dir or os.path.join(tempfile.gettempdir(), "render_worker")
+        os.makedirs(self.work_dir, exist_ok=True)
+        self.stop_event = threading.Event()
+
+    def run_forever(self, poll_interval=WORKER_POLL_INTERVAL):
+        log(f"Worker {self.name} pulling jobs from {self.client.url}")
+        while not self.stop_event.is_set():
+            try:
+                job = self.client.claim(self.name)
+            except (urllib.error.URLError, OSError) as e:
+                log(f"Coordinator unavailable: {e}")
+                job = None
+            if job is None:
+                self.stop_event.wait(poll_interval)
+                continue
+            self.run_job(job)
+
+    def run_job(self, job):
+        """
+        Render one job and report the result to the coordinator. Heartbeats
+        are sent for the whole job, downloads and upload included.
+        """
+        job_id = job["id"]
+        job_dir = os.path.join(self.work_dir, job_id)
+        os.makedirs(job_dir, exist_ok=True)
+
+        # Set when the coordinator takes the job away; stops the render
+        cancel = threading.Event()
+        finished = threading.Event()
+        latest = {}
+
+        def send_heartbeats():
+            while not finished.is_set():
+                try:
+                    if not self.client.heartbeat(job_id, self.name, dict(latest) or None):
+                        log(f"Job {job_id} was cancelled or re-dispatched - stopping")
+                        cancel.set()
+                        return
+                except (urllib.error.URLError, OSError) as e:
+                    log(f"Heartbeat failed: {e}")
+                if finished.wait(HEARTBEAT_INTERVAL):
+                    return
+        heartbeat_thread = threading.Thread(target=send_heartbeats, daemon=True)
+        heartbeat_thread.start()
+
+        try:
+            audio_path = self.client.download(job_id, "audio", os.path.join(job_dir, job["audio_name"]))
+            avatar_path = self.client.download(job_id, "avatar", os.path.join(job_dir, job["avatar_name"]))
+            if cancel.is_set():
+                return
+            video_path, error = self.render(job_id, audio_path, avatar_path, job["profile"], job_dir,
+                                            cancel, latest.update)
+            if cancel.is_set():
+                return
+            if video_path:
+                accepted = self.client.upload(job_id, self.name, video_path)
+                log(f"Job {job_id}: uploaded {os.path.basename(video_path)}" + ("" if accepted else " (not needed any more)"))
+            else:
+                log(f"Job {job_id} failed: {error}")
+                self.client.fail(job_id, self.name, error)
+        except Exception as e:
+            log(f"Job {job_id} failed: {e}")
+            try:
+                self.client.fail(job_id, self.name, str(e))
+            except (urllib.error.URLError, OSError):
+                # The coordinator re-dispatches the job once heartbeats stop
+                pass
+        finally:
+            finished.set()
+            heartbeat_thread.join()
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def render(self, job_id, audio_path, avatar_path, profile, job_dir, cancel, progress_callback=None):
+        """
+        Run inference.py for a job.
+
+        Args:
+            cancel (threading.Event): Stops the render when set
+            progress_callback (callable): Called with progress event dicts
+
+        Returns:
+            tuple: (video path or None, error message or None)
+        """
+        result_dir = os.path.join(job_dir, "results")
+        cmd = inference_command(audio_path, avatar_path, result_dir, profile)
+        log(f"Job {job_id}: {subprocess.list2cmdline(cmd)}")
+        process = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1, **process_group_kwargs()
+        )
+
+        watchdog = None
+        output = []
+        try:
+            watchdog = ProcessWatchdog(process, timeout=WORKER_TIMEOUT, max_rss_mb=WORKER_MAX_RSS_MB,
+                                       cancel_event=cancel).start()
+            progress = InferenceProgress(get_wav_duration(audio_path), callback=progress_callback)
+
+            for line in iter_output_lines(process.stdout):
+                if not progress.feed(line) and not TQDM_REGEX.search(line):
+                    output.append(line)
+                    print(line, flush=True)
+            return_code = process.wait()
+        finally:
+            # An error while reading the output must not leave SadTalker running
+            if process.poll() is None:
+                kill_process_tree(process)
+            if watchdog:
+                watchdog.stop()
+        progress.finish(return_code == 0 and not watchdog.reason)
+
+        if watchdog.reason:
+            return None, f"render stopped: {watchdog.reason}"
+        if return_code != 0:
+            return None, f"inference.py exited with {return_code}: {' '.join(output[-3:])}"
+        video_path = find_video(result_dir, "\n".join(output))
+        if not video_path:
+            return None, "inference.py finished without writing a video"
+        return video_path, None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed SadTalker rendering.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    coordinator_parser = commands.add_parser("coordinator", help="serve the render queue")
+    coordinator_parser.add_argument("--host", default="127.0.0.1",
+                                    help="address to listen on; other than loopback needs RENDER_FARM_TOKEN")
+    coordinator_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator_parser.add_argument("--dir", default=FARM_DIR, help="directory for the queue and job files")
+
+    worker_parser = commands.add_parser("worker", help="render jobs from a coordinator")
+    worker_parser.add_argument("url")
+    worker_parser.add_argument("--name", help="worker name (defaults to host:pid)")
+    worker_parser.add_argument("--poll", type=float, default=WORKER_POLL_INTERVAL,
+                               help="seconds between requests for work while idle")
+
+    args = parser.parse_args(argv)
+    if args.command == "coordinator":
+        return run_coordinator(args.host, args.port, args.dir)
+
+    worker = RenderWorker(RenderFarmClient(args.url), args.name)
+    try:
+        worker.run_forever(args.poll)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""
+Non-interactive entry point for the video pipeline.
+
+Runs the same workers as the GUI (script generation, TTS, audio processing,
+inference and Reels post-processing) from a job file, or as a daemon that
+picks up job files dropped into a directory.
+
+Usage:
+    python run_jobs.py run <job file> [--results <file>]
+    python run_jobs.py daemon <job dir> [--poll <seconds>]
+
+A job file is JSON: a single job, a list of jobs, or {"jobs": [...]} with
+defaults for every job alongside. A job has either a topic or a script:
+
+    {"topic": "AI + Life Tips", "subtopic": "Productivity hacks", "tone": "casual", "detail": "brief"}
+    {"script": "Hey bestie..."}
+    {"script_file": "script-1-ai-4.txt", "avatar": "avatar_img.jpg", "post": true}
+    {"script": "Hey bestie...", "avatars": ["avatar_img.jpg", "avatar4.jpg"]}
+
+A job with "avatars" renders the same audio on each avatar in one inference
+run and produces one video per avatar ("post" uploads the first).
+
+A .txt job file is a single script job.
+
+Exit status: 0 if every job produced a video, 1 if any job failed, 2 for bad usage.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import signal
+import argparse
+from datetime import datetime
+
+from artifact_store import get_artifact_store
+
+
+# Seconds between job directory scans in daemon mode
+DEFAULT_POLL_SECONDS = 5
+
+# Let Python signal handlers run while the Qt event loop is waiting
+SIGNAL_CHECK_MS = 500
+
+# Subdirectories of the daemon's job directory
+RUNNING_DIR = "running"
+DONE_DIR = "done"
+FAILED_DIR = "failed"
+
+# The Qt application the workers run under, created by main(). Qt (and main,
+# which pulls in the GUI) is imported only when jobs actually run.
+_app = None
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def load_jobs(job_file):
+    """
+    Read the jobs from a job file.
+
+    Returns:
+        list: Job dicts with defaults applied
+
+    Raises:
+        ValueError: If the file isn't a valid job file
+    """
+    base_dir = os.path.dirname(os.path.abspath(job_file))
+    with open(job_file, "r", encoding="utf-8") as f:
+        if job_file.endswith(".txt"):
+            return [{"name": os.path.splitext(os.path.basename(job_file))[0], "script": f.read()}]
+        data = json.load(f)
+
+    defaults = {}
+    if isinstance(data, dict) and "jobs" in data:
+        defaults = {key: value for key, value in data.items() if key != "jobs"}
+        data = data["jobs"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        raise ValueError("a job file must hold a job, a list of jobs or {\"jobs\": [...]}")
+
+    jobs = []
+    for index, job in enumerate(data, 1):
+        job = {**defaults, **job}
+        job.setdefault("name", f"{os.path.splitext(os.path.basename(job_file))[0]}-{index}")
+        if "script_file" in job:
+            with open(os.path.join(base_dir, job["script_file"]), "r", encoding="utf-8") as f:
+                job["script"] = f.read()
+        if "avatar" in job:
+            job["avatar"] = os.path.join(base_dir, job["avatar"])
+        if "avatars" in job:
+            job["avatars"] = [os.path.join(base_dir, avatar) for avatar in job["avatars"]]
+        if not job.get("script") and not job.get("topic"):
+            raise ValueError(f"job {job['name']} needs a topic or a script")
+        jobs.append(job)
+    return jobs
+
+
+def run_worker(worker, cancel_check=None):
+    """
+    Start a QThread worker and wait for it in a local event loop, so its
+    signals (including ones emitted from helper threads) are delivered.
+
+    Args:
+        worker (QThread): The worker to run
+        cancel_check (callable): Polled while waiting; when it returns True the
+                                 worker's cancel() is called (once)
+    """
+    from PyQt5.QtCore import QEventLoop, QTimer
+
+    loop = QEventLoop()
+    worker.finished.connect(loop.quit)
+
+    timer = QTimer()
+    timer.setInterval(SIGNAL_CHECK_MS)
+
+    def check():
+        if cancel_check and cancel_check() and hasattr(worker, "cancel") and not getattr(worker, "cancelled", False):
+            worker.cancel()
+    timer.timeout.connect(check)
+    timer.start()
+
+    worker.start()
+    if worker.isRunning():
+        loop.exec_()
+    worker.wait()
+    timer.stop()
+
+
+def generate_script(job):
+    """Generate a script for a topic job with the GUI's script worker."""
+    from main import ScriptGenerationWorker
+
+    result = {}
+    worker = ScriptGenerationWorker(
+        job["topic"], job.get("subtopic", job["topic"]),
+        job.get("tone", "balanced"), job.get("detail", "moderate")
+    )
+    worker.finished_signal.connect(lambda script: result.setdefault("script", script))
+    worker.error_signal.connect(lambda error: result.setdefault("error", error))
+    run_worker(worker)
+
+    # The worker falls back to a template script when generation fails;
+    # unattended runs treat that as a failure instead of publishing it
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    return result.get("script")
+
+
+def run_job(job, cancel_check=None):
+    """
+    Run one job end to end.
+
+    Returns:
+        dict: Job result with status "ok" or "failed"
+    """
+    from main import AutomationWorker, extract_spoken_script
+
+    start_time = time.time()
+    result = {"name": job["name"], "status": "failed", "started": datetime.now().isoformat(timespec="seconds")}
+    try:
+        script = job.get("script")
+        if not script:
+            log(f"{job['name']}: generating script for {job['topic']} - {job.get('subtopic', '')}")
+            script = generate_script(job)
+        script = extract_spoken_script(script)
+        result["script"] = script
+
+        log(f"{job['name']}: running automation")
+        errors = []
+        worker = AutomationWorker(script, avatar_image=job.get("avatar"), job_id=job["name"],
+                                  avatar_images=job.get("avatars"))
+        worker.update_signal.connect(lambda message: log(f"{job['name']}: {message}"))
+        worker.error_signal.connect(errors.append)
+        run_worker(worker, cancel_check)
+
+        processor = worker.audio_processor
+        video_path = processor.video_path if processor else None
+        result["audio"] = worker.processed_file
+        result["video"] = video_path
+        if job.get("avatars"):
+            result["videos"] = processor.video_paths if processor else []
+
+        if errors:
+            result["error"] = errors[-1]
+        elif worker.cancelled:
+            result["error"] = "cancelled"
+        elif not worker.processed_file:
+            result["error"] = "no audio was produced"
+        elif not (video_path and os.path.exists(video_path)):
+            result["error"] = "no video was produced"
+        else:
+            result["status"] = "ok"
+            if job.get("post"):
+                log(f"{job['name']}: posting {os.path.basename(video_path)} to Instagram")
+                # Nobody is watching an unattended run
+                processor.open_video_in_file_manager(review=False)
+    except Exception as e:
+        result["error"] = str(e)
+    finally:
+        # The job is done with its artifacts; they stay until evicted
+        get_artifact_store().release(job["name"])
+
+    result["seconds"] = round(time.time() - start_time, 1)
+    log(f"{job['name']}: {result['status']}" + (f" ({result['error']})" if result.get("error") else ""))
+    return result
+
+
+class StopRequest:
+    """
+    Tracks SIGINT/SIGTERM. The first signal lets the current job finish and
+    stops taking new ones; a second signal cancels the running job.
+    """
+
+    def __init__(self):
+        self.count = 0
+        signal.signal(signal.SIGINT, self.handle)
+        signal.signal(signal.SIGTERM, self.handle)
+
+    def handle(self, signum, frame):
+        self.count += 1
+        if self.count == 1:
+            log("Stop requested - finishing the current job (signal again to cancel it)")
+        else:
+            log("Cancelling the current job")
+
+    @property
+    def stopping(self):
+        return self.count > 0
+
+    @property
+    def cancelling(self):
+        return self.count > 1
+
+
+def run_file(job_file, results_file=None):
+    """Run every job in a job file. Returns the exit status."""
+    try:
+        jobs = load_jobs(job_file)
+    except (OSError, ValueError) as e:
+        log(f"Could not read {job_file}: {e}")
+        return 2
+
+    stop = StopRequest()
+    results = []
+    for job in jobs:
+        if stop.stopping:
+            results.append({"name": job["name"], "status": "skipped"})
+            continue
+        results.append(run_job(job, lambda: stop.cancelling))
+
+    if results_file:
+        with open(results_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    succeeded = sum(1 for result in results if result["status"] == "ok")
+    log(f"{succeeded}/{len(results)} jobs succeeded")
+    return 0 if succeeded == len(results) else 1
+
+
+def run_daemon(job_dir, poll_seconds=DEFAULT_POLL_SECONDS):
+    """
+    Process job files dropped into job_dir until stopped.
+
+    A job file is moved to running/ while it runs, then to done/ or failed/
+    next to a <name>.result.json. Jobs left in running/ by a crash are queued again.
+    """
+    for sub_dir in (RUNNING_DIR, DONE_DIR, FAILED_DIR):
+        os.makedirs(os.path.join(job_dir, sub_dir), exist_ok=True)
+
+    running_dir = os.path.join(job_dir, RUNNING_DIR)
+    for file_name in os.listdir(running_dir):
+        log(f"Re-queuing interrupted job {file_name}")
+        shutil.move(os.path.join(running_dir, file_name), os.path.join(job_dir, file_name))
+
+    stop = StopRequest()
+    log(f"Watching {job_dir} for jobs (every {poll_seconds}s)")
+    while not stop.stopping:
+        pending = sorted(
+            file_name for file_name in os.listdir(job_dir)
+            if file_name.endswith((".json", ".txt")) and os.path.isfile(os.path.join(job_dir, file_name))
+        )
+        if not pending:
+            time.sleep(poll_seconds)
+            continue
+
+        file_name = pending[0]
+        job_file = os.path.join(running_dir, file_name)
+        try:
+            # Claiming the file by moving it keeps a second daemon from running it too
+            os.replace(os.path.join(job_dir, file_name), job_file)
+        except OSError:
+            continue
+
+        try:
+            results = [run_job(job, lambda: stop.cancelling) for job in load_jobs(job_file)]
+        except (OSError, ValueError) as e:
+            results = [{"name": file_name, "status": "failed", "error": f"invalid job file: {e}"}]
+
+        failed = any(result["status"] != "ok" for result in results)
+        target_dir = os.path.join(job_dir, FAILED_DIR if failed else DONE_DIR)
+        shutil.move(job_file, os.path.join(target_dir, file_name))
+        with open(os.path.join(target_dir, f"{os.path.splitext(file_name)[0]}.result.json"), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    log("Daemon stopped")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the video pipeline without the GUI.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the jobs in a job file and exit")
+    run_parser.add_argument("job_file")
+    run_parser.add_argument("--results", help="write per-job results to this JSON file")
+
+    daemon_parser = commands.add_parser("daemon", help="keep running jobs dropped into a directory")
+    daemon_parser.add_argument("job_dir")
+    daemon_parser.add_argument("--poll", type=float, default=DEFAULT_POLL_SECONDS,
+                               help="seconds between directory scans")
+
+    args = parser.parse_args(argv)
+
+    # Workers are QThreads, so an (off-screen) Qt application is needed for their signals
+    from PyQt5.QtCore import QCoreApplication
+
+    global _app
+    _app = QCoreApplication.instance() or QCoreApplication(sys.argv[:1])
+
+    if args.command == "run":
+        return run_file(args.job_file, args.results)
+    return run_daemon(args.job_dir, args.poll)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import os
+import re
+import json
+import wave
+from datetime import datetime
+
+
+# Average speaking rate used until enough real clips have been logged
+DEFAULT_WORDS_PER_SECOND = 2.6
+
+# Extra time the TTS voice spends on sentence breaks and commas
+SENTENCE_PAUSE = 0.35
+CLAUSE_PAUSE = 0.15
+
+# Estimates are logged next to the real WAV durations here
+DURATION_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "duration_log.jsonl")
+
+# Number of logged clips needed before the calibrated rate replaces the default
+MIN_CALIBRATION_SAMPLES = 3
+
+
+def split_sentences(text):
+    """Split script text into sentences, keeping the trailing punctuation."""
+    sentences = re.split(r'(?<=[.!?])\s+', text.strip())
+    return [s.strip() for s in sentences if s.strip()]
+
+
+def split_clauses(sentence):
+    """Split a sentence after commas, semicolons, colons and dashes."""
+    clauses = re.split(r'(?<=[,;:—])\s+', sentence.strip())
+    return [c.strip() for c in clauses if c.strip()]
+
+
+def chunk_sentences(text, max_words=60):
+    """
+    Group sentences into chunks of at most max_words words for chunked TTS.
+    A single sentence longer than max_words becomes its own chunk.
+
+    Args:
+        text (str): Script text
+        max_words (int): Maximum number of words per chunk
+
+    Returns:
+        list: Chunk strings in script order
+    """
+    chunks = []
+    current = []
+    current_words = 0
+    for sentence in split_sentences(text):
+        words = count_words(sentence)
+        if current and current_words + words > max_words:
+            chunks.append(" ".join(current))
+            current = []
+            current_words = 0
+        current.append(sentence)
+        current_words += words
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def count_words(text):
+    """Count spoken words, ignoring hashtags and emoji."""
+    return len(re.findall(r"(?<!#)\b[\w']+\b", text))
+
+
+def _count_pauses(text):
+    """Estimate the seconds of pauses the voice adds on punctuation."""
+    sentence_breaks = len(re.findall(r'[.!?]+', text))
+    clause_breaks = len(re.findall(r'[,;:—]', text))
+    return sentence_breaks * SENTENCE_PAUSE + clause_breaks * CLAUSE_PAUSE
+
+
+def get_words_per_second(log_path=DURATION_LOG):
+    """
+    Get the speaking rate calibrated against previously produced WAVs.
+
+    Args:
+        log_path (str): Path to the duration log written by log_duration()
+
+    Returns:
+        float: Words per second, or DEFAULT_WORDS_PER_SECOND if not enough samples
+    """
+    rates = []
+    try:
+        with open(log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                speech_time = entry.get("actual", 0) - entry.get("pauses", 0)
+                if entry.get("words") and speech_time > 0:
+                    rates.append(entry["words"] / speech_time)
+    except OSError:
+        pass
+
+    if len(rates) < MIN_CALIBRATION_SAMPLES:
+        return DEFAULT_WORDS_PER_SECOND
+
+    # Median is robust against the odd truncated or failed download
+    rates.sort()
+    return rates[len(rates) // 2]
+
+
+def estimate_duration(text, words_per_second=None):
+    """
+    Estimate how long the TTS voice will take to speak a script.
+
+    Args:
+        text (str): Script text
+        words_per_second (float): Speaking rate. If None, the calibrated rate is used.
+
+    Returns:
+        float: Estimated duration in seconds
+    """
+    if words_per_second is None:
+        words_per_second = get_words_per_second()
+    return count_words(text) / words_per_second + _count_pauses(text)
+
+
+def trim_to_duration(text, target_seconds, words_per_second=None):
+    """
+    Trim a script at sentence boundaries so it fits the target duration.
+    The closing sentence is kept when possible since it carries the call to action.
+    If the first sentence alone is too long, it is cut at its last clause
+    boundary that fits; a first clause that is still too long is kept as-is,
+    so the result can overrun the target in that case.
+
+    Args:
+        text (str): Script text
+        target_seconds (float): Maximum spoken duration
+        words_per_second (float): Speaking rate. If None, the calibrated rate is used.
+
+    Returns:
+        str: The trimmed script
+    """
+    if words_per_second is None:
+        words_per_second = get_words_per_second()
+
+    sentences = split_sentences(text)
+    if not sentences:
+        return text
+
+    closing = sentences[-1] if len(sentences) > 1 else None
+    body = sentences[:-1] if closing else sentences
+
+    opening = body[0]
+    if estimate_duration(opening, words_per_second) > target_seconds:
+        clauses = split_clauses(opening)
+        kept_clauses = [clauses[0]]
+        for clause in clauses[1:]:
+            if estimate_duration(" ".join(kept_clauses + [clause]), words_per_second) > target_seconds:
+                break
+            kept_clauses.append(clause)
+        if len(kept_clauses) < len(clauses):
+            # End the shortened sentence on a full stop instead of a comma
+            return " ".join(kept_clauses).rstrip(",;:— ") + "."
+        return opening
+
+    kept = [opening]
+    for sentence in body[1:]:
+        candidate = kept + [sentence] + ([closing] if closing else [])
+        if estimate_duration(" ".join(candidate), words_per_second) > target_seconds:
+            break
+        kept.append(sentence)
+
+    if closing and estimate_duration(" ".join(kept + [closing]), words_per_second) <= target_seconds:
+        kept.append(closing)
+
+    return " ".join(kept)
+
+
+def fit_script(text, target_seconds, tolerance=1.1, words_per_second=None):
+    """
+    Check a script against the target duration.
+
+    Args:
+        text (str): Script text
+        target_seconds (float): Target spoken duration
+        tolerance (float): Allowed overrun factor before the script is rejected
+        words_per_second (float): Speaking rate. If None, the calibrated rate is used.
+
+    Returns:
+        tuple: (fits, estimate) where fits is True if the script is within tolerance
+    """
+    estimate = estimate_duration(text, words_per_second)
+    return estimate <= target_seconds * tolerance, estimate
+
+
+def get_wav_duration(wav_path):
+    """Return the duration of a WAV file in seconds, or None if it can't be read."""
+    try:
+        with wave.open(wav_path, "rb") as wav_file:
+            return wav_file.getnframes() / float(wav_file.getframerate())
+    except Exception as e:
+        print(f"Could not read WAV duration for {wav_path}: {e}")
+        return None
+
+
+def log_duration(script_text, wav_path, log_path=DURATION_LOG):
+    """
+    Log the estimated duration of a script against the real duration of its WAV.
+    The log feeds get_words_per_second() so estimates improve with every clip.
+
+    Args:
+        script_text (str): Script that was sent to TTS
+        wav_path (str): Path to the processed WAV file
+        log_path (str): Path to the duration log
+
+    Returns:
+        dict: The logged entry, or None if the WAV couldn't be read
+    """
+    actual = get_wav_duration(wav_path)
+    if actual is None:
+        return None
+
+    entry = {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "wav": os.path.basename(wav_path),
+        "words": count_words(script_text),
+        "pauses": round(_count_pauses(script_text), 2),
+        "estimate": round(estimate_duration(script_text), 2),
+        "actual": round(actual, 2),
+    }
+
+    try:
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Could not write duration log: {e}")
+
+    print(f"Duration estimate {entry['estimate']}s vs actual {entry['actual']}s for {entry['wav']}")
+    return entry
@@ -0,0 +1,330 @@
+import os
+import re
+import json
+import hashlib
+from difflib import SequenceMatcher
+from pydub import AudioSegment
+from pydub.silence import detect_nonsilent
+
+from artifact_store import file_digest
+
+# Vosk gives real word timings offline on the CPU. Without it (or without a
+# model) words are spread over the detected speech segments instead.
+try:
+    from vosk import Model, KaldiRecognizer, SetLogLevel
+except ImportError:
+    Model = None
+
+
+# Directory holding a Vosk model (e.g. vosk-model-small-en-us-0.15)
+VOSK_MODEL_PATH = os.environ.get(
+    "VOSK_MODEL_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "vosk-model-small-en-us")
+)
+
+# Alignments are cached per audio hash so re-renders skip alignment
+ALIGNMENT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alignment_cache")
+
+# Caption grouping
+MAX_CAPTION_WORDS = 4
+MAX_CAPTION_SECONDS = 2.0
+CAPTION_BREAK_GAP = 0.4
+
+# Caption look, in ASS terms (colours are &HAABBGGRR). The ASS canvas matches the Reels frame.
+CAPTION_STYLE = {
+    "font": "Montserrat",
+    "size": 78,
+    "primary_colour": "&H0000D7FF",    # Word being spoken (gold)
+    "secondary_colour": "&H00FFFFFF",  # Words not spoken yet (white)
+    "outline_colour": "&H00000000",
+    "outline": 5,
+    "shadow": 0,
+    "bold": -1,
+    "margin_v": 420,                   # Lower third, clear of the Reels UI
+}
+
+SAMPLE_RATE = 16000
+
+_model = None
+
+
+def _normalize(word):
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def caption_words(script_text):
+    """
+    Split script text into the words shown as captions, dropping section
+    tags like [INTRO], hashtags and emoji-only tokens.
+    """
+    text = re.sub(r"\[[^\]]*\]", " ", script_text)
+    return [token for token in text.split() if not token.startswith("#") and _normalize(token)]
+
+
+def _get_model():
+    global _model
+    if _model is None and Model is not None and os.path.isdir(VOSK_MODEL_PATH):
+        SetLogLevel(-1)
+        _model = Model(VOSK_MODEL_PATH)
+    return _model
+
+
+def _recognize_words(audio, model):
+    """Run Vosk over the audio and return recognized words with timings."""
+    recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+    recognizer.SetWords(True)
+
+    raw = audio.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2).raw_data
+    results = []
+    step = SAMPLE_RATE * 2 // 2  # Half a second of 16-bit samples
+    for offset in range(0, len(raw), step):
+        if recognizer.AcceptWaveform(raw[offset:offset + step]):
+            results.append(json.loads(recognizer.Result()))
+    results.append(json.loads(recognizer.FinalResult()))
+
+    return [item for result in results for item in result.get("result", [])]
+
+
+def _align_to_recognized(words, recognized, duration):
+    """
+    Transfer timings from recognized words onto the script words. Script words
+    the recognizer missed get times interpolated from their neighbours.
+    """
+    script_norm = [_normalize(word) for word in words]
+    recognized_norm = [_normalize(item["word"]) for item in recognized]
+
+    times = [None] * len(words)
+    matcher = SequenceMatcher(None, script_norm, recognized_norm, autojunk=False)
+    for block in matcher.get_matching_blocks():
+        for i in range(block.size):
+            item = recognized[block.b + i]
+            times[block.a + i] = (item["start"], item["end"])
+
+    return _fill_gaps(words, times, duration)
+
+
+def _fill_gaps(words, times, end_time):
+    """Interpolate missing (start, end) times, weighting by word length."""
+    aligned = list(times)
+    i = 0
+    while i < len(aligned):
+        if aligned[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(aligned) and aligned[j] is None:
+            j += 1
+        gap_start = aligned[i - 1][1] if i > 0 else 0.0
+        gap_end = aligned[j][0] if j < len(aligned) else end_time
+        gap_end = max(gap_end, gap_start)
+        weights = [len(words[k]) + 1 for k in range(i, j)]
+        position = gap_start
+        for k, weight in zip(range(i, j), weights):
+            length = (gap_end - gap_start) * weight / sum(weights)
+            aligned[k] = (position, position + length)
+            position += length
+        i = j
+    return aligned
+
+
+def _align_to_speech_segments(words, audio):
+    """
+    Spread words over the non-silent parts of the audio in proportion to their
+    length. Used when no recognizer is available.
+    """
+    segments = detect_nonsilent(audio, min_silence_len=200, silence_thresh=audio.dBFS - 16)
+    if not segments:
+        segments = [[0, len(audio)]]
+    speech_ms = sum(end - start for start, end in segments)
+
+    weights = [len(word) + 1 for word in words]
+    total_weight = sum(weights)
+
+    def to_real_time(speech_offset):
+        # Map an offset in "speech only" time back onto the real timeline
+        for start, end in segments:
+            if speech_offset <= end - start:
+                return (start + speech_offset) / 1000.0
+            speech_offset -= end - start
+        return segments[-1][1] / 1000.0
+
+    aligned = []
+    position = 0.0
+    for weight in weights:
+        length = speech_ms * weight / total_weight
+        aligned.append((to_real_time(position), to_real_time(position + length)))
+        position += length
+    return aligned
+
+
+def align_script(wav_path, script_text, cache_dir=ALIGNMENT_CACHE_DIR):
+    """
+    Force-align script words to a WAV file. Results are cached per audio hash,
+    so restyling captions for the same audio doesn't align again.
+
+    Args:
+        wav_path (str): The processed TTS audio
+        script_text (str): Script that was sent to TTS
+        cache_dir (str): Directory for cached alignments
+
+    Returns:
+        list: Dicts with word, start and end (seconds)
+    """
+    words = caption_words(script_text)
+    if not words:
+        return []
+
+    key = file_digest(wav_path)
+    cache_path = os.path.join(cache_dir, f"{key}.json")
+    text_key = hashlib.sha256(" ".join(words).encode("utf-8")).hexdigest()
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("text") == text_key:
+            print(f"Using cached alignment for {os.path.basename(wav_path)}")
+            return cached["words"]
+    except (OSError, ValueError):
+        pass
+
+    audio = AudioSegment.from_file(wav_path)
+    model = _get_model()
+    if model is not None:
+        recognized = _recognize_words(audio, model)
+        if recognized:
+            times = _align_to_recognized(words, recognized, len(audio) / 1000.0)
+        else:
+            times = _align_to_speech_segments(words, audio)
+        method = "vosk"
+    else:
+        times = _align_to_speech_segments(words, audio)
+        method = "speech segments"
+    print(f"Aligned {len(words)} words to {os.path.basename(wav_path)} ({method})")
+
+    aligned = [
+        {"word": word, "start": round(start, 3), "end": round(end, 3)}
+        for word, (start, end) in zip(words, times)
+    ]
+
+    os.makedirs(cache_dir, exist_ok=True)
+    try:
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump({"text": text_key, "method": method, "words": aligned}, f)
+    except OSError as e:
+        print(f"Could not cache alignment: {e}")
+    return aligned
+
+
+def group_captions(aligned):
+    """Group aligned words into short caption lines."""
+    captions = []
+    current = []
+    for item in aligned:
+        if current:
+            too_long = len(current) >= MAX_CAPTION_WORDS
+            too_slow = item["end"] - current[0]["start"] > MAX_CAPTION_SECONDS
+            paused = item["start"] - current[-1]["end"] > CAPTION_BREAK_GAP
+            if too_long or too_slow or paused:
+                captions.append(current)
+                current = []
+        current.append(item)
+        # End a caption at the end of a sentence or clause
+        if re.search(r"[.!?,;:]$", item["word"]):
+            captions.append(current)
+            current = []
+    if current:
+        captions.append(current)
+    return captions
+
+
+def _ass_time(seconds):
+    centiseconds = int(round(seconds * 100))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def _ass_escape(text):
+    return text.replace("\\", "\\\\").replace("{", "(").replace("}", ")")
+
+
+def build_ass(aligned, style=None, width=1080, height=1920):
+    """
+    Build ASS captions with word-by-word karaoke highlighting.
+
+    Args:
+        aligned (list): Output of align_script()
+        style (dict): Overrides for CAPTION_STYLE
+        width (int): Video width the captions are laid out for
+        height (int): Video height the captions are laid out for
+
+    Returns:
+        str: The ASS file contents
+    """
+    style = {**CAPTION_STYLE, **(style or {})}
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, "
+        "Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Caption,{style['font']},{style['size']},{style['primary_colour']},"
+        f"{style['secondary_colour']},{style['outline_colour']},&H00000000,{style['bold']},0,0,0,"
+        f"100,100,0,0,1,{style['outline']},{style['shadow']},2,60,60,{style['margin_v']},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+
+    for caption in group_captions(aligned):
+        start = caption[0]["start"]
+        end = caption[-1]["end"]
+        text = ""
+        position = start
+        for item in caption:
+            # \k durations include the pause before the word
+            duration = max(1, int(round((item["end"] - position) * 100)))
+            text += f"{{\\kf{duration}}}{_ass_escape(item['word'])} "
+            position = item["end"]
+        lines.append(f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Caption,,0,0,0,,{text.strip()}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_ass(aligned, output_path, style=None):
+    """
+    Write ASS captions to output_path. The file is only rewritten when its
+    contents change, so its modification time tells whether a render is stale.
+
+    Returns:
+        str: output_path
+    """
+    contents = build_ass(aligned, style)
+    try:
+        with open(output_path, "r", encoding="utf-8") as f:
+            if f.read() == contents:
+                return output_path
+    except OSError:
+        pass
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(contents)
+    return output_path
+
+
+def subtitles_filter(ass_path):
+    """
+    Build an ffmpeg filter that burns in an ASS file, escaping the path for the filter graph.
+
+    The path is unquoted twice: once by the filter graph parser (the single
+    quotes) and once by the filter's option parser (the backslashes). A quote
+    can't be escaped inside single quotes, so it closes the quote, adds an
+    escaped quote and reopens it, keeping a backslash for the option parser.
+    """
+    path = os.path.abspath(ass_path).replace("\\", "/").replace(":", "\\:").replace("'", "\\'\\''")
+    return f"subtitles='{path}'"
@@ -0,0 +1,166 @@
+import os
+import time
+
+import pytest
+
+from artifact_store import ArtifactStore, file_digest, COLD, HOT, UNCLAIMED_PIN_HOURS
+
+GB = 1024 ** 3
+
+
+def make_file(directory, name, size, fill=b"x"):
+    """Write a file and return its path and digest."""
+    path = os.path.join(str(directory), name)
+    with open(path, "wb") as f:
+        f.write(fill * size)
+    return path, file_digest(path)
+
+
+def put(store, directory, name, size, fill=b"x", kind="audio", job=None):
+    """Store a new file and return (stored path, digest). Without a job, the file is left unreferenced."""
+    path, digest = make_file(directory, name, size, fill)
+    stored = store.put(path, kind, job=job or "finished-job")
+    if job is None:
+        store.release("finished-job")
+    return stored, digest
+
+
+def set_last_access(store, digest, when):
+    store.db.execute("UPDATE artifacts SET last_access = ? WHERE digest = ?", (when, digest))
+    store.db.commit()
+
+
+def tier_of(store, digest):
+    row = store.db.execute("SELECT tier FROM artifacts WHERE digest = ?", (digest,)).fetchone()
+    return row[0] if row else None
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    directory = tmp_path / "inputs"
+    directory.mkdir()
+    return directory
+
+
+def test_put_deduplicates_and_keeps_name(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"))
+    first, digest = put(store, inputs, "voice.wav", 10)
+    second, second_digest = put(store, inputs, "copy.wav", 10)
+
+    assert first == second
+    assert second_digest == digest
+    assert os.path.basename(first) == "voice.wav"
+    assert not os.path.exists(os.path.join(str(inputs), "copy.wav"))
+    assert store.stats()[HOT]["count"] == 1
+
+
+def test_hot_limit_deletes_least_recently_used_without_cold_tier(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), hot_max_gb=25 / GB)
+    old, old_digest = put(store, inputs, "old.wav", 10, b"a")
+    recent, _ = put(store, inputs, "recent.wav", 10, b"b")
+    set_last_access(store, old_digest, time.time() - 100)
+
+    put(store, inputs, "new.wav", 10, b"c")
+
+    assert not os.path.exists(old)
+    assert os.path.exists(recent)
+    assert store.stats()[HOT]["count"] == 2
+
+
+def test_hot_limit_demotes_to_cold_tier_and_get_promotes(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), str(tmp_path / "cold"), hot_max_gb=25 / GB, cold_max_gb=1)
+    old, digest = put(store, inputs, "old.wav", 10, b"a")
+    put(store, inputs, "recent.wav", 10, b"b")
+    set_last_access(store, digest, time.time() - 100)
+
+    result, _ = put(store, inputs, "new.wav", 10, b"c")
+
+    assert tier_of(store, digest) == COLD
+    assert not os.path.exists(old)
+    promoted = store.get(digest)
+    assert promoted == old
+    assert os.path.exists(promoted)
+    assert tier_of(store, digest) == HOT
+    assert os.path.exists(result)
+
+
+def test_cold_limit_deletes_least_recently_used(tmp_path, inputs):
+    # Each tier holds one artifact
+    store = ArtifactStore(str(tmp_path / "hot"), str(tmp_path / "cold"), hot_max_gb=15 / GB, cold_max_gb=15 / GB)
+    _, first = put(store, inputs, "first.wav", 10, b"a")
+    set_last_access(store, first, time.time() - 200)
+    _, second = put(store, inputs, "second.wav", 10, b"b")
+    set_last_access(store, second, time.time() - 100)
+    _, third = put(store, inputs, "third.wav", 10, b"c")
+
+    assert tier_of(store, first) is None
+    assert tier_of(store, second) == COLD
+    assert tier_of(store, third) == HOT
+    assert store.stats()[COLD]["count"] == 1
+
+
+def test_referenced_artifacts_are_never_evicted(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), hot_max_gb=0, max_age_days=0)
+    kept, _ = put(store, inputs, "kept.wav", 10, b"a", job="job-1")
+    assert os.path.exists(kept)
+
+    store.release("job-1")
+    assert store.evict()["deleted"] == 1
+    assert not os.path.exists(kept)
+
+
+def test_age_limit_deletes_stale_artifacts(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), max_age_days=1)
+    stale, stale_digest = put(store, inputs, "stale.mp4", 10, b"a", kind="video")
+    fresh, _ = put(store, inputs, "fresh.mp4", 10, b"b", kind="video")
+    set_last_access(store, stale_digest, time.time() - 2 * 86400)
+
+    assert store.evict() == {"deleted": 1, "demoted": 0}
+    assert not os.path.exists(stale)
+    assert store.latest("video") == fresh
+
+
+def test_get_forgets_files_removed_behind_its_back(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"))
+    stored, digest = put(store, inputs, "gone.wav", 10)
+    os.remove(stored)
+    assert store.get(digest) is None
+    assert store.stats().get(HOT) is None
+
+
+def test_put_restores_file_removed_behind_its_back(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), str(tmp_path / "cold"), hot_max_gb=15 / GB, cold_max_gb=1)
+    _, digest = put(store, inputs, "voice.wav", 10, b"a")
+    put(store, inputs, "other.wav", 10, b"b")
+    assert tier_of(store, digest) == COLD
+    os.remove(store._path(COLD, digest, "voice.wav"))
+
+    path, _ = make_file(inputs, "again.wav", 10, b"a")
+    restored = store.put(path, "audio", job="job-1")
+
+    assert os.path.basename(restored) == "again.wav"
+    with open(restored, "rb") as f:
+        assert f.read() == b"a" * 10
+    assert tier_of(store, digest) == HOT
+    assert store.get(digest) == restored
+
+
+def test_unclaimed_artifacts_are_pinned_until_claimed(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), hot_max_gb=0)
+    path, digest = make_file(inputs, "voice.wav", 10)
+    stored = store.put(path, "audio")
+    assert os.path.exists(stored)
+    assert store.evict()["deleted"] == 0
+
+    store.add_ref("job-1", digest)
+    store.release("job-1")
+    assert store.evict()["deleted"] == 1
+    assert not os.path.exists(stored)
+
+
+def test_unclaimed_pin_expires(tmp_path, inputs):
+    store = ArtifactStore(str(tmp_path / "hot"), hot_max_gb=0)
+    path, digest = make_file(inputs, "voice.wav", 10)
+    store.put(path, "audio")
+    set_last_access(store, digest, time.time() - (UNCLAIMED_PIN_HOURS + 1) * 3600)
+    assert store.evict()["deleted"] == 1
@@ -0,0 +1,28 @@
+import render_farm
+from multi_avatar import parse_args
+
+
+def test_multi_avatar_command_passes_every_avatar():
+    cmd = render_farm.multi_avatar_command("voice.wav", ["a.jpg", "b.jpg"], "results", {"size": 512})
+    assert cmd[1] == render_farm.MULTI_AVATAR_RUNNER
+    start = cmd.index("--source_images") + 1
+    assert cmd[start:start + 2] == ["a.jpg", "b.jpg"]
+    assert cmd[cmd.index("--size") + 1] == "512"
+    assert cmd[cmd.index("--result_dir") + 1] == "results"
+
+
+def test_parse_args_takes_several_source_images():
+    args = parse_args(["--driven_audio", "voice.wav", "--source_images", "a.jpg", "b.jpg", "--still"])
+    assert args.source_images == ["a.jpg", "b.jpg"]
+    assert args.still
+    assert not args.separate_motion
+
+
+def test_feature_cache_can_be_turned_off(monkeypatch):
+    monkeypatch.setattr(render_farm, "USE_FEATURE_CACHE", False)
+    assert "--no_feature_cache" in render_farm.multi_avatar_command("voice.wav", ["a.jpg", "b.jpg"], "results")
+    assert "inference.py" in render_farm.inference_command("voice.wav", "a.jpg", "results")
+
+    monkeypatch.setattr(render_farm, "USE_FEATURE_CACHE", True)
+    assert "--no_feature_cache" not in render_farm.multi_avatar_command("voice.wav", ["a.jpg"], "results")
+    assert parse_args(["--driven_audio", "v.wav", "--source_images", "a.jpg", "--no_feature_cache"]).no_feature_cache
@@ -0,0 +1,198 @@
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import render_farm
+from render_farm import (
+    CoordinatorHandler, RenderFarmClient, RenderQueue, RenderWorker,
+    CANCELLED, DONE, FAILED, QUEUED, RUNNING
+)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return RenderQueue(str(tmp_path / "farm"), heartbeat_timeout=60, max_attempts=2)
+
+
+def submit(queue, name="voice.wav"):
+    return queue.submit(name, b"audio", "face.jpg", b"image", {"size": 512})
+
+
+def expire_heartbeat(queue, job_id):
+    queue.db.execute("UPDATE jobs SET heartbeat = ? WHERE id = ?", (time.time() - 120, job_id))
+    queue.db.commit()
+
+
+def test_claim_hands_out_oldest_job_once(queue):
+    first = submit(queue, "first.wav")
+    second = submit(queue, "second.wav")
+
+    job = queue.claim("worker-a")
+    assert job["id"] == first
+    assert job["status"] == RUNNING
+    assert job["attempts"] == 1
+    assert job["profile"] == {"size": 512}
+    assert queue.claim("worker-b")["id"] == second
+    assert queue.claim("worker-c") is None
+
+
+def test_submit_keeps_only_base_names(queue):
+    job_id = queue.submit("../../etc/voice.wav", b"audio", "/tmp/face.jpg", b"image")
+    job = queue.get(job_id)
+    assert job["audio_name"] == "voice.wav"
+    assert os.path.exists(os.path.join(queue.job_dir(job_id), "face.jpg"))
+
+
+def test_heartbeat_only_from_owning_worker(queue):
+    job_id = submit(queue)
+    queue.claim("worker-a")
+
+    assert queue.heartbeat(job_id, "worker-a", {"phase": "face_render"})
+    assert queue.get(job_id)["progress"] == {"phase": "face_render"}
+    assert not queue.heartbeat(job_id, "worker-b")
+
+
+def test_stale_job_is_requeued_for_another_worker(queue):
+    job_id = submit(queue)
+    queue.claim("worker-a")
+    expire_heartbeat(queue, job_id)
+
+    job = queue.claim("worker-b")
+    assert job["id"] == job_id
+    assert job["worker"] == "worker-b"
+    assert job["attempts"] == 2
+    # The old worker is told to stop
+    assert not queue.heartbeat(job_id, "worker-a")
+
+
+def test_job_fails_after_max_attempts(queue):
+    job_id = submit(queue)
+    queue.claim("worker-a")
+    queue.fail(job_id, "worker-a", "out of memory")
+    assert queue.get(job_id)["status"] == QUEUED
+
+    queue.claim("worker-b")
+    expire_heartbeat(queue, job_id)
+    assert queue.requeue_stale() == 1
+
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert "no heartbeat from worker-b" in job["error"]
+    assert queue.claim("worker-c") is None
+
+
+def test_fail_from_other_worker_is_ignored(queue):
+    job_id = submit(queue)
+    queue.claim("worker-a")
+    queue.fail(job_id, "worker-b", "not mine")
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_late_result_is_accepted_until_job_finishes(queue):
+    job_id = submit(queue)
+    queue.claim("worker-a")
+    expire_heartbeat(queue, job_id)
+    queue.claim("worker-b")
+
+    assert queue.complete(job_id, "worker-a", b"video")
+    assert queue.get(job_id)["status"] == DONE
+    assert not queue.complete(job_id, "worker-b", b"other video")
+    with open(queue.result_path(job_id), "rb") as f:
+        assert f.read() == b"video"
+
+
+def test_cancelled_job_stops_its_worker(queue):
+    job_id = submit(queue)
+    queue.claim("worker-a")
+    queue.cancel(job_id)
+
+    assert queue.get(job_id)["status"] == CANCELLED
+    assert not queue.heartbeat(job_id, "worker-a")
+    assert not queue.complete(job_id, "worker-a", b"video")
+
+
+def test_remove_deletes_job_files(queue):
+    job_id = submit(queue)
+    queue.remove(job_id)
+    assert queue.get(job_id) is None
+    assert not os.path.exists(queue.job_dir(job_id))
+
+
+@pytest.fixture
+def coordinator(queue):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CoordinatorHandler)
+    server.queue = queue
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_client_round_trip(coordinator, tmp_path):
+    client = RenderFarmClient(coordinator, token=None)
+    audio = tmp_path / "voice.wav"
+    audio.write_bytes(b"audio")
+    avatar = tmp_path / "face.jpg"
+    avatar.write_bytes(b"image")
+    video = tmp_path / "result.mp4"
+    video.write_bytes(b"video")
+
+    job_id = client.submit(str(audio), str(avatar), {"size": 512})
+    # Worker names go into the query string and must survive quoting
+    worker = "host name:1&worker=other"
+    job = client.claim(worker)
+    assert job["id"] == job_id
+    assert client.heartbeat(job_id, worker, {"phase": "mux"})
+    assert client.upload(job_id, worker, str(video))
+
+    status = client.status(job_id)
+    assert status["status"] == DONE
+    assert status["worker"] == worker
+    assert client.download(job_id, "result", str(tmp_path / "downloaded.mp4"))
+    assert (tmp_path / "downloaded.mp4").read_bytes() == b"video"
+
+
+def test_coordinator_refuses_public_bind_without_token(monkeypatch, tmp_path):
+    monkeypatch.setattr(render_farm, "RENDER_FARM_TOKEN", None)
+    assert render_farm.run_coordinator("0.0.0.0", 0, str(tmp_path / "farm")) == 1
+    assert not os.path.exists(str(tmp_path / "farm"))
+
+
+def test_is_loopback():
+    assert render_farm.is_loopback("127.0.0.1")
+    assert render_farm.is_loopback("localhost")
+    assert not render_farm.is_loopback("0.0.0.0")
+    assert not render_farm.is_loopback("10.0.0.5")
+
+
+
+def test_render_kills_inference_when_reading_output_fails(monkeypatch, tmp_path):
+    monkeypatch.setattr(render_farm, "inference_command",
+                        lambda *args: [sys.executable, "-c", "import time; time.sleep(60)"])
+
+    def broken_output(stream):
+        raise OSError("pipe broke")
+        yield
+
+    monkeypatch.setattr(render_farm, "iter_output_lines", broken_output)
+    killed = []
+    real_kill = render_farm.kill_process_tree
+
+    def kill(process, *args, **kwargs):
+        killed.append(process)
+        return real_kill(process, *args, **kwargs)
+
+    monkeypatch.setattr(render_farm, "kill_process_tree", kill)
+    worker = RenderWorker(RenderFarmClient("http://127.0.0.1:1"), "worker-a", str(tmp_path))
+    audio = tmp_path / "voice.wav"
+    audio.write_bytes(b"")
+
+    with pytest.raises(OSError):
+        worker.render("job", str(audio), "face.jpg", {}, str(tmp_path), threading.Event())
+    assert len(killed) == 1
+    assert killed[0].poll() is not None
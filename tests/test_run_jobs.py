@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from run_jobs import load_jobs
+
+
+def write_json(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_text_file_is_one_job(tmp_path):
+    script = tmp_path / "promo.txt"
+    script.write_text("Spoken script.", encoding="utf-8")
+    assert load_jobs(str(script)) == [{"name": "promo", "script": "Spoken script."}]
+
+
+def test_defaults_and_relative_paths(tmp_path):
+    (tmp_path / "script.txt").write_text("From a file.", encoding="utf-8")
+    job_file = write_json(tmp_path / "batch.json", {
+        "avatar": "face.jpg",
+        "post": True,
+        "jobs": [
+            {"script_file": "script.txt"},
+            {"topic": "morning routines", "post": False, "avatars": ["a.jpg", "b.jpg"]},
+        ],
+    })
+    first, second = load_jobs(job_file)
+
+    assert first["name"] == "batch-1"
+    assert first["script"] == "From a file."
+    assert first["avatar"] == os.path.join(str(tmp_path), "face.jpg")
+    assert first["post"] is True
+
+    assert second["name"] == "batch-2"
+    assert second["post"] is False
+    assert second["avatars"] == [os.path.join(str(tmp_path), "a.jpg"), os.path.join(str(tmp_path), "b.jpg")]
+
+
+def test_single_job_object(tmp_path):
+    job_file = write_json(tmp_path / "one.json", {"name": "custom", "topic": "focus"})
+    assert load_jobs(job_file) == [{"name": "custom", "topic": "focus"}]
+
+
+def test_job_without_topic_or_script_is_rejected(tmp_path):
+    job_file = write_json(tmp_path / "bad.json", [{"avatar": "face.jpg"}])
+    with pytest.raises(ValueError):
+        load_jobs(job_file)
+
+
+def test_invalid_top_level_is_rejected(tmp_path):
+    job_file = write_json(tmp_path / "bad.json", "just a string")
+    with pytest.raises(ValueError):
+        load_jobs(job_file)
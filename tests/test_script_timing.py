@@ -0,0 +1,66 @@
+import json
+
+from script_timing import (
+    chunk_sentences, count_words, estimate_duration, fit_script, get_words_per_second,
+    trim_to_duration, MIN_CALIBRATION_SAMPLES, DEFAULT_WORDS_PER_SECOND
+)
+
+
+def test_chunk_sentences_respects_word_limit():
+    text = "One two three. Four five six. Seven eight nine ten."
+    assert chunk_sentences(text, max_words=6) == ["One two three. Four five six.", "Seven eight nine ten."]
+
+
+def test_chunk_sentences_keeps_long_sentence_whole():
+    text = "Short one. " + " ".join(["word"] * 10) + ". Tail."
+    chunks = chunk_sentences(text, max_words=5)
+    assert chunks == ["Short one.", " ".join(["word"] * 10) + ".", "Tail."]
+
+
+def test_chunk_sentences_empty_text():
+    assert chunk_sentences("   ") == []
+
+
+def test_count_words_ignores_hashtags():
+    assert count_words("Grow your reach today #growth #reels") == 4
+
+
+def test_fit_script_within_tolerance():
+    text = "one two three four five six seven eight nine ten"
+    fits, estimate = fit_script(text, target_seconds=10, words_per_second=1)
+    assert fits
+    assert estimate == 10
+
+    fits, estimate = fit_script(text, target_seconds=8, tolerance=1.1, words_per_second=1)
+    assert not fits
+
+
+def test_fit_script_counts_pauses():
+    plain = estimate_duration("one two three four", words_per_second=2)
+    punctuated = estimate_duration("One, two. Three, four.", words_per_second=2)
+    assert punctuated > plain
+
+
+def test_trim_to_duration_keeps_closing_sentence():
+    text = "Hook line here. Middle sentence one. Middle sentence two. Follow for more."
+    trimmed = trim_to_duration(text, target_seconds=4, words_per_second=2)
+    assert trimmed.startswith("Hook line here.")
+    assert trimmed.endswith("Follow for more.")
+    assert "Middle sentence two." not in trimmed
+
+
+def test_trim_to_duration_cuts_long_opening_at_clauses():
+    text = "This opening runs long, it keeps going, and it never seems to stop at all. Buy now."
+    trimmed = trim_to_duration(text, target_seconds=3, words_per_second=2)
+    assert trimmed == "This opening runs long."
+
+
+def test_words_per_second_uses_calibration_log(tmp_path):
+    log_path = tmp_path / "duration_log.jsonl"
+    assert get_words_per_second(str(log_path)) == DEFAULT_WORDS_PER_SECOND
+
+    with open(log_path, "w", encoding="utf-8") as f:
+        for _ in range(MIN_CALIBRATION_SAMPLES):
+            f.write(json.dumps({"words": 30, "pauses": 2.0, "actual": 12.0}) + "\n")
+        f.write("not json\n")
+    assert get_words_per_second(str(log_path)) == 3.0
@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+pytest.importorskip("pydub")
+
+from subtitles import (
+    _fill_gaps, build_ass, caption_words, group_captions, subtitles_filter, write_ass,
+    MAX_CAPTION_WORDS
+)
+
+
+def word(text, start, end):
+    return {"word": text, "start": start, "end": end}
+
+
+def test_caption_words_drops_hashtags():
+    assert caption_words("Post daily. #growth #reels") == ["Post", "daily."]
+
+
+def test_fill_gaps_interpolates_by_word_length():
+    words = ["a", "bbb", "c"]
+    times = [(0.0, 1.0), None, (3.0, 4.0)]
+    filled = _fill_gaps(words, times, end_time=5.0)
+    assert filled[1] == (1.0, 3.0)
+
+
+def test_fill_gaps_at_edges():
+    words = ["one", "two", "three"]
+    filled = _fill_gaps(words, [None, (1.0, 2.0), None], end_time=4.0)
+    assert filled[0] == (0.0, 1.0)
+    assert filled[2] == (2.0, 4.0)
+
+
+def test_fill_gaps_never_runs_backwards():
+    filled = _fill_gaps(["x", "y"], [(2.0, 3.0), None], end_time=1.0)
+    assert filled[1] == (3.0, 3.0)
+
+
+def test_group_captions_breaks_on_punctuation_and_length():
+    aligned = [word(f"w{i}", i * 0.3, i * 0.3 + 0.25) for i in range(MAX_CAPTION_WORDS + 2)]
+    aligned[1]["word"] = "w1,"
+    captions = group_captions(aligned)
+    assert [len(caption) for caption in captions] == [2, MAX_CAPTION_WORDS]
+
+
+def test_group_captions_breaks_on_pause():
+    captions = group_captions([word("one", 0.0, 0.3), word("two", 2.0, 2.3)])
+    assert len(captions) == 2
+
+
+def test_build_ass_karaoke_timing():
+    ass = build_ass([word("Hello", 0.0, 0.5), word("{world}.", 0.7, 1.2)])
+    dialogue = [line for line in ass.splitlines() if line.startswith("Dialogue:")]
+    assert dialogue == ["Dialogue: 0,0:00:00.00,0:00:01.20,Caption,,0,0,0,,{\\kf50}Hello {\\kf70}(world)."]
+    assert "PlayResY: 1920" in ass
+
+
+def test_write_ass_keeps_unchanged_file(tmp_path):
+    path = tmp_path / "captions.ass"
+    aligned = [word("Hi.", 0.0, 0.4)]
+    write_ass(aligned, str(path))
+    path.write_text(build_ass(aligned), encoding="utf-8")
+    mtime = path.stat().st_mtime_ns
+    write_ass(aligned, str(path))
+    assert path.stat().st_mtime_ns == mtime
+
+
+def unquote(value, terms=""):
+    """Unescape a token the way ffmpeg's av_get_token does, stopping at a terminator."""
+    out = ""
+    i = 0
+    while i < len(value) and value[i] not in terms:
+        char = value[i]
+        i += 1
+        if char == "\\" and i < len(value):
+            out += value[i]
+            i += 1
+        elif char == "'":
+            end = value.find("'", i)
+            end = len(value) if end == -1 else end
+            out += value[i:end]
+            i = end + 1
+        else:
+            out += char
+    return out
+
+
+def test_subtitles_filter_escapes_quotes_and_colons(tmp_path):
+    path = str(tmp_path / "it's 10:30, [draft].ass")
+    name, args = subtitles_filter(path).split("=", 1)
+    # Filter graph level, then the filter's own option parser
+    assert name == "subtitles"
+    assert unquote(unquote(args, "[],;"), ":") == os.path.abspath(path)
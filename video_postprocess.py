@@ -0,0 +1,182 @@
+import os
+import re
+import json
+import subprocess
+
+
+# Instagram Reels frame size (9:16)
+REELS_WIDTH = 1080
+REELS_HEIGHT = 1920
+
+# Loudness target: Instagram normalizes playback to about -14 LUFS
+TARGET_LOUDNESS = -14.0
+TARGET_TRUE_PEAK = -1.5
+TARGET_LRA = 11.0
+
+# The encode aims for this file size; the bitrate is clamped to keep quality sane
+TARGET_SIZE_MB = 12
+MIN_VIDEO_KBPS = 1500
+MAX_VIDEO_KBPS = 6000
+AUDIO_KBPS = 128
+
+# Suffix of post-processed files, so they aren't processed twice
+REELS_SUFFIX = "_reels"
+
+DURATION_REGEX = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def reels_output_path(video_path):
+    """Return the path of the Reels-ready version of a video."""
+    name, _ = os.path.splitext(video_path)
+    return f"{name}{REELS_SUFFIX}.mp4"
+
+
+def is_reels_video(video_path):
+    """Check whether a video is already the output of prepare_for_reels()."""
+    return os.path.splitext(video_path)[0].endswith(REELS_SUFFIX)
+
+
+def measure_loudness(ffmpeg_path, video_path, timeout=120):
+    """
+    Measure the loudness of a video's audio track (audio only, so this is quick).
+
+    Args:
+        ffmpeg_path (str): Path to the ffmpeg executable
+        video_path (str): Input video
+        timeout (float): Seconds before the measurement is abandoned
+
+    Returns:
+        tuple: (loudnorm stats dict or None, duration in seconds or None)
+    """
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-nostdin",
+        "-i", video_path,
+        "-vn",
+        "-af", f"loudnorm=I={TARGET_LOUDNESS}:TP={TARGET_TRUE_PEAK}:LRA={TARGET_LRA}:print_format=json",
+        "-f", "null", "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    output = result.stderr
+
+    duration = None
+    match = DURATION_REGEX.search(output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    # loudnorm prints its JSON block last
+    stats = None
+    start = output.rfind("{")
+    end = output.rfind("}")
+    if result.returncode == 0 and start != -1 and end > start:
+        try:
+            stats = json.loads(output[start:end + 1])
+        except ValueError:
+            stats = None
+    return stats, duration
+
+
+def video_bitrate_for(duration, target_size_mb=TARGET_SIZE_MB):
+    """
+    Pick a video bitrate (kbps) that lands the file near target_size_mb.
+
+    Args:
+        duration (float): Video duration in seconds, or None
+        target_size_mb (float): Desired output size in MB
+
+    Returns:
+        int: Video bitrate in kbps
+    """
+    if not duration:
+        return MAX_VIDEO_KBPS
+    total_kbps = target_size_mb * 8 * 1024 / duration
+    # Leave room for the audio track and container overhead
+    video_kbps = int(total_kbps * 0.97) - AUDIO_KBPS
+    return max(MIN_VIDEO_KBPS, min(MAX_VIDEO_KBPS, video_kbps))
+
+
+def reframe_filter(width=REELS_WIDTH, height=REELS_HEIGHT):
+    """
+    Build a filter graph that fits the video into a 9:16 frame. The source is
+    scaled to fit, centred, and placed over a blurred, zoomed copy of itself
+    instead of being cropped, so the face is never cut off.
+    """
+    return (
+        f"[0:v]split=2[bg][fg];"
+        f"[bg]scale={width}:{height}:force_original_aspect_ratio=increase,"
+        f"crop={width}:{height},boxblur=20:2[bgb];"
+        f"[fg]scale={width}:{height}:force_original_aspect_ratio=decrease[fgs];"
+        f"[bgb][fgs]overlay=(W-w)/2:(H-h)/2,setsar=1,format=yuv420p"
+    )
+
+
+def loudnorm_filter(stats=None):
+    """
+    Build the loudnorm filter. With stats from measure_loudness() the
+    normalization is linear (second pass), otherwise it falls back to
+    single-pass dynamic normalization.
+    """
+    base = f"loudnorm=I={TARGET_LOUDNESS}:TP={TARGET_TRUE_PEAK}:LRA={TARGET_LRA}"
+    if not stats:
+        return base
+    return (
+        f"{base}:measured_I={stats['input_i']}:measured_TP={stats['input_tp']}"
+        f":measured_LRA={stats['input_lra']}:measured_thresh={stats['input_thresh']}"
+        f":offset={stats['target_offset']}:linear=true"
+    )
+
+
+def prepare_for_reels(ffmpeg_path, video_path, output_path=None, target_size_mb=TARGET_SIZE_MB,
+                      video_filters=None, timeout=1800):
+    """
+    Make a video Reels-ready: reframe to 1080x1920, normalize loudness,
+    encode H.264/AAC at a size-targeted bitrate and move the moov atom to
+    the front of the file (fast start).
+
+    Args:
+        ffmpeg_path (str): Path to the ffmpeg executable
+        video_path (str): SadTalker output video
+        output_path (str): Output file. Defaults to <video>_reels.mp4
+        target_size_mb (float): Desired output size in MB
+        video_filters (str): Extra filters applied to the reframed video in
+                             the same encode (e.g. burned-in subtitles)
+        timeout (float): Seconds before the encode is abandoned
+
+    Returns:
+        str: Path to the processed video, or None if processing failed
+    """
+    if output_path is None:
+        output_path = reels_output_path(video_path)
+
+    stats, duration = measure_loudness(ffmpeg_path, video_path)
+    video_kbps = video_bitrate_for(duration, target_size_mb)
+
+    filter_graph = reframe_filter()
+    if video_filters:
+        filter_graph += f",{video_filters}"
+    filter_graph += "[v]"
+
+    cmd = [
+        ffmpeg_path, "-hide_banner", "-nostdin", "-y",
+        "-i", video_path,
+        "-filter_complex", filter_graph,
+        "-map", "[v]", "-map", "0:a?",
+        "-c:v", "libx264", "-preset", "medium", "-profile:v", "high",
+        "-b:v", f"{video_kbps}k",
+        "-maxrate", f"{int(video_kbps * 1.5)}k",
+        "-bufsize", f"{video_kbps * 2}k",
+        "-af", loudnorm_filter(stats),
+        "-c:a", "aac", "-b:a", f"{AUDIO_KBPS}k", "-ar", "48000",
+        "-movflags", "+faststart",
+        output_path
+    ]
+
+    print(f"Preparing video for Reels at {video_kbps} kbps: {output_path}")
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        print(f"Reels post-processing failed: {result.stderr[-2000:]}")
+        return None
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"Reels video ready ({size_mb:.1f} MB): {output_path}")
+    return output_path